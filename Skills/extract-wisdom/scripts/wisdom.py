@@ -16,41 +16,63 @@ Single script replacing the individual bash scripts for transcript download,
 markdown formatting, and PDF rendering. Run via: uv run wisdom.py <subcommand>
 
 Subcommands:
-    transcript <url>                Download YouTube transcript
+    transcript <url> [url...] [--batch F] [--workers N] [--job F]
+                                    Download YouTube transcript(s); several URLs or a
+                                    playlist run as a resumable batch (progress kept in
+                                    wisdom-transcript-jobs/, re-run to resume)
     output-dir                      Print the resolved output directory
     create-dir <description>        Create a date-prefixed directory for non-YouTube sources
     rename <dir> <description>      Rename directory with date prefix
     format [--check] <files...>     Format markdown with prettier
-    pdf [--css F] [--open] [--no-stamp] [file]
+    pdf [--css F] [--open] [--no-stamp] [--profile R] [file]
                                     Render markdown to styled PDF
-    regenerate-pdfs [base_dir] [--stamp] [--css F]
-                                    Re-render every wisdom analysis PDF (no date stamp by default)
-    index [base_dir]                Regenerate the wisdom library index.html
-    epub [base_dir] [--output F] [--title T] [--descriptions] [--kindle] [--open]
+    regenerate-pdfs [base_dir] [--stamp] [--css F] [--skip-unchanged] [--timeout S] [--profile R]
+                                    Re-render every wisdom analysis PDF (no date stamp by default;
+                                    --skip-unchanged leaves PDFs whose inputs are unchanged;
+                                    most expensive first, using past render times;
+                                    --profile writes per-stage timings to a .json/.csv report)
+    index [base_dir] [--full] [--workers N]
+                                    Regenerate the wisdom library index.html
+                                    (incremental via wisdom-manifest.json; --full rebuilds;
+                                    changed files are parsed in N processes)
+    epub [base_dir] [--output F] [--title T] [--descriptions] [--kindle] [--open] [--workers N]
                                     Bind the whole corpus into a single .epub
                                     (grouped by year; --kindle also emits .azw3)
-    backfill [dir] [--all] [--force] Backfill metadata and thumbnails
+    backfill [dir] [--all] [--force] [--workers N] [--per-host N]
+                                    Backfill metadata and thumbnails (pooled keep-alive
+                                    connections, retries, conditional re-fetches)
+    serve [--detach] [--idle S] [--pdf-workers N] [--status] [--stop]
+                                    Keep search/related/tags data and a WeasyPrint
+                                    render pool warm behind a Unix socket; those
+                                    commands and pdf/regenerate-pdfs use it when running
 """
 
 from __future__ import annotations
 
 import argparse
 import base64
+import bisect
 import difflib
 import fcntl
 import hashlib
+import heapq
 import html as html_mod
+import importlib.util
 import json
 import math
 import os
 import platform
 import re
+import shlex
 import shutil
+import signal
+import socket
 import sqlite3
 import subprocess
 import sys
 import time
 import tempfile
+import threading
 import urllib.error
 import urllib.request
 import uuid
@@ -58,7 +80,7 @@ import zipfile
 from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 from zoneinfo import ZoneInfo
 
 # ---------------------------------------------------------------------------
@@ -89,11 +111,20 @@ TEMPLATE_FILE = SKILL_DIR / "styles" / "wisdom-pdf.html5"
 EPUB_CSS_FILE = SKILL_DIR / "styles" / "wisdom-epub.css"
 
 # Index generation settings.
-_INDEX_SCHEMA_VERSION = 7
+_INDEX_SCHEMA_VERSION = 9
 _INDEX_ENV_VAR = "EXTRACT_WISDOM_CREATE_INDEX"
 _INDEX_TEMPLATE = SKILL_DIR / "styles" / "wisdom-index.html"
 _INDEX_LOCK_TIMEOUT = 300  # seconds (5 minutes)
 
+# Sharded index layout: index.html inlines metadata only and each entry's
+# body and related list live in per-year script shards under _INDEX_DATA_DIR,
+# loaded when the entry is opened. "auto" shards once the inline payload
+# would exceed _INDEX_SHARD_AUTO_BYTES.
+_INDEX_SHARDS_ENV_VAR = "EXTRACT_WISDOM_INDEX_SHARDS"
+_INDEX_DATA_DIR = "wisdom-data"
+_INDEX_SHARD_SIZE = 100  # entries per shard within a year
+_INDEX_SHARD_AUTO_BYTES = 4 * 1024 * 1024
+
 
 # ---------------------------------------------------------------------------
 # Environment detection
@@ -159,6 +190,227 @@ def detect_browser() -> str | None:
     return None
 
 
+# ---------------------------------------------------------------------------
+# HTTP fetching
+# ---------------------------------------------------------------------------
+
+# Metadata and thumbnail fetches go through one small engine: idle
+# keep-alive connections are pooled per (scheme, host, port), at most
+# _HTTP_PER_HOST requests run against one host at a time, transient
+# failures (connection errors, 429 and 5xx) are retried with exponential
+# backoff honouring Retry-After, and responses carry ETag/Last-Modified
+# validators that backfill keeps in _HTTP_CACHE_NAME so a re-fetch of an
+# unchanged page or image is a bodiless 304.
+_HTTP_USER_AGENT = "wisdom/1.0"
+_HTTP_PER_HOST = int(os.environ.get("EXTRACT_WISDOM_HTTP_PER_HOST", "3"))
+_HTTP_RETRIES = 3
+_HTTP_BACKOFF_S = 0.5
+_HTTP_RETRY_AFTER_MAX_S = 30.0
+_HTTP_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_HTTP_MAX_REDIRECTS = 5
+_HTTP_CACHE_NAME = "wisdom-http-cache.json"
+_HTTP_CACHE_VERSION = 1
+
+_http_lock = threading.Lock()
+_http_idle: dict[tuple[str, str, int], list[Any]] = {}
+_http_host_slots: dict[str, threading.BoundedSemaphore] = {}
+# Validators and parsed results by URL; None unless a command loaded them.
+_http_cache: dict[str, Any] = {"entries": None, "dirty": False}
+
+
+def _http_host_slot(url: str) -> threading.BoundedSemaphore:
+    """Semaphore bounding concurrent requests to ``url``'s host (YouTube's
+    aliases share one, see _host_key)."""
+    key = _host_key(url)
+    with _http_lock:
+        slot = _http_host_slots.get(key)
+        if slot is None:
+            slot = _http_host_slots[key] = threading.BoundedSemaphore(max(1, _HTTP_PER_HOST))
+        return slot
+
+
+def _http_connection(scheme: str, host: str, port: int, timeout: float) -> tuple[Any, bool]:
+    """An idle pooled connection (reused=True) or a new one."""
+    import http.client
+
+    with _http_lock:
+        idle = _http_idle.get((scheme, host, port))
+        if idle:
+            conn = idle.pop()
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+    if scheme == "https":
+        import ssl
+        return http.client.HTTPSConnection(host, port, timeout=timeout,
+                                           context=ssl.create_default_context()), False
+    return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+
+def _http_release(key: tuple[str, str, int], conn: Any) -> None:
+    with _http_lock:
+        idle = _http_idle.setdefault(key, [])
+        if len(idle) < max(1, _HTTP_PER_HOST):
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def _http_retry_delay(attempt: int, retry_after: str | None) -> float:
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after.strip()), _HTTP_RETRY_AFTER_MAX_S)
+    import random
+    return _HTTP_BACKOFF_S * (2 ** attempt) * (0.5 + random.random())
+
+
+def _http_once(
+    url: str, headers: dict[str, str], max_bytes: int | None, timeout: float,
+) -> tuple[int, dict[str, str], bytes]:
+    """One request on a pooled connection. A request that fails on a reused
+    connection (the server closed it while idle) is replayed once on a
+    fresh one. Proxied URLs go through urllib without pooling."""
+    import http.client
+    from urllib.parse import urlsplit
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Unsupported URL: {url}")
+    if urllib.request.getproxies().get(scheme) and not urllib.request.proxy_bypass(parts.hostname):
+        req = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                return resp.status, {k.lower(): v for k, v in resp.headers.items()}, resp.read(max_bytes or -1)
+        except urllib.error.HTTPError as exc:
+            return exc.code, {k.lower(): v for k, v in exc.headers.items()}, b""
+
+    port = parts.port or (443 if scheme == "https" else 80)
+    key = (scheme, parts.hostname, port)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    while True:
+        conn, reused = _http_connection(scheme, parts.hostname, port, timeout)
+        try:
+            conn.request("GET", target, headers=headers)
+            resp = conn.getresponse()
+            body = resp.read(max_bytes) if max_bytes else resp.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError,
+                http.client.CannotSendRequest, http.client.BadStatusLine):
+            conn.close()
+            if reused:
+                continue
+            raise
+        except BaseException:
+            conn.close()
+            raise
+        # A partly read body or a closing server makes the connection unusable.
+        if resp.will_close or not resp.isclosed():
+            conn.close()
+        else:
+            _http_release(key, conn)
+        return resp.status, {k.lower(): v for k, v in resp.getheaders()}, body
+
+
+def _http_get(
+    url: str, *, max_bytes: int | None = None, timeout: float = 15,
+    validators: dict[str, str] | None = None,
+) -> tuple[int, dict[str, str], bytes, str]:
+    """GET ``url`` through the engine and return (status, lower-cased
+    headers, body, final URL after redirects).
+
+    ``validators`` ({"etag", "last_modified"}) make the request conditional,
+    so an unchanged resource comes back as status 304 with no body. Only the
+    first ``max_bytes`` of the body are read when given. Raises OSError or
+    http.client.HTTPException once retries are exhausted; HTTP error
+    statuses are returned, not raised.
+    """
+    import http.client
+    from urllib.parse import urljoin
+
+    headers = {"User-Agent": _HTTP_USER_AGENT, "Accept-Encoding": "identity"}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    for _ in range(_HTTP_MAX_REDIRECTS + 1):
+        attempt = 0
+        while True:
+            try:
+                with _http_host_slot(url):
+                    status, resp_headers, body = _http_once(url, headers, max_bytes, timeout)
+            except (OSError, http.client.HTTPException):
+                if attempt >= _HTTP_RETRIES:
+                    raise
+                time.sleep(_http_retry_delay(attempt, None))
+                attempt += 1
+                continue
+            if status in _HTTP_RETRY_STATUSES and attempt < _HTTP_RETRIES:
+                time.sleep(_http_retry_delay(attempt, resp_headers.get("retry-after")))
+                attempt += 1
+                continue
+            break
+        if status in (301, 302, 303, 307, 308) and resp_headers.get("location"):
+            url = urljoin(url, resp_headers["location"])
+            continue
+        return status, resp_headers, body, url
+    raise OSError(f"Too many redirects: {url}")
+
+
+def _http_cache_load(base_dir: Path) -> None:
+    """Load conditional-request validators for this run."""
+    entries: dict[str, Any] = {}
+    try:
+        data = json.loads((base_dir / _HTTP_CACHE_NAME).read_text(encoding="utf-8"))
+        if isinstance(data, dict) and data.get("version") == _HTTP_CACHE_VERSION:
+            entries = data.get("entries") or {}
+    except (OSError, json.JSONDecodeError):
+        pass
+    with _http_lock:
+        _http_cache["entries"] = entries if isinstance(entries, dict) else {}
+        _http_cache["dirty"] = False
+
+
+def _http_cache_save(base_dir: Path) -> None:
+    """Atomically write the validators back (temp file + rename) if any changed."""
+    with _http_lock:
+        entries = _http_cache["entries"]
+        if entries is None or not _http_cache["dirty"]:
+            return
+        payload = json.dumps({"version": _HTTP_CACHE_VERSION, "entries": entries},
+                             ensure_ascii=False, separators=(",", ":"))
+        _http_cache["dirty"] = False
+    path = base_dir / _HTTP_CACHE_NAME
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as exc:
+        tmp.unlink(missing_ok=True)
+        print(f"Warning: Could not write HTTP cache: {exc}", file=sys.stderr)
+
+
+def _http_cached(url: str) -> dict[str, Any] | None:
+    with _http_lock:
+        entries = _http_cache["entries"]
+        return entries.get(url) if entries is not None else None
+
+
+def _http_remember(url: str, headers: dict[str, str], **data: Any) -> None:
+    """Record a 200 response's validators (and whatever the caller derived
+    from its body) for the next conditional request to ``url``."""
+    etag, last_modified = headers.get("etag", ""), headers.get("last-modified", "")
+    with _http_lock:
+        entries = _http_cache["entries"]
+        if entries is None:
+            return
+        if etag or last_modified:
+            entries[url] = {"etag": etag, "last_modified": last_modified, **data}
+        else:
+            entries.pop(url, None)
+        _http_cache["dirty"] = True
+
+
 # ---------------------------------------------------------------------------
 # Transcript download
 # ---------------------------------------------------------------------------
@@ -170,33 +422,185 @@ def _sanitise_filename(name: str) -> str:
     return name.strip("_")
 
 
-def _json3_to_text(json3_path: Path) -> str:
-    """Convert yt-dlp JSON3 subtitle file to clean paragraph text."""
-    data = json.loads(json3_path.read_text(encoding="utf-8"))
-    entries: list[tuple[int, str]] = []
-    for event in data.get("events", []):
+# json3 files are read in chunks of this many bytes; memory stays around one
+# chunk plus the largest single event, however long the captions run.
+_JSON3_READ_CHUNK = 1 << 20
+
+
+def _iter_json3_events(json3_path: Path) -> Iterator[dict[str, Any]]:
+    """Yield the objects of a json3 file's top-level "events" array one at a
+    time, reading the file incrementally instead of loading it whole.
+
+    Other top-level members (pens, window styles) are decoded and dropped.
+    Raises ValueError on malformed input, like json.loads would.
+    """
+    import codecs
+
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    eof = False
+
+    with open(json3_path, "rb") as fh:
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            data = fh.read(_JSON3_READ_CHUNK)
+            eof = not data
+            buf = buf[pos:] + utf8.decode(data, final=eof)
+            pos = 0
+            return not eof or bool(buf)
+
+        def skip_ws() -> str:
+            # Next non-whitespace character (not consumed), "" at end of file.
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill() or pos >= len(buf) and eof:
+                    return ""
+
+        def value() -> Any:
+            # A value counts as complete only when something follows it (or
+            # the file has ended); otherwise a number cut at the chunk edge
+            # would decode short.
+            nonlocal pos
+            skip_ws()
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise
+                    continue
+                if end < len(buf) or eof:
+                    pos = end
+                    return obj
+                fill()
+
+        def expect(chars: str) -> str:
+            nonlocal pos
+            ch = skip_ws()
+            if not ch or ch not in chars:
+                raise ValueError(f"Malformed json3: expected {chars!r} in {json3_path.name}")
+            pos += 1
+            return ch
+
+        expect("{")
+        if skip_ws() == "}":
+            return
+        while True:
+            key = value()
+            expect(":")
+            if key == "events" and skip_ws() == "[":
+                pos += 1
+                if skip_ws() == "]":
+                    pos += 1
+                else:
+                    while True:
+                        event = value()
+                        if isinstance(event, dict):
+                            yield event
+                        if expect(",]") == "]":
+                            break
+            else:
+                value()
+            if expect(",}") == "}":
+                return
+
+
+def _json3_segments(json3_path: Path) -> Iterator[tuple[int, str]]:
+    """Yield (start ms, text) for each caption event with visible text.
+
+    Exact repeats of an event (same start time and text), which re-muxed
+    livestream captions contain, are yielded once.
+    """
+    seen_t = None
+    seen: set[str] = set()
+    for event in _iter_json3_events(json3_path):
         segs = event.get("segs")
         if not segs:
             continue
         text = "".join(seg.get("utf8", "") for seg in segs)
+        if not re.sub(r"\s+", "", text):
+            continue
         t = event.get("tStartMs", 0)
-        entries.append((t, text))
+        if t != seen_t:
+            seen_t = t
+            seen.clear()
+        elif text in seen:
+            continue
+        seen.add(text)
+        yield t, text
+
+
+def _json3_text_chunks(json3_path: Path) -> Iterator[str]:
+    """Yield the clean paragraph text of a json3 subtitle file in pieces.
 
+    Whitespace normalisation only ever spans runs of whitespace, so each
+    piece is cut just after a non-space character and the trailing run is
+    carried into the next; the pieces join to exactly what normalising the
+    whole text at once would give.
+    """
+    pending: list[str] = []
+    pending_len = 0
     prev_t = 0
-    parts: list[str] = []
-    for t, text in entries:
-        if not re.sub(r"\s+", "", text):
-            continue
-        if parts and (t - prev_t) > PARAGRAPH_GAP_MS:
-            parts.append("\n\n")
-        parts.append(text)
+    started = False
+    emitted = False
+
+    def flush(final: bool) -> Iterator[str]:
+        nonlocal pending, pending_len, emitted
+        raw = "".join(pending)
+        cut = len(raw)
+        if not final:
+            while cut and raw[cut - 1].isspace():
+                cut -= 1
+        head, tail = raw[:cut], raw[cut:]
+        pending, pending_len = ([tail], len(tail)) if tail else ([], 0)
+        head = re.sub(r"[ \t]+", " ", head)
+        head = re.sub(r"\n ", "\n", head)
+        head = re.sub(r" \n", "\n", head)
+        if not emitted:
+            head = head.lstrip()
+        if final:
+            head = head.rstrip()
+        if head:
+            emitted = True
+            yield head
+
+    for t, text in _json3_segments(json3_path):
+        if started and (t - prev_t) > PARAGRAPH_GAP_MS:
+            pending.append("\n\n")
+        pending.append(text)
+        pending_len += len(text) + 2
+        started = True
         prev_t = t
+        if pending_len >= _JSON3_READ_CHUNK:
+            yield from flush(final=False)
+    yield from flush(final=True)
 
-    raw = "".join(parts)
-    raw = re.sub(r"[ \t]+", " ", raw)
-    raw = re.sub(r"\n ", "\n", raw)
-    raw = re.sub(r" \n", "\n", raw)
-    return raw.strip()
+
+def _json3_to_text(json3_path: Path) -> str:
+    """Convert yt-dlp JSON3 subtitle file to clean paragraph text."""
+    return "".join(_json3_text_chunks(json3_path))
+
+
+def _json3_to_file(json3_path: Path, output_file: Path) -> None:
+    """Stream a json3 subtitle file's clean text straight to ``output_file``
+    (via a temp file, so a failed conversion leaves no partial transcript)."""
+    tmp = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            for chunk in _json3_text_chunks(json3_path):
+                out.write(chunk)
+        os.replace(tmp, output_file)
+    finally:
+        tmp.unlink(missing_ok=True)
 
 
 class _SilentLogger:
@@ -215,109 +619,324 @@ class _SilentLogger:
         pass
 
 
-def _download_transcript(url: str, video_dir: Path, use_cookies: bool = False) -> bool:
-    """Download subtitles using yt-dlp Python API."""
-    from yt_dlp import YoutubeDL
+# yt-dlp (and the tools it spawns) write straight to fd 2, so downloads point
+# it at /dev/null. The redirect is process-wide and batch ingestion downloads
+# on several threads, so it is reference-counted: the first caller in points
+# fd 2 at /dev/null and the last one out restores it. Anything a batch thread
+# reports must therefore go through _stderr_print (or, for child processes,
+# _stderr_fd), which always reach the real stderr.
+_stderr_lock = threading.Lock()
+_stderr_depth = 0
+_stderr_saved_fd = -1
+
+
+def _stderr_fd() -> int:
+    """A descriptor for the real stderr, kept open for the process lifetime
+    so it stays valid while fd 2 is redirected."""
+    global _stderr_saved_fd
+    with _stderr_lock:
+        if _stderr_saved_fd < 0:
+            _stderr_saved_fd = os.dup(2)
+        return _stderr_saved_fd
+
+
+def _silence_stderr() -> None:
+    global _stderr_depth
+    _stderr_fd()  # saved before fd 2 is first redirected
+    with _stderr_lock:
+        if _stderr_depth == 0:
+            sys.stderr.flush()
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, 2)
+            os.close(devnull)
+        _stderr_depth += 1
+
+
+def _restore_stderr() -> None:
+    global _stderr_depth
+    with _stderr_lock:
+        _stderr_depth -= 1
+        if _stderr_depth == 0:
+            try:
+                os.dup2(_stderr_saved_fd, 2)
+            except OSError:
+                pass
+
+
+def _stderr_print(message: str) -> None:
+    """Print to the real stderr, even while another thread has it silenced."""
+    fd = _stderr_fd()
+    with _stderr_lock:
+        sys.stderr.flush()
+        try:
+            os.write(fd, (message + "\n").encode(errors="replace"))
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# yt-dlp extraction session
+# ---------------------------------------------------------------------------
+
+# One yt-dlp extraction per video serves the metadata, subtitle and audio
+# steps: the info dict is kept in memory for the run and on disk per video
+# ID, and downloads replay it (like yt-dlp's --load-info-json) rather than
+# extracting the URL again. Stream and caption URLs in it expire after a few
+# hours, hence the TTL; a download that fails on a cached dict re-extracts
+# once. EXTRACT_WISDOM_YTINFO_CACHE names the cache directory, or "false" to
+# keep the session in memory only.
+_YTINFO_CACHE_ENV_VAR = "EXTRACT_WISDOM_YTINFO_CACHE"
+_YTINFO_TTL_S = float(os.environ.get("EXTRACT_WISDOM_YTINFO_TTL", str(3 * 3600)))
+# Version 1 records could hold browser cookies and are deleted when read.
+_YTINFO_CACHE_VERSION = 2
+# Dropped at any depth of an info dict before it is kept: yt-dlp copies the
+# session's cookies into each format's "cookies" (which sanitize_info keeps),
+# and downloads recompute "http_headers" and load cookies from the browser
+# themselves.
+_YTINFO_PRIVATE_KEYS = frozenset({"cookies", "http_headers"})
+_YOUTUBE_ID_RE = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/live/|/embed/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])")
+
+# Info records by URL and by video ID; see _youtube_info.
+_ytinfo_memo: dict[str, dict[str, Any]] = {}
+_ytinfo_lock = threading.Lock()
+_ytinfo_pruned = False
+_ytinfo_run_started = time.time()
+_browser_memo: dict[str, str | None] = {}
+
+
+def _cookie_browser() -> str | None:
+    """detect_browser(), resolved once per process."""
+    if "browser" not in _browser_memo:
+        _browser_memo["browser"] = detect_browser()
+    return _browser_memo["browser"]
+
+
+def _youtube_video_id(url: str) -> str | None:
+    m = _YOUTUBE_ID_RE.search(url)
+    return m.group(1) if m else None
+
+
+def _ytinfo_cache_dir() -> Path | None:
+    val = os.environ.get(_YTINFO_CACHE_ENV_VAR, "").strip()
+    if val.lower() in ("false", "0", "no", "off"):
+        return None
+    if val:
+        return Path(val).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    root = Path(xdg) if xdg else Path.home() / ".cache"
+    return root / "extract-wisdom" / "ytinfo"
+
+
+def _ytinfo_load(video_id: str) -> dict[str, Any] | None:
+    """A cached info record for ``video_id`` younger than the TTL, or None."""
+    import gzip
+
+    cache_dir = _ytinfo_cache_dir()
+    if cache_dir is None:
+        return None
+    try:
+        with gzip.open(cache_dir / f"{video_id}.json.gz", "rt", encoding="utf-8") as fh:
+            record = json.load(fh)
+    except (OSError, EOFError, json.JSONDecodeError):
+        return None
+    if isinstance(record, dict) and record.get("version") != _YTINFO_CACHE_VERSION:
+        (cache_dir / f"{video_id}.json.gz").unlink(missing_ok=True)
+        return None
+    if (
+        not isinstance(record, dict)
+        or time.time() - record.get("fetched", 0) > _YTINFO_TTL_S
+        or not isinstance(record.get("info"), dict)
+    ):
+        return None
+    return record
+
+
+def _ytinfo_save(record: dict[str, Any]) -> None:
+    """Atomically write an info record (gzipped JSON), first pruning expired
+    records on the first write of each run."""
+    import gzip
 
-    opts: dict = {
-        "skip_download": True,
-        "writesubtitles": True,
-        "writeautomaticsub": True,
-        "subtitlesformat": "json3",
-        "subtitleslangs": SUBTITLE_LANGS,
-        "restrictfilenames": True,
-        "outtmpl": str(video_dir / "%(title)s.%(ext)s"),
+    global _ytinfo_pruned
+    cache_dir = _ytinfo_cache_dir()
+    if cache_dir is None:
+        return
+    if not _ytinfo_pruned and cache_dir.is_dir():
+        _ytinfo_pruned = True
+        cutoff = time.time() - _YTINFO_TTL_S
+        for old in cache_dir.glob("*.json.gz"):
+            try:
+                if old.stat().st_mtime < cutoff:
+                    old.unlink()
+            except OSError:
+                pass
+    path = cache_dir / f"{record['info']['id']}.json.gz"
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # Owner-only: the info describes what the user has been watching.
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8", compresslevel=6) as fh:
+            json.dump(record, fh, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError) as exc:
+        tmp.unlink(missing_ok=True)
+        _stderr_print(f"Warning: Could not cache video info: {exc}")
+
+
+def _ytinfo_strip(obj: Any) -> Any:
+    """A copy of a JSON-like info dict without _YTINFO_PRIVATE_KEYS."""
+    if isinstance(obj, dict):
+        return {k: _ytinfo_strip(v) for k, v in obj.items() if k not in _YTINFO_PRIVATE_KEYS}
+    if isinstance(obj, list):
+        return [_ytinfo_strip(v) for v in obj]
+    return obj
+
+
+def _ytdl_options(browser: str | None, **extra: Any) -> dict[str, Any]:
+    opts: dict[str, Any] = {
         "quiet": True,
         "no_warnings": True,
         "noprogress": True,
         "logger": _SilentLogger(),
         "remote_components": {"ejs:github"},
+        **extra,
     }
-    if use_cookies:
-        browser = detect_browser()
-        if browser:
-            opts["cookiesfrombrowser"] = (browser,)
-    # Redirect stderr at the OS level to suppress yt-dlp's direct fd writes
-    old_fd = os.dup(2)
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    os.dup2(devnull, 2)
-    os.close(devnull)
-    try:
-        with YoutubeDL(opts) as ydl:  # type: ignore[arg-type]
-            ydl.download([url])
-        return True
-    except Exception as exc:
-        os.dup2(old_fd, 2)  # restore before printing error
-        print(f"Download error: {exc}", file=sys.stderr)
-        return False
-    finally:
+    if browser:
+        opts["cookiesfrombrowser"] = (browser,)
+    return opts
+
+
+def _youtube_info(url: str, *, refresh: bool = False) -> dict[str, Any] | None:
+    """The yt-dlp info record for a video URL: {"info": sanitised info dict,
+    "browser": cookie source used or None, "fetched": epoch seconds}.
+
+    Served from this run's memo, then the disk cache, and only then by
+    extracting - without cookies, as metadata always was, and with browser
+    cookies only if that fails (e.g. age-restricted videos). Cookies and
+    request headers are stripped before the info is kept (see
+    _YTINFO_PRIVATE_KEYS). ``refresh`` skips both caches. Returns None
+    (after printing the error) when extraction fails.
+    """
+    from yt_dlp import YoutubeDL
+
+    video_id = _youtube_video_id(url)
+    if not refresh:
+        with _ytinfo_lock:
+            record = _ytinfo_memo.get(url) or (_ytinfo_memo.get(video_id) if video_id else None)
+        if record is None and video_id:
+            record = _ytinfo_load(video_id)
+        if record is not None:
+            with _ytinfo_lock:
+                _ytinfo_memo[url] = record
+            return record
+
+    last_exc: Exception | None = None
+    browser = _cookie_browser()
+    for attempt in dict.fromkeys((None, browser)):
+        _silence_stderr()
         try:
-            os.dup2(old_fd, 2)
-        except OSError:
-            pass
-        os.close(old_fd)
+            with YoutubeDL(_ytdl_options(attempt)) as ydl:  # type: ignore[arg-type]
+                info = ydl.extract_info(url, download=False)
+                # Round-tripped so the memo holds exactly what the cache does.
+                info = _ytinfo_strip(json.loads(json.dumps(
+                    ydl.sanitize_info(info, remove_private_keys=True), default=str,
+                )))
+        except Exception as exc:
+            last_exc = exc
+            continue
+        finally:
+            _restore_stderr()
+        if not info or not info.get("id"):
+            _stderr_print("Error: Could not extract video ID from URL")
+            return None
+        record = {"version": _YTINFO_CACHE_VERSION, "info": info,
+                  "browser": attempt, "fetched": time.time()}
+        with _ytinfo_lock:
+            _ytinfo_memo[url] = _ytinfo_memo[info["id"]] = record
+        _ytinfo_save(record)
+        return record
+    _stderr_print(f"Error: Could not extract video metadata: {last_exc}")
+    return None
 
 
-def _download_audio(url: str, video_dir: Path, use_cookies: bool = False) -> bool:
-    """Download audio from YouTube and convert to WAV using yt-dlp + ffmpeg."""
+def _ytdl_download(url: str, label: str, **opts: Any) -> bool:
+    """Run a yt-dlp download for ``url`` from its session info dict instead of
+    re-extracting.
+
+    Each attempt tries browser cookies first and then none, as downloads
+    always have; the cookies come from the browser, never from the info.
+    A failure on a dict from an earlier run (typically expired URLs) is
+    retried once on a fresh extraction.
+    """
     from yt_dlp import YoutubeDL
 
-    opts: dict = {
-        "format": "bestaudio/best",
-        "postprocessors": [{
+    record = _youtube_info(url)
+    error: Exception | None = None
+    while record is not None:
+        for browser in dict.fromkeys((_cookie_browser(), None)):
+            # Redirect stderr at the OS level to suppress yt-dlp's direct fd writes
+            _silence_stderr()
+            try:
+                with YoutubeDL(_ytdl_options(browser, **opts)) as ydl:  # type: ignore[arg-type]
+                    # process_ie_result annotates the dict it is given.
+                    ydl.process_ie_result(json.loads(json.dumps(record["info"])), download=True)
+                return True
+            except Exception as exc:
+                error = exc
+            finally:
+                _restore_stderr()
+        if record["fetched"] >= _ytinfo_run_started:
+            _stderr_print(f"{label} error: {error}")
+            return False
+        record = _youtube_info(url, refresh=True)
+    return False
+
+
+def _download_transcript(url: str, video_dir: Path) -> bool:
+    """Download subtitles using yt-dlp Python API."""
+    return _ytdl_download(
+        url, "Download",
+        skip_download=True,
+        writesubtitles=True,
+        writeautomaticsub=True,
+        subtitlesformat="json3",
+        subtitleslangs=SUBTITLE_LANGS,
+        restrictfilenames=True,
+        outtmpl=str(video_dir / "%(title)s.%(ext)s"),
+    )
+
+
+def _download_audio(url: str, video_dir: Path) -> bool:
+    """Download audio from YouTube and convert to WAV using yt-dlp + ffmpeg."""
+    return _ytdl_download(
+        url, "Audio download",
+        format="bestaudio/best",
+        postprocessors=[{
             "key": "FFmpegExtractAudio",
             "preferredcodec": "wav",
         }],
-        "outtmpl": str(video_dir / "audio.%(ext)s"),
-        "restrictfilenames": True,
-        "quiet": True,
-        "no_warnings": True,
-        "noprogress": True,
-        "logger": _SilentLogger(),
-    }
-    if use_cookies:
-        browser = detect_browser()
-        if browser:
-            opts["cookiesfrombrowser"] = (browser,)
-    old_fd = os.dup(2)
-    devnull = os.open(os.devnull, os.O_WRONLY)
-    os.dup2(devnull, 2)
-    os.close(devnull)
-    try:
-        with YoutubeDL(opts) as ydl:  # type: ignore[arg-type]
-            ydl.download([url])
-        return True
-    except Exception as exc:
-        os.dup2(old_fd, 2)
-        print(f"Audio download error: {exc}", file=sys.stderr)
-        return False
-    finally:
-        try:
-            os.dup2(old_fd, 2)
-        except OSError:
-            pass
-        os.close(old_fd)
+        outtmpl=str(video_dir / "audio.%(ext)s"),
+        restrictfilenames=True,
+    )
 
 
 def _audio_transcription_fallback(url: str, video_dir: Path) -> Path | None:
     """Download audio and transcribe with Parakeet TDT v2 when subtitles are unavailable."""
     if not shutil.which("ffmpeg"):
-        print("MISSING_DEPS: ffmpeg (required for audio transcription fallback)", file=sys.stderr)
+        _stderr_print("MISSING_DEPS: ffmpeg (required for audio transcription fallback)")
         if _is_mac():
-            print("INSTALL: brew install ffmpeg", file=sys.stderr)
+            _stderr_print("INSTALL: brew install ffmpeg")
         else:
-            print("INSTALL: sudo apt install ffmpeg", file=sys.stderr)
+            _stderr_print("INSTALL: sudo apt install ffmpeg")
         return None
 
-    print("No subtitles available. Attempting audio transcription...", file=sys.stderr)
+    _stderr_print("No subtitles available. Attempting audio transcription...")
 
-    download_ok = _download_audio(url, video_dir, use_cookies=True)
-    if not download_ok:
-        download_ok = _download_audio(url, video_dir, use_cookies=False)
+    download_ok = _download_audio(url, video_dir)
 
     wav_file = video_dir / "audio.wav"
     if not download_ok or not wav_file.is_file():
-        print("Error: Failed to download audio from video", file=sys.stderr)
+        _stderr_print("Error: Failed to download audio from video")
         return None
 
     # Convert to 16kHz mono WAV (onnx-asr requires mono input).
@@ -330,7 +949,7 @@ def _audio_transcription_fallback(url: str, video_dir: Path) -> Path | None:
         wav_file.unlink()
         mono_file.rename(wav_file)
     else:
-        print("Warning: ffmpeg mono conversion failed, trying original", file=sys.stderr)
+        _stderr_print("Warning: ffmpeg mono conversion failed, trying original")
 
     transcript_file = video_dir / "audio-transcript.txt"
     transcribe_script = SCRIPT_DIR / "transcribe.py"
@@ -338,6 +957,7 @@ def _audio_transcription_fallback(url: str, video_dir: Path) -> Path | None:
     result = subprocess.run(
         ["uv", "run", str(transcribe_script), str(wav_file), str(transcript_file)],
         stdout=subprocess.PIPE,
+        stderr=_stderr_fd(),
         text=True,
     )
 
@@ -354,21 +974,14 @@ def _audio_transcription_fallback(url: str, video_dir: Path) -> Path | None:
 def _extract_youtube_metadata(url: str) -> dict[str, str] | None:
     """Extract video metadata (id, title, channel, description, thumbnail URL) via yt-dlp.
 
-    Returns None on failure so callers can decide how to handle errors.
+    Reads the shared session info (see _youtube_info), so a later subtitle
+    or audio download for the same URL does not extract it again. Returns
+    None on failure so callers can decide how to handle errors.
     """
-    from yt_dlp import YoutubeDL
-
-    try:
-        with YoutubeDL({"quiet": True, "no_warnings": True, "logger": _SilentLogger()}) as ydl:  # type: ignore[arg-type]
-            info = ydl.extract_info(url, download=False)
-    except Exception as exc:
-        print(f"Error: Could not extract video metadata: {exc}", file=sys.stderr)
-        return None
-
-    if not info or not info.get("id"):
-        print("Error: Could not extract video ID from URL", file=sys.stderr)
+    record = _youtube_info(url)
+    if record is None:
         return None
-
+    info = record["info"]
     vid = info["id"]
 
     # Truncate description to ~300 chars at a sentence boundary.
@@ -404,13 +1017,20 @@ def _fetch_web_metadata(url: str) -> dict[str, str] | None:
     """
     from html.parser import HTMLParser
 
+    cached = _http_cached(url)
     try:
-        req = urllib.request.Request(url, headers={"User-Agent": "wisdom/1.0"})
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            # Read only the first 50KB - meta tags are in <head>.
-            raw = resp.read(50 * 1024).decode(errors="replace")
+        # Read only the first 50KB - meta tags are in <head>.
+        status, headers, body, _ = _http_get(
+            url, max_bytes=50 * 1024,
+            validators=cached if cached and "metadata" in cached else None,
+        )
     except Exception:
         return None
+    if status == 304 and cached:
+        return dict(cached["metadata"])
+    if status >= 400:
+        return None
+    raw = body.decode(errors="replace")
 
     og: dict[str, str] = {}
     tc: dict[str, str] = {}
@@ -442,12 +1062,15 @@ def _fetch_web_metadata(url: str) -> dict[str, str] | None:
         from urllib.parse import urljoin
         image_url = urljoin(url, image_url)
 
-    return {
+    metadata = {
         "site_name": og.get("site_name", tc.get("site", "")),
         "title": og.get("title", tc.get("title", "")),
         "description": og.get("description", tc.get("description", "")),
         "image_url": image_url,
     }
+    if status == 200:
+        _http_remember(url, headers, metadata=metadata)
+    return metadata
 
 
 def _enrich_entry(md_path: Path, *, overwrite: bool = False) -> bool:
@@ -472,7 +1095,8 @@ def _enrich_entry(md_path: Path, *, overwrite: bool = False) -> bool:
     if source_type == "youtube":
         if not overwrite and has_thumbnail and fm.get("youtube_channel"):
             return False
-        metadata = _extract_youtube_metadata(primary)
+        with _http_host_slot(primary):
+            metadata = _extract_youtube_metadata(primary)
         if metadata is None:
             return False
         if metadata.get("channel"):
@@ -510,14 +1134,23 @@ def _enrich_entry(md_path: Path, *, overwrite: bool = False) -> bool:
 
 
 def _download_thumbnail(thumbnail_url: str, dest_path: Path) -> bool:
-    """Download an image, resize, and save as compressed JPEG."""
+    """Download an image, resize, and save as compressed JPEG.
+
+    When ``dest_path`` exists and the image was fetched before, the request
+    is conditional and an unchanged image (304) leaves the file as it is.
+    """
+    cached = _http_cached(thumbnail_url) if dest_path.is_file() else None
     try:
-        req = urllib.request.Request(thumbnail_url, headers={"User-Agent": "wisdom/1.0"})
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            raw = resp.read()
+        status, headers, raw, _ = _http_get(thumbnail_url, timeout=10, validators=cached)
     except Exception as exc:
-        print(f"Warning: Could not download thumbnail: {exc}", file=sys.stderr)
+        _stderr_print(f"Warning: Could not download thumbnail: {exc}")
+        return False
+    if status == 304 and cached:
+        return True
+    if status >= 400:
+        _stderr_print(f"Warning: Could not download thumbnail: HTTP Error {status}")
         return False
+    _http_remember(thumbnail_url, headers)
 
     try:
         import io
@@ -526,6 +1159,9 @@ def _download_thumbnail(thumbnail_url: str, dest_path: Path) -> bool:
 
         img = Image.open(io.BytesIO(raw))
         if img.width > 480:
+            # Let JPEGs decode at a reduced scale (never below 480px wide)
+            # so LANCZOS only has to cover the last step.
+            img.draft("RGB", (480, max(1, img.height * 480 // img.width)))
             ratio = 480 / img.width
             img = img.resize((480, int(img.height * ratio)), Image.Resampling.LANCZOS)
         img = img.convert("RGB")
@@ -533,7 +1169,7 @@ def _download_thumbnail(thumbnail_url: str, dest_path: Path) -> bool:
     except ImportError:
         dest_path.write_bytes(raw)
     except Exception as exc:
-        print(f"Warning: Thumbnail processing failed, saving raw: {exc}", file=sys.stderr)
+        _stderr_print(f"Warning: Thumbnail processing failed, saving raw: {exc}")
         dest_path.write_bytes(raw)
 
     return True
@@ -607,14 +1243,27 @@ def _print_transcript_output(
     print(f"NEXT_STEP: uv run <skill-dir>/scripts/wisdom.py rename \"{video_dir}\" \"<Short-Description>\"")
 
 
-def cmd_transcript(args: argparse.Namespace) -> None:
-    url: str = args.url
-    base_dir = detect_base_dir()
+# Parakeet transcription is CPU- and memory-heavy, so batch ingestion runs at
+# most one audio fallback at a time even when subtitle downloads overlap.
+_audio_fallback_lock = threading.Lock()
+
+_NO_SUBTITLES_ERROR = "No subtitles available and audio transcription failed"
+
+
+def _fetch_transcript(
+    url: str, base_dir: Path, throttle: Any = None,
+) -> tuple[Path | None, Path | None, dict[str, str] | None, str | None]:
+    """Download and convert the transcript for one video into base_dir/<id>.
 
+    Returns (transcript file, video dir, metadata, error message); the file is
+    None exactly when the error is set. ``throttle``, when given, is called
+    with the URL before every yt-dlp request.
+    """
+    if throttle:
+        throttle(url)
     metadata = _extract_youtube_metadata(url)
     if not metadata:
-        print("Error: Could not extract video metadata from URL", file=sys.stderr)
-        sys.exit(1)
+        return None, None, None, "Could not extract video metadata from URL"
 
     video_id = metadata["id"]
     video_dir = base_dir / video_id
@@ -625,29 +1274,20 @@ def cmd_transcript(args: argparse.Namespace) -> None:
     if thumb_url:
         _download_thumbnail(thumb_url, video_dir / "thumbnail.jpg")
 
-    # Try with cookies first, then without
-    download_ok = _download_transcript(url, video_dir, use_cookies=True)
-    if not download_ok:
-        download_ok = _download_transcript(url, video_dir, use_cookies=False)
+    # Subtitles come from the metadata extraction above (cookies first, then
+    # without); only the caption file itself is fetched here.
+    if throttle:
+        throttle(url)
+    download_ok = _download_transcript(url, video_dir)
 
     json3_files = list(video_dir.glob("*.json3"))
     if not download_ok or not json3_files:
         # Fallback: download audio and transcribe locally with Parakeet TDT v2
-        transcript_file = _audio_transcription_fallback(url, video_dir)
+        with _audio_fallback_lock:
+            transcript_file = _audio_transcription_fallback(url, video_dir)
         if transcript_file is None:
-            print("Error: No subtitles available and audio transcription failed", file=sys.stderr)
-            print(f"Check: {video_dir}", file=sys.stderr)
-            print("", file=sys.stderr)
-            print("This may be due to:", file=sys.stderr)
-            print("  - Age-restricted video requiring login", file=sys.stderr)
-            print("  - Video has no available subtitles", file=sys.stderr)
-            print("  - Video is private or unlisted", file=sys.stderr)
-            print("  - Rate limiting from YouTube", file=sys.stderr)
-            print("  - Audio transcription deps not installed (pip install 'onnx-asr[cpu,hub]')", file=sys.stderr)
-            sys.exit(1)
-
-        _print_transcript_output(transcript_file, video_dir, metadata)
-        return
+            return None, video_dir, metadata, _NO_SUBTITLES_ERROR
+        return transcript_file, video_dir, metadata, None
 
     # Convert JSON3 to clean text
     converted = 0
@@ -660,12 +1300,11 @@ def cmd_transcript(args: argparse.Namespace) -> None:
         output_file = video_dir / f"{safe_name}-transcript.txt"
 
         try:
-            text = _json3_to_text(json3_file)
-            output_file.write_text(text, encoding="utf-8")
+            _json3_to_file(json3_file, output_file)
             json3_file.unlink()
             converted += 1
         except Exception as exc:
-            print(f"Error: Failed to convert {json3_file.name}: {exc}", file=sys.stderr)
+            _stderr_print(f"Error: Failed to convert {json3_file.name}: {exc}")
 
     # Clean up stray .txt files without the -transcript suffix
     for txt_file in video_dir.glob("*.txt"):
@@ -673,79 +1312,333 @@ def cmd_transcript(args: argparse.Namespace) -> None:
             txt_file.unlink()
 
     if converted == 0:
-        print("Error: No subtitles found or downloaded for this video", file=sys.stderr)
-        print(f"Check: {video_dir}", file=sys.stderr)
-        sys.exit(1)
+        return None, video_dir, metadata, "No subtitles found or downloaded for this video"
 
     # Find the transcript file
     transcript_files = list(video_dir.glob("*-transcript.txt"))
     if not transcript_files:
-        print("Error: Transcript file not found after conversion", file=sys.stderr)
+        return None, video_dir, metadata, "Transcript file not found after conversion"
+    return transcript_files[0], video_dir, metadata, None
+
+
+def cmd_transcript(args: argparse.Namespace) -> None:
+    urls: list[str] = list(args.urls)
+    if args.batch:
+        urls.extend(_read_url_list(args.batch))
+    if not urls:
+        print("Error: No URL given (pass one or more URLs, or --batch FILE)", file=sys.stderr)
+        sys.exit(1)
+    base_dir = detect_base_dir()
+    if len(urls) > 1 or args.batch or args.job or _is_playlist_url(urls[0]):
+        _transcript_batch(urls, base_dir, workers=args.workers, job_path=args.job)
+        return
+
+    transcript_file, video_dir, metadata, error = _fetch_transcript(urls[0], base_dir)
+    if error or transcript_file is None:
+        print(f"Error: {error}", file=sys.stderr)
+        if video_dir is None:
+            sys.exit(1)
+        print(f"Check: {video_dir}", file=sys.stderr)
+        if error == _NO_SUBTITLES_ERROR:
+            print("", file=sys.stderr)
+            print("This may be due to:", file=sys.stderr)
+            print("  - Age-restricted video requiring login", file=sys.stderr)
+            print("  - Video has no available subtitles", file=sys.stderr)
+            print("  - Video is private or unlisted", file=sys.stderr)
+            print("  - Rate limiting from YouTube", file=sys.stderr)
+            print("  - Audio transcription deps not installed (pip install 'onnx-asr[cpu,hub]')", file=sys.stderr)
         sys.exit(1)
 
-    _print_transcript_output(transcript_files[0], video_dir, metadata)
+    _print_transcript_output(transcript_file, video_dir, metadata)  # type: ignore[arg-type]
 
 
 # ---------------------------------------------------------------------------
-# Output directory
+# Batch transcript ingestion
 # ---------------------------------------------------------------------------
 
-def cmd_output_dir(_: argparse.Namespace) -> None:
-    print(detect_base_dir())
+# Videos downloaded at once in batch mode (--workers overrides).
+_TRANSCRIPT_WORKERS = int(os.environ.get("EXTRACT_WISDOM_TRANSCRIPT_WORKERS", "4"))
+# Minimum spacing (seconds) between yt-dlp requests to one host, however many
+# workers are running; YouTube throttles bursts of extractions.
+_TRANSCRIPT_HOST_INTERVAL_S = float(os.environ.get("EXTRACT_WISDOM_HOST_INTERVAL", "0.5"))
+# Resumable job files, one per distinct batch input, under the base directory.
+_TRANSCRIPT_JOB_DIR = "wisdom-transcript-jobs"
+_TRANSCRIPT_JOB_VERSION = 1
 
+_host_next_slot: dict[str, float] = {}
+_host_next_slot_lock = threading.Lock()
 
-# ---------------------------------------------------------------------------
-# Create directory with today's date prefix
-# ---------------------------------------------------------------------------
 
-def cmd_create_dir(args: argparse.Namespace) -> None:
-    """Create a new date-prefixed directory in the wisdom base directory."""
-    base_dir = detect_base_dir()
-    tz = _local_tz()
-    today = datetime.now(tz=tz).date().isoformat()
-    clean_desc = _sanitise_dirname(args.description)
-    if not clean_desc:
-        print("Error: Description is empty after sanitisation", file=sys.stderr)
+def _read_url_list(source: str) -> list[str]:
+    """URLs from a file (or stdin for "-"), one per line, skipping blank lines
+    and lines starting with "#"."""
+    try:
+        text = sys.stdin.read() if source == "-" else Path(source).read_text(encoding="utf-8")
+    except OSError as exc:
+        print(f"Error: Could not read URL list {source}: {exc}", file=sys.stderr)
         sys.exit(1)
+    return [line.strip() for line in text.splitlines()
+            if line.strip() and not line.lstrip().startswith("#")]
 
-    new_name = f"{today}-{clean_desc}"
-    dest = base_dir / new_name
 
-    if dest.exists():
-        print(f"Error: Directory already exists: {dest}", file=sys.stderr)
-        sys.exit(1)
+def _is_playlist_url(url: str) -> bool:
+    """True for playlist and channel URLs (but not a video that happens to be
+    opened from a playlist, which carries v= as well as list=)."""
+    from urllib.parse import parse_qs, urlsplit
 
-    dest.mkdir(parents=True, exist_ok=True)
-    print(f"OUTPUT_DIR: {dest}")
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    if "list" in query and "v" not in query:
+        return True
+    return parts.path.startswith(("/playlist", "/@", "/channel/", "/c/", "/user/"))
 
 
-# ---------------------------------------------------------------------------
-# Rename directory
-# ---------------------------------------------------------------------------
+def _expand_playlist(url: str) -> list[str] | None:
+    """Video URLs of a playlist or channel, in playlist order, from one flat
+    extraction (entries are not resolved individually). None on failure."""
+    from yt_dlp import YoutubeDL
 
-def _sanitise_dirname(name: str) -> str:
-    """Convert a description into a clean directory name component.
+    opts = {"quiet": True, "no_warnings": True, "logger": _SilentLogger(),
+            "extract_flat": "in_playlist", "skip_download": True}
+    try:
+        with YoutubeDL(opts) as ydl:  # type: ignore[arg-type]
+            info = ydl.extract_info(url, download=False)
+    except Exception as exc:
+        print(f"Warning: Could not expand playlist {url}: {exc}", file=sys.stderr)
+        return None
+    urls: list[str] = []
+    for entry in (info or {}).get("entries") or []:
+        if not entry:
+            continue
+        entry_url = entry.get("url") or ""
+        if not entry_url.startswith(("http://", "https://")):
+            if not entry.get("id"):
+                continue
+            entry_url = f"https://www.youtube.com/watch?v={entry['id']}"
+        urls.append(entry_url)
+    return urls
 
-    Replaces spaces and special chars with hyphens, collapses runs,
-    strips leading/trailing hyphens, and title-cases each word.
-    """
-    # Replace common separators with hyphens
-    name = re.sub(r"[\s_]+", "-", name)
-    # Remove anything that isn't alphanumeric or hyphen
-    name = re.sub(r"[^a-zA-Z0-9-]", "", name)
-    # Collapse multiple hyphens
-    name = re.sub(r"-{2,}", "-", name)
-    name = name.strip("-")
-    # Title-case each segment
-    return "-".join(word.capitalize() for word in name.split("-") if word)
 
+def _host_key(url: str) -> str:
+    from urllib.parse import urlsplit
 
-_FALLBACK_TZ = "Australia/Melbourne"
+    host = (urlsplit(url).hostname or "").lower()
+    for prefix in ("www.", "m.", "music."):
+        host = host.removeprefix(prefix)
+    return "youtube.com" if host == "youtu.be" else host
 
 
-def _local_tz() -> ZoneInfo:
-    """Resolve the local timezone. Works on macOS and Linux even in sandboxed environments."""
-    # 1. Try /etc/localtime symlink (macOS and most Linux)
+def _host_throttle(url: str) -> None:
+    """Block until ``url``'s host may be contacted again. Each caller reserves
+    the next free slot under the lock and sleeps outside it, so requests to
+    one host are spaced _TRANSCRIPT_HOST_INTERVAL_S apart across threads."""
+    key = _host_key(url)
+    with _host_next_slot_lock:
+        now = time.monotonic()
+        slot = max(now, _host_next_slot.get(key, 0.0))
+        _host_next_slot[key] = slot + _TRANSCRIPT_HOST_INTERVAL_S
+    if slot > now:
+        time.sleep(slot - now)
+
+
+def _transcript_job_path(base_dir: Path, inputs: list[str]) -> Path:
+    digest = hashlib.sha256("\n".join(inputs).encode()).hexdigest()[:16]
+    return base_dir / _TRANSCRIPT_JOB_DIR / f"{digest}.json"
+
+
+def _load_transcript_job(path: Path) -> dict[str, Any]:
+    """Per-URL records from a job file, or {} when missing or unreadable."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _TRANSCRIPT_JOB_VERSION:
+        return {}
+    items = data.get("items")
+    return items if isinstance(items, dict) else {}
+
+
+def _save_transcript_job(
+    path: Path, inputs: list[str], urls: list[str], items: dict[str, Any],
+) -> None:
+    """Atomically write the job file (temp file + rename)."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(
+            json.dumps({"version": _TRANSCRIPT_JOB_VERSION, "inputs": inputs,
+                        "urls": urls, "items": items}, indent=2, ensure_ascii=False) + "\n",
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+    except OSError as exc:
+        tmp.unlink(missing_ok=True)
+        _stderr_print(f"Warning: Could not write transcript job file: {exc}")
+
+
+def _transcript_batch(
+    inputs: list[str], base_dir: Path, workers: int | None = None, job_path: str | None = None,
+) -> None:
+    """Ingest many videos: expand playlists, download the videos not already
+    done according to the job file on a bounded thread pool, record each
+    outcome as it lands, and regenerate the index once at the end."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    job_file = Path(job_path) if job_path else _transcript_job_path(base_dir, inputs)
+    items = _load_transcript_job(job_file)
+    if not items and job_file.is_file():
+        print(f"Warning: Ignoring unreadable job file {job_file}", file=sys.stderr)
+    previous_urls: list[str] = []
+    try:
+        previous_urls = json.loads(job_file.read_text(encoding="utf-8")).get("urls") or []
+    except (OSError, json.JSONDecodeError, AttributeError):
+        pass
+
+    # Playlists are re-expanded on every run so videos added since the last
+    # one are picked up; if that fails, the URLs recorded last time stand in.
+    urls: list[str] = []
+    for url in inputs:
+        if _is_playlist_url(url):
+            _host_throttle(url)
+            expanded = _expand_playlist(url)
+            if expanded is None:
+                expanded = [u for u in previous_urls if items.get(u, {}).get("playlist") == url]
+            for video_url in expanded:
+                items.setdefault(video_url, {"status": "pending", "playlist": url})
+            urls.extend(expanded)
+        else:
+            urls.append(url)
+    urls = list(dict.fromkeys(urls))
+
+    pending = [u for u in urls if items.get(u, {}).get("status") != "done"]
+    skipped = len(urls) - len(pending)
+    base_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Batch: {len(urls)} videos, {skipped} already done, {len(pending)} to fetch", file=sys.stderr)
+    print(f"JOB_FILE: {job_file}")
+
+    def _fetch(url: str) -> dict[str, Any]:
+        started = time.monotonic()
+        transcript_file, video_dir, metadata, error = _fetch_transcript(url, base_dir, _host_throttle)
+        if metadata and video_dir and not error:
+            _write_metadata_json(video_dir, metadata)
+        return {
+            "status": "failed" if error else "done",
+            "video_id": (metadata or {}).get("id", ""),
+            "title": (metadata or {}).get("title", ""),
+            "output_dir": str(video_dir) if video_dir else "",
+            "transcript": str(transcript_file) if transcript_file else "",
+            "error": error,
+            "seconds": round(time.monotonic() - started, 2),
+        }
+
+    n_workers = max(1, min(workers or _TRANSCRIPT_WORKERS, len(pending) or 1))
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        futures = {pool.submit(_fetch, u): u for u in pending}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                record = future.result()
+            except Exception as exc:
+                record = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+            previous = items.get(url, {})
+            record["attempts"] = previous.get("attempts", 0) + 1
+            if "playlist" in previous:
+                record["playlist"] = previous["playlist"]
+            items[url] = record
+            # Written after every video so a crash loses at most the
+            # downloads still in flight.
+            _save_transcript_job(job_file, inputs, urls, items)
+            if record["status"] == "done":
+                done += 1
+                _stderr_print(f"[{done + failed}/{len(pending)}] {record.get('title') or url}")
+            else:
+                failed += 1
+                _stderr_print(f"[{done + failed}/{len(pending)}] Error: {url}: {record['error']}")
+    if not pending:
+        _save_transcript_job(job_file, inputs, urls, items)
+
+    for url in urls:
+        record = items.get(url, {})
+        if record.get("status") == "done":
+            print(f"TRANSCRIPT_PATH: {record.get('transcript', '')}")
+            print(f"OUTPUT_DIR: {record.get('output_dir', '')}")
+        else:
+            print(f"FAILED: {url}: {record.get('error') or 'not fetched'}")
+    print(f"BATCH: {skipped + done} done ({done} this run), {failed} failed")
+
+    # Regenerate the wisdom library index once for the whole batch (non-fatal on failure).
+    try:
+        _regenerate_index(base_dir)
+    except Exception as exc:
+        print(f"Warning: Index generation failed: {exc}", file=sys.stderr)
+
+    if failed:
+        print(f"Re-run the same command to retry the {failed} failed videos.", file=sys.stderr)
+        sys.exit(1)
+    print("NEXT_STEP: uv run <skill-dir>/scripts/wisdom.py rename \"<OUTPUT_DIR>\" \"<Short-Description>\"")
+
+
+# ---------------------------------------------------------------------------
+# Output directory
+# ---------------------------------------------------------------------------
+
+def cmd_output_dir(_: argparse.Namespace) -> None:
+    print(detect_base_dir())
+
+
+# ---------------------------------------------------------------------------
+# Create directory with today's date prefix
+# ---------------------------------------------------------------------------
+
+def cmd_create_dir(args: argparse.Namespace) -> None:
+    """Create a new date-prefixed directory in the wisdom base directory."""
+    base_dir = detect_base_dir()
+    tz = _local_tz()
+    today = datetime.now(tz=tz).date().isoformat()
+    clean_desc = _sanitise_dirname(args.description)
+    if not clean_desc:
+        print("Error: Description is empty after sanitisation", file=sys.stderr)
+        sys.exit(1)
+
+    new_name = f"{today}-{clean_desc}"
+    dest = base_dir / new_name
+
+    if dest.exists():
+        print(f"Error: Directory already exists: {dest}", file=sys.stderr)
+        sys.exit(1)
+
+    dest.mkdir(parents=True, exist_ok=True)
+    print(f"OUTPUT_DIR: {dest}")
+
+
+# ---------------------------------------------------------------------------
+# Rename directory
+# ---------------------------------------------------------------------------
+
+def _sanitise_dirname(name: str) -> str:
+    """Convert a description into a clean directory name component.
+
+    Replaces spaces and special chars with hyphens, collapses runs,
+    strips leading/trailing hyphens, and title-cases each word.
+    """
+    # Replace common separators with hyphens
+    name = re.sub(r"[\s_]+", "-", name)
+    # Remove anything that isn't alphanumeric or hyphen
+    name = re.sub(r"[^a-zA-Z0-9-]", "", name)
+    # Collapse multiple hyphens
+    name = re.sub(r"-{2,}", "-", name)
+    name = name.strip("-")
+    # Title-case each segment
+    return "-".join(word.capitalize() for word in name.split("-") if word)
+
+
+_FALLBACK_TZ = "Australia/Melbourne"
+
+
+def _local_tz() -> ZoneInfo:
+    """Resolve the local timezone. Works on macOS and Linux even in sandboxed environments."""
+    # 1. Try /etc/localtime symlink (macOS and most Linux)
     try:
         link = os.readlink("/etc/localtime")
         tz_name = link.split("zoneinfo/")[-1]
@@ -879,7 +1772,15 @@ def _parse_frontmatter(md_path: Path) -> dict[str, Any] | None:
     values come back as ``list[str]``. Returns None if no frontmatter
     is found.
     """
-    text = md_path.read_text(encoding="utf-8")
+    return _parse_frontmatter_text(md_path.read_text(encoding="utf-8"))
+
+
+def _parse_frontmatter_text(text: str) -> dict[str, Any] | None:
+    """Parse YAML frontmatter from already-read markdown text.
+
+    Same rules as _parse_frontmatter; lets callers that also need the body
+    read each file only once.
+    """
     if not text.startswith("---"):
         return None
     end = text.find("\n---", 3)
@@ -1048,7 +1949,7 @@ def _stamp_analysis_date(md_path: Path) -> None:
         text,
     )
     if updated != text:
-        md_path.write_text(updated, encoding="utf-8")
+        _replace_text(md_path, updated)
 
 
 def _open_file(path: Path) -> None:
@@ -1062,6 +1963,111 @@ def _open_file(path: Path) -> None:
         pass
 
 
+# ---------------------------------------------------------------------------
+# Render telemetry (`pdf --profile`, `regenerate-pdfs --profile`)
+# ---------------------------------------------------------------------------
+
+# Counters for the render in progress, or None when it isn't profiled. Keys
+# ending in "_s" are seconds, "_bytes" are sizes, the rest are counts.
+# Diagram render threads add to it too, hence the lock.
+_render_stats: dict[str, float] | None = None
+_render_stats_lock = threading.Lock()
+
+# Stages timed per document, in pipeline order, for the profile summary.
+_PROFILE_STAGES = (
+    "total_s", "enrich_s", "markdown_s", "diagrams_s", "diagram_cache_s", "graphviz_s",
+    "mermaid_s", "mermaid_wait_s", "layout_s", "write_s",
+)
+# Slowest documents listed in the profile report.
+_PROFILE_SLOWEST = 10
+
+
+def _stat(key: str, value: float = 1.0) -> None:
+    """Add ``value`` to a counter of the render being profiled, if any."""
+    stats = _render_stats
+    if stats is None:
+        return
+    with _render_stats_lock:
+        stats[key] = stats.get(key, 0.0) + value
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending, non-empty list."""
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _write_profile_report(path: Path, documents: list[dict[str, Any]]) -> None:
+    """Write per-document render stats plus per-stage aggregates and print a
+    short summary.
+
+    ``documents`` holds one {"file", "error", <stats>} dict per render. A
+    ``.csv`` path gets one row per document; anything else gets JSON with the
+    documents, per-stage count/total/mean/p50/p95/max and the slowest
+    documents with their most expensive stage.
+    """
+    # Seconds to 4 decimal places; counts and byte sizes as integers.
+    documents = [
+        {k: (round(v, 4) if k.endswith("_s") else int(v)) if isinstance(v, float) else v
+         for k, v in doc.items()}
+        for doc in documents
+    ]
+    stages: dict[str, dict[str, float]] = {}
+    for stage in _PROFILE_STAGES:
+        values = sorted(doc[stage] for doc in documents if doc.get(stage))
+        if values:
+            stages[stage] = {
+                "count": len(values),
+                "total": round(sum(values), 4),
+                "mean": round(sum(values) / len(values), 4),
+                "p50": round(_percentile(values, 50), 4),
+                "p95": round(_percentile(values, 95), 4),
+                "max": round(values[-1], 4),
+            }
+    slowest = [
+        {
+            "file": doc["file"],
+            "total_s": doc.get("total_s", 0.0),
+            "top_stage": max(
+                (st for st in _PROFILE_STAGES[1:] if st not in ("diagram_cache_s", "mermaid_wait_s")),
+                key=lambda st: doc.get(st, 0.0),
+            ),
+        }
+        for doc in sorted(documents, key=lambda d: -d.get("total_s", 0.0))[:_PROFILE_SLOWEST]
+    ]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        if path.suffix.lower() == ".csv":
+            import csv
+
+            columns = ["file", "error", *sorted({k for doc in documents for k in doc} - {"file", "error"})]
+            with open(tmp, "w", encoding="utf-8", newline="") as fh:
+                writer = csv.DictWriter(fh, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(documents)
+        else:
+            tmp.write_text(json.dumps({
+                "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "documents": documents,
+                "stages": stages,
+                "slowest": slowest,
+            }, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as exc:
+        tmp.unlink(missing_ok=True)
+        print(f"Warning: Could not write profile report: {exc}", file=sys.stderr)
+        return
+
+    print(f"PROFILE: {path}")
+    print(f"  {'stage':<16}{'n':>5}{'total':>10}{'p50':>9}{'p95':>9}{'max':>9}")
+    for stage, agg in stages.items():
+        print(f"  {stage:<16}{agg['count']:>5}{agg['total']:>10.2f}{agg['p50']:>9.3f}"
+              f"{agg['p95']:>9.3f}{agg['max']:>9.3f}")
+    for doc in slowest[:3]:
+        print(f"  slowest: {doc['total_s']:.2f}s ({doc['top_stage']}) {doc['file']}")
+
+
 # Diagram language identifiers that trigger rendering.
 _DIAGRAM_LANGS = {"mermaid", "graphviz", "dot"}
 
@@ -1072,17 +2078,37 @@ _DIAGRAM_BLOCK_RE = re.compile(
     re.DOTALL,
 )
 
-_MERMAID_INK_URL = "https://mermaid.ink/img/"
+# WISDOM_MERMAID_URL points at a mermaid.ink-compatible server (e.g. a
+# self-hosted instance); the base64 payload is appended to it.
+_MERMAID_INK_URL = os.environ.get("WISDOM_MERMAID_URL", "https://mermaid.ink/img/")
 _MERMAID_TIMEOUT = 10
 
-# Cross-process throttle for mermaid.ink. Workers coordinate via a lock file
-# in the system tempdir so no single worker can exceed the rate, regardless of
-# how many ProcessPool children are active.
+# Cross-process token bucket for mermaid.ink. Threads and ProcessPool workers
+# coordinate via a lock file in the system tempdir holding the bucket state,
+# so the combined request rate stays under the limit however many are active.
+# The sustained rate is one request per WISDOM_MERMAID_MIN_INTERVAL seconds
+# (0 disables limiting); WISDOM_MERMAID_BURST requests may go out back-to-back.
 _MERMAID_LOCK_PATH = Path(tempfile.gettempdir()) / "wisdom-mermaid.lock"
 _MERMAID_MIN_INTERVAL_S = float(os.environ.get("WISDOM_MERMAID_MIN_INTERVAL", "0.25"))
+_MERMAID_BURST = max(1, int(os.environ.get("WISDOM_MERMAID_BURST", "4")))
 _MERMAID_MAX_RETRIES = 4
 _MERMAID_BACKOFF_BASE_S = 1.0
 
+# Diagrams in one document render concurrently on this many threads (mermaid
+# requests still pass through the token bucket above).
+_DIAGRAM_RENDER_WORKERS = max(1, int(os.environ.get("WISDOM_DIAGRAM_WORKERS", "4")))
+
+# Mermaid renderer backend (WISDOM_MERMAID_BACKEND): "auto" uses a local
+# mermaid-cli when one is installed and falls back to mermaid.ink for any
+# diagram it fails on; "mmdc" renders locally only (offline builds); "ink"
+# always uses mermaid.ink. WISDOM_MMDC overrides the mermaid-cli command,
+# e.g. "npx -y @mermaid-js/mermaid-cli".
+_MERMAID_BACKEND = os.environ.get("WISDOM_MERMAID_BACKEND", "auto").strip().lower()
+_MMDC_COMMAND = os.environ.get("WISDOM_MMDC", "mmdc")
+# mermaid-cli device scale factor; PNGs are rendered at 2x for sharp print.
+_MMDC_SCALE = 2
+_MMDC_TIMEOUT = 300
+
 # Anthropic-aligned theme init block for Mermaid diagrams.
 _MERMAID_THEME_INIT = """\
 %%{init: {
@@ -1209,14 +2235,100 @@ def _render_graphviz(code: str, *, fmt: str = "svg", dpi: int | None = None) ->
         import graphviz  # type: ignore[import-untyped]
     except ImportError:
         return None
+    try:
+        return graphviz.Source(_graphviz_with_dpi(code, dpi)).pipe(format=fmt)
+    except Exception:
+        return None
+
+
+def _graphviz_with_dpi(code: str, dpi: int | None) -> str:
+    """Inject a graph-level dpi attribute (raster output only)."""
     if dpi is not None:
         m = re.search(r"((?:di)?graph\s+\w*\s*\{)", code)
         if m:
             code = code[:m.end()] + f"\n    graph [dpi={dpi}];\n" + code[m.end():]
+    return code
+
+
+# Graphs per `dot` invocation when batching a document's diagrams.
+_GRAPHVIZ_BATCH_SIZE = 64
+
+
+def _split_graphviz_output(data: bytes, fmt: str) -> list[bytes]:
+    """Split `dot` output for a multi-graph input into one image per graph.
+
+    dot renders every graph in its input and concatenates the results: SVG
+    documents each end with </svg>, PNGs are walked chunk by chunk to IEND
+    (compressed data may contain the bytes "IEND", so no substring search).
+    """
+    if fmt == "svg":
+        ends = [m.end() for m in re.finditer(rb"</svg>\s*", data)]
+        return [data[start:end] for start, end in zip([0, *ends], ends)]
+    if fmt != "png":
+        return []
+    import struct
+
+    parts: list[bytes] = []
+    start = 0
+    while data.startswith(b"\x89PNG\r\n\x1a\n", start):
+        pos = start + 8
+        while pos + 8 <= len(data):
+            length, ctype = struct.unpack(">I4s", data[pos:pos + 8])
+            pos += 12 + length
+            if ctype == b"IEND":
+                break
+        else:
+            break
+        parts.append(data[start:pos])
+        start = pos
+    return parts
+
+
+def _render_graphviz_batch(
+    sources: list[str], *, fmt: str = "svg", dpi: int | None = None,
+) -> list[bytes | None]:
+    """Render many DOT strings without forking `dot` once per graph.
+
+    Uses pygraphviz's in-process libgvc bindings when installed; otherwise
+    the graphs go through one `dot` process per _GRAPHVIZ_BATCH_SIZE chunk
+    and the concatenated output is split per graph. If a chunk's output
+    doesn't split into one image per graph (a syntax error stops dot's
+    parser), that chunk is rendered graph by graph so only the broken
+    diagrams fail. Returns bytes or None per source, in order.
+    """
+    results: list[bytes | None] = [None] * len(sources)
+    pending = list(range(len(sources)))
     try:
-        return graphviz.Source(code).pipe(format=fmt)
-    except Exception:
-        return None
+        import pygraphviz  # type: ignore[import-untyped]  # ty: ignore[unresolved-import]
+    except ImportError:
+        pygraphviz = None
+    if pygraphviz is not None:
+        for i in pending:
+            try:
+                graph = pygraphviz.AGraph(string=_graphviz_with_dpi(sources[i], dpi))
+                results[i] = graph.draw(format=fmt, prog="dot")
+            except Exception:
+                pass
+        pending = [i for i in pending if not results[i]]
+    try:
+        import graphviz  # type: ignore[import-untyped]
+    except ImportError:
+        return results
+    for offset in range(0, len(pending), _GRAPHVIZ_BATCH_SIZE):
+        chunk = pending[offset:offset + _GRAPHVIZ_BATCH_SIZE]
+        if len(chunk) > 1:
+            data = "\n".join(_graphviz_with_dpi(sources[i], dpi) for i in chunk).encode()
+            try:
+                parts = _split_graphviz_output(graphviz.pipe("dot", fmt, data), fmt)
+            except Exception:
+                parts = []
+            if len(parts) == len(chunk):
+                for i, part in zip(chunk, parts):
+                    results[i] = part
+                continue
+        for i in chunk:
+            results[i] = _render_graphviz(sources[i], fmt=fmt, dpi=dpi)
+    return results
 
 
 def _svg_dimensions(svg: bytes) -> tuple[float, float] | None:
@@ -1228,16 +2340,23 @@ def _svg_dimensions(svg: bytes) -> tuple[float, float] | None:
     return None
 
 
-def _mermaid_throttle() -> None:
-    """Cross-process token bucket: ensure at least _MERMAID_MIN_INTERVAL_S
-    has elapsed since the last mermaid.ink call by any worker.
+def _mermaid_throttle(penalty: float = 0.0) -> None:
+    """Take one token from the cross-process mermaid.ink bucket, sleeping
+    until it is available.
 
-    Uses fcntl.flock on a tempfile that stores the last-call timestamp.
-    Sleeps inside the critical section to enforce spacing, then writes the
-    new timestamp before releasing the lock.
+    The bucket state ("tokens timestamp") lives in a tempfile guarded by
+    fcntl.flock; flock locks belong to the open file description, so threads
+    in one process exclude each other as well as other workers. A caller
+    reserves its token inside the lock (tokens may go negative, queueing
+    later callers behind it) and sleeps outside it, so waiting never blocks
+    the bucket. ``penalty`` (seconds, from a 429 / Retry-After) empties the
+    bucket for that long so every worker backs off, not just the caller.
     """
     if _MERMAID_MIN_INTERVAL_S <= 0:
+        if penalty > 0:
+            time.sleep(penalty)
         return
+    rate = 1.0 / _MERMAID_MIN_INTERVAL_S
     # 'a+' creates if missing; we read+seek+write inside the lock.
     # Wall-clock time.time() is required: monotonic clocks have per-process
     # origins and are not comparable across worker processes.
@@ -1245,18 +2364,24 @@ def _mermaid_throttle() -> None:
         fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
         try:
             fh.seek(0)
-            raw = fh.read().strip()
-            last = float(raw) if raw else 0.0
             now = time.time()
-            wait = _MERMAID_MIN_INTERVAL_S - (now - last)
-            if wait > 0:
-                time.sleep(wait)
+            try:
+                tokens_raw, stamp_raw = fh.read().split()
+                tokens = min(float(_MERMAID_BURST), float(tokens_raw) + (now - float(stamp_raw)) * rate)
+            except ValueError:
+                tokens = float(_MERMAID_BURST)
+            if penalty > 0:
+                tokens = min(tokens, -penalty * rate)
+            tokens -= 1.0
             fh.seek(0)
             fh.truncate()
-            fh.write(f"{time.time():.6f}")
+            fh.write(f"{tokens:.6f} {now:.6f}")
             fh.flush()
         finally:
             fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    if tokens < 0:
+        time.sleep(-tokens / rate)
+        _stat("mermaid_wait_s", -tokens / rate)
 
 
 def _render_mermaid(code: str) -> tuple[bytes, str] | None:
@@ -1266,16 +2391,19 @@ def _render_mermaid(code: str) -> tuple[bytes, str] | None:
     endpoint which returns a rasterised JPEG - the /svg/ endpoint uses
     foreignObject for text labels which WeasyPrint cannot render.
 
-    Cross-worker rate limiting via _mermaid_throttle prevents bursts when
-    multiple ProcessPool workers render diagrams simultaneously. Retries
-    with exponential backoff on HTTP 429/503.
+    Every attempt takes a token from the shared bucket (_mermaid_throttle),
+    so concurrent renders across threads and ProcessPool workers stay under
+    the rate limit. Retries with exponential backoff on HTTP 429/503; the
+    backoff is applied to the shared bucket.
     """
     payload = base64.urlsafe_b64encode(code.encode()).decode()
     url = _MERMAID_INK_URL + payload
     req = urllib.request.Request(url, headers={"User-Agent": "wisdom-pdf/1.0"})
 
+    penalty = 0.0
     for attempt in range(_MERMAID_MAX_RETRIES):
-        _mermaid_throttle()
+        _mermaid_throttle(penalty)
+        _stat("mermaid_requests")
         try:
             with urllib.request.urlopen(req, timeout=_MERMAID_TIMEOUT) as resp:
                 data: bytes = resp.read()
@@ -1290,8 +2418,7 @@ def _render_mermaid(code: str) -> tuple[bytes, str] | None:
                     delay = float(retry_after) if retry_after else 0.0
                 except (TypeError, ValueError):
                     delay = 0.0
-                delay = max(delay, _MERMAID_BACKOFF_BASE_S * (2 ** attempt))
-                time.sleep(delay)
+                penalty = max(delay, _MERMAID_BACKOFF_BASE_S * (2 ** attempt))
                 continue
             return None
         except Exception:
@@ -1299,6 +2426,132 @@ def _render_mermaid(code: str) -> tuple[bytes, str] | None:
     return None
 
 
+def _diagram_map(fn: Any, items: list[Any]) -> list[Any]:
+    """Apply ``fn`` to ``items`` on up to _DIAGRAM_RENDER_WORKERS threads,
+    preserving order."""
+    workers = min(_DIAGRAM_RENDER_WORKERS, len(items))
+    if workers <= 1:
+        return [fn(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def _render_mermaid_ink_many(
+    sources: list[str],
+) -> list[tuple[bytes, str, tuple[float, float] | None] | None]:
+    """mermaid.ink backend: render concurrently, one request per diagram."""
+
+    def _one(code: str) -> tuple[bytes, str, tuple[float, float] | None] | None:
+        result = _render_mermaid(code)
+        if not result:
+            return None
+        data, mime = result
+        px = _jpeg_dimensions(data) if "jpeg" in mime else None
+        # Mermaid native px at ~96 DPI; convert to pt (* 0.75)
+        return data, mime, (px[0] * 0.75, px[1] * 0.75) if px else None
+
+    return _diagram_map(_one, sources)
+
+
+def _mmdc_command() -> list[str] | None:
+    """The mermaid-cli command line, or None if it is not installed."""
+    parts = shlex.split(_MMDC_COMMAND)
+    if not parts or not shutil.which(parts[0]):
+        return None
+    return parts
+
+
+def _render_mermaid_mmdc(
+    sources: list[str],
+) -> list[tuple[bytes, str, tuple[float, float] | None] | None]:
+    """mermaid-cli backend: render every diagram with one mmdc run.
+
+    mmdc starts a headless Chromium per invocation, which dominates its
+    cost, so the diagrams are written to a single markdown file and mmdc's
+    markdown mode renders each ```mermaid block to out-<n>.png in one
+    browser session. PNG rather than SVG because mermaid's SVG labels use
+    foreignObject, which WeasyPrint cannot render. Diagrams that fail (or
+    contain a fence mmdc cannot delimit) come back as None.
+    """
+    results: list[tuple[bytes, str, tuple[float, float] | None] | None] = [None] * len(sources)
+    cmd = _mmdc_command()
+    batch = [i for i, code in enumerate(sources) if "```" not in code]
+    if cmd is None or not batch:
+        return results
+    with tempfile.TemporaryDirectory(prefix="wisdom-mmdc-") as tmp:
+        tmp_dir = Path(tmp)
+        (tmp_dir / "in.md").write_text(
+            "".join(f"```mermaid\n{sources[i].rstrip()}\n```\n\n" for i in batch),
+            encoding="utf-8",
+        )
+        try:
+            proc = subprocess.run(
+                [*cmd, "--quiet", "-i", str(tmp_dir / "in.md"), "-o", str(tmp_dir / "out.md"),
+                 "-e", "png", "-s", str(_MMDC_SCALE), "-b", "#faf9f5"],
+                capture_output=True, text=True, timeout=_MMDC_TIMEOUT,
+            )
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            print(f"Warning: mermaid-cli failed: {exc}", file=sys.stderr)
+            return results
+        for n, i in enumerate(batch, 1):
+            try:
+                data = (tmp_dir / f"out-{n}.png").read_bytes()
+            except OSError:
+                continue
+            px = _png_dimensions(data)
+            # CSS px at the device scale factor -> pt (96 px per inch).
+            dims = (px[0] / _MMDC_SCALE * 0.75, px[1] / _MMDC_SCALE * 0.75) if px else None
+            results[i] = (data, "image/png", dims)
+        if proc.returncode != 0 and any(results[i] is None for i in batch):
+            detail = (proc.stderr or proc.stdout).strip().splitlines()
+            print(
+                f"Warning: mermaid-cli failed (exit {proc.returncode})"
+                + (f": {detail[-1]}" if detail else ""),
+                file=sys.stderr,
+            )
+    return results
+
+
+_MERMAID_BACKENDS = {
+    "ink": _render_mermaid_ink_many,
+    "mmdc": _render_mermaid_mmdc,
+}
+
+
+def _mermaid_backend() -> str:
+    """Resolve WISDOM_MERMAID_BACKEND to a _MERMAID_BACKENDS name."""
+    if _MERMAID_BACKEND in _MERMAID_BACKENDS:
+        return _MERMAID_BACKEND
+    if _MERMAID_BACKEND != "auto":
+        print(
+            f"Warning: unknown WISDOM_MERMAID_BACKEND {_MERMAID_BACKEND!r}, using auto",
+            file=sys.stderr,
+        )
+    return "mmdc" if _mmdc_command() else "ink"
+
+
+def _mermaid_cache_fmt(backend: str) -> str:
+    """Diagram cache format for a mermaid backend ("img" is mermaid.ink's
+    historic key), so one backend's output is never served for another."""
+    return "img" if backend == "ink" else backend
+
+
+def _render_mermaid_many(
+    sources: list[str], backend: str,
+) -> list[tuple[tuple[bytes, str, tuple[float, float] | None] | None, str]]:
+    """Render themed mermaid sources with ``backend``, pairing each result
+    with the backend that produced it. In auto mode, diagrams the local
+    backend could not render are retried against mermaid.ink."""
+    results = [(result, backend) for result in _MERMAID_BACKENDS[backend](sources)]
+    if backend != "ink" and _MERMAID_BACKEND == "auto":
+        retry = [i for i, (result, _) in enumerate(results) if result is None]
+        for i, result in zip(retry, _render_mermaid_ink_many([sources[i] for i in retry])):
+            results[i] = (result, "ink")
+    return results
+
+
 def _png_dimensions(data: bytes) -> tuple[int, int] | None:
     """Parse width and height (px) from a PNG's IHDR chunk."""
     import struct
@@ -1342,10 +2595,157 @@ def _size_pct(natural_width_pt: float) -> int:
 def _image_to_img_tag(data: bytes, mime: str, max_width_pct: int = 95) -> str:
     """Convert image bytes to an <img> tag with a base64 data URI."""
     b64 = base64.b64encode(data).decode()
-    return (
-        f'<img class="diagram" style="max-width:{max_width_pct}%"'
-        f' src="data:{mime};base64,{b64}" alt="diagram" />'
-    )
+    return _diagram_img_tag(f"data:{mime};base64,{b64}", max_width_pct)
+
+
+def _diagram_img_tag(src: str, max_width_pct: int = 95) -> str:
+    return f'<img class="diagram" style="max-width:{max_width_pct}%" src="{src}" alt="diagram" />'
+
+
+# URL scheme for diagram images WeasyPrint fetches from memory (_pdf_url_fetcher)
+# rather than decoding an inline base64 data URI.
+_DIAGRAM_URL_SCHEME = "wisdom-diagram:"
+
+_DIAGRAM_IMAGE_EXT = {"image/svg+xml": "svg", "image/png": "png", "image/jpeg": "jpg", "image/gif": "gif"}
+
+
+def _diagram_image_name(data: bytes, mime: str) -> str:
+    """Content-addressed file name for a rendered diagram: identical images
+    share a name however many blocks or documents produce them."""
+    ext = _DIAGRAM_IMAGE_EXT.get(mime, "bin")
+    return f"diagram-{hashlib.sha256(data).hexdigest()[:24]}.{ext}"
+
+
+# ---------------------------------------------------------------------------
+# Diagram render cache
+# ---------------------------------------------------------------------------
+
+# Rendered diagrams are cached on disk, keyed on (language, themed source,
+# format, dpi), so PDF and ePub rebuilds skip `dot` and mermaid.ink for
+# unchanged diagrams. One SQLite file holds the bytes, MIME type and natural
+# width/height in pt; least-recently-used rows are evicted once the total
+# exceeds the size bound. EXTRACT_WISDOM_DIAGRAM_CACHE names the cache
+# directory, or "false" to disable caching.
+_DIAGRAM_CACHE_ENV_VAR = "EXTRACT_WISDOM_DIAGRAM_CACHE"
+_DIAGRAM_CACHE_NAME = "diagrams.db"
+_DIAGRAM_CACHE_MAX_BYTES = int(float(os.environ.get("EXTRACT_WISDOM_DIAGRAM_CACHE_MB", "256")) * 1024 * 1024)
+# Bump when renderer output changes for the same inputs (e.g. new theming).
+_DIAGRAM_CACHE_VERSION = 1
+
+# Per-process connection; reopened after fork so pool workers never share one.
+_diagram_cache_state: dict[str, Any] = {}
+
+
+def _diagram_cache_dir() -> Path | None:
+    """Resolve the cache directory, or None when caching is disabled."""
+    val = os.environ.get(_DIAGRAM_CACHE_ENV_VAR, "").strip()
+    if val.lower() in ("false", "0", "no", "off"):
+        return None
+    if val:
+        return Path(val).expanduser()
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    root = Path(xdg) if xdg else Path.home() / ".cache"
+    return root / "extract-wisdom"
+
+
+def _diagram_cache_conn() -> sqlite3.Connection | None:
+    """Open (once per process) the diagram cache database, or None if it is
+    disabled or unusable."""
+    if _diagram_cache_state.get("pid") == os.getpid():
+        return _diagram_cache_state.get("conn")
+    _diagram_cache_state.clear()
+    _diagram_cache_state["pid"] = os.getpid()
+    cache_dir = _diagram_cache_dir()
+    if cache_dir is None:
+        return None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(cache_dir / _DIAGRAM_CACHE_NAME, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS diagrams (
+                key TEXT PRIMARY KEY,
+                mime TEXT NOT NULL,
+                width REAL,
+                height REAL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                used REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS diagrams_used ON diagrams(used)")
+    except (OSError, sqlite3.Error) as exc:
+        print(f"Warning: diagram cache unavailable: {exc}", file=sys.stderr)
+        return None
+    _diagram_cache_state["conn"] = conn
+    return conn
+
+
+def _diagram_cache_key(lang: str, source: str, fmt: str, dpi: int | None) -> str:
+    return hashlib.sha256(
+        f"{_DIAGRAM_CACHE_VERSION}\0{lang}\0{fmt}\0{dpi}\0{source}".encode()
+    ).hexdigest()
+
+
+def _diagram_cache_get(key: str) -> tuple[bytes, str, tuple[float, float] | None] | None:
+    conn = _diagram_cache_conn()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            "SELECT data, mime, width, height FROM diagrams WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE diagrams SET used = ? WHERE key = ?", (time.time(), key))
+    except sqlite3.Error:
+        return None
+    data, mime, width, height = row
+    return bytes(data), mime, (width, height) if width is not None else None
+
+
+def _diagram_cache_put(
+    key: str, data: bytes, mime: str, dims: tuple[float, float] | None,
+) -> None:
+    """Store a rendered diagram, then evict least-recently-used rows until the
+    cache is back under _DIAGRAM_CACHE_MAX_BYTES."""
+    conn = _diagram_cache_conn()
+    if conn is None:
+        return
+    width, height = dims if dims else (None, None)
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO diagrams(key, mime, width, height, data, size, used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, mime, width, height, data, len(data), time.time()),
+        )
+        total = conn.execute("SELECT coalesce(sum(size), 0) FROM diagrams").fetchone()[0]
+        if total <= _DIAGRAM_CACHE_MAX_BYTES:
+            return
+        evict: list[tuple[str]] = []
+        for old_key, size in conn.execute("SELECT key, size FROM diagrams ORDER BY used"):
+            if total <= _DIAGRAM_CACHE_MAX_BYTES or old_key == key:
+                break
+            evict.append((old_key,))
+            total -= size
+        conn.executemany("DELETE FROM diagrams WHERE key = ?", evict)
+    except sqlite3.Error:
+        pass
+
+
+def _graphviz_result(
+    data: bytes | None, fmt: str, dpi: int | None,
+) -> tuple[bytes, str, tuple[float, float] | None] | None:
+    """Wrap rendered DOT output as (bytes, mime, natural (width, height) in
+    pt or None), or None if rendering failed."""
+    if not data:
+        return None
+    if fmt == "png":
+        px = _png_dimensions(data)
+        # px -> pt at the render DPI (72 pt per inch).
+        dims = (px[0] * 72 / dpi, px[1] * 72 / dpi) if px and dpi else None
+        return data, "image/png", dims
+    return data, "image/svg+xml", _svg_dimensions(data)
 
 
 # DPI for rasterised (ePub) graphviz output. 200 keeps labels sharp on
@@ -1353,43 +2753,109 @@ def _image_to_img_tag(data: bytes, mime: str, max_width_pct: int = 95) -> str:
 _GRAPHVIZ_RASTER_DPI = 200
 
 
-def _render_diagrams(html_body: str, *, raster: bool = False) -> tuple[str, dict[str, int]]:
+def _render_diagrams(
+    html_body: str, *, raster: bool = False,
+    images: dict[str, tuple[bytes, str]] | None = None, image_base: str = "",
+) -> tuple[str, dict[str, int]]:
     """Find diagram code blocks in HTML and replace them with rendered images.
 
     Returns (modified_html, fallback_counts) where fallback_counts maps
     diagram language names to the number of blocks that failed to render.
     With ``raster=True`` (ePub), graphviz diagrams render to PNG rather than
     SVG, which Kindle's format conversion handles reliably.
+
+    Images are inlined as base64 data URIs unless an ``images`` dict is
+    given: then each distinct image is stored in it once under its
+    content-addressed name (_diagram_image_name) as (bytes, mime), and the
+    <img> points at ``image_base`` + name.
+
+    Works in three phases so a document's diagrams don't pay one round trip
+    each in sequence: collect and de-duplicate every block, render the cache
+    misses (graphviz through one `dot` process, _render_graphviz_batch;
+    mermaid as one batch through the configured backend, see
+    _MERMAID_BACKENDS), then substitute. Cache reads and writes stay on
+    the calling thread, which owns the SQLite connection.
     """
+    # The backend picks the cache format, so switching backends doesn't
+    # serve the other's output.
+    mermaid_backend = _mermaid_backend() if "language-mermaid" in html_body else "ink"
+    mermaid_fmt = _mermaid_cache_fmt(mermaid_backend)
+    specs: dict[str, tuple[str, str, str, int | None]] = {}
+    keys: list[str] = []
+    for match in _DIAGRAM_BLOCK_RE.finditer(html_body):
+        lang = match.group(1)
+        code = html_mod.unescape(match.group(2))
+        if lang in ("graphviz", "dot"):
+            spec = (
+                ("graphviz", _apply_graphviz_theme(code), "png", _GRAPHVIZ_RASTER_DPI)
+                if raster else ("graphviz", _apply_graphviz_theme(code), "svg", None)
+            )
+        else:
+            spec = ("mermaid", _apply_mermaid_theme(code), mermaid_fmt, None)
+        key = _diagram_cache_key(*spec)
+        specs.setdefault(key, spec)
+        keys.append(key)
+    if not keys:
+        return html_body, {}
+    _stat("diagrams", len(keys))
+
+    started = time.perf_counter()
+    rendered: dict[str, tuple[bytes, str, tuple[float, float] | None] | None] = {}
+    misses: list[str] = []
+    for key in specs:
+        hit = _diagram_cache_get(key)
+        if hit is not None:
+            rendered[key] = hit
+        else:
+            misses.append(key)
+    _stat("diagram_cache_hits", len(specs) - len(misses))
+    _stat("diagram_cache_s", time.perf_counter() - started)
+
+    graphviz = [key for key in misses if specs[key][0] == "graphviz"]
+    mermaid = [key for key in misses if specs[key][0] == "mermaid"]
+    results: list[tuple[bytes, str, tuple[float, float] | None] | None] = []
+    put_keys = list(graphviz)
+    if graphviz:
+        started = time.perf_counter()
+        # Every graphviz block in one document shares a format and dpi.
+        _, _, fmt, dpi = specs[graphviz[0]]
+        outputs = _render_graphviz_batch([specs[key][1] for key in graphviz], fmt=fmt, dpi=dpi)
+        results = [_graphviz_result(data, fmt, dpi) for data in outputs]
+        _stat("graphviz_rendered", len(graphviz))
+        _stat("graphviz_s", time.perf_counter() - started)
+    if mermaid:
+        started = time.perf_counter()
+        pairs = _render_mermaid_many([specs[key][1] for key in mermaid], mermaid_backend)
+        for key, (result, backend) in zip(mermaid, pairs):
+            results.append(result)
+            # A mermaid.ink fallback is cached as mermaid.ink output.
+            put_keys.append(key if backend == mermaid_backend else _diagram_cache_key(
+                "mermaid", specs[key][1], _mermaid_cache_fmt(backend), None))
+        _stat("mermaid_rendered", len(mermaid))
+        _stat("mermaid_s", time.perf_counter() - started)
+    started = time.perf_counter()
+    for key, put_key, result in zip(graphviz + mermaid, put_keys, results):
+        rendered[key] = result
+        # Failures are not cached so they are retried next time.
+        if result is not None:
+            _diagram_cache_put(put_key, *result)
+    _stat("diagram_cache_s", time.perf_counter() - started)
+    _stat("diagram_bytes", sum(len(r[0]) for r in rendered.values() if r))
+
     fallbacks: dict[str, int] = {}
+    key_iter = iter(keys)
 
     def _replace(match: re.Match[str]) -> str:
         lang = match.group(1)
-        code = html_mod.unescape(match.group(2))
-
-        if lang in ("graphviz", "dot"):
-            themed = _apply_graphviz_theme(code)
-            if raster:
-                png = _render_graphviz(themed, fmt="png", dpi=_GRAPHVIZ_RASTER_DPI)
-                if png:
-                    dims = _png_dimensions(png)
-                    # px -> pt at the render DPI (72 pt per inch).
-                    pct = _size_pct(dims[0] * 72 / _GRAPHVIZ_RASTER_DPI) if dims else 70
-                    return _image_to_img_tag(png, "image/png", pct)
-            else:
-                svg = _render_graphviz(themed)
-                if svg:
-                    dims = _svg_dimensions(svg)
-                    pct = _size_pct(dims[0]) if dims else 70
-                    return _image_to_img_tag(svg, "image/svg+xml", pct)
-        elif lang == "mermaid":
-            result = _render_mermaid(_apply_mermaid_theme(code))
-            if result:
-                img_data, mime = result
-                dims = _jpeg_dimensions(img_data) if "jpeg" in mime else None
-                # Mermaid native px at ~96 DPI; convert to pt (* 0.75)
-                pct = _size_pct(dims[0] * 0.75) if dims else 70
-                return _image_to_img_tag(img_data, mime, pct)
+        result = rendered[next(key_iter)]
+        if result:
+            data, mime, dims = result
+            pct = _size_pct(dims[0]) if dims else 70
+            if images is None:
+                return _image_to_img_tag(data, mime, pct)
+            name = _diagram_image_name(data, mime)
+            images.setdefault(name, (data, mime))
+            return _diagram_img_tag(image_base + name, pct)
 
         # Fallback: styled code block with a diagram-type label
         fallbacks[lang] = fallbacks.get(lang, 0) + 1
@@ -1399,6 +2865,7 @@ def _render_diagrams(html_body: str, *, raster: bool = False) -> tuple[str, dict
         )
 
     result = _DIAGRAM_BLOCK_RE.sub(_replace, html_body)
+    _stat("diagram_fallbacks", sum(fallbacks.values()))
     return result, fallbacks
 
 
@@ -1426,6 +2893,7 @@ def _import_pdf_deps() -> tuple[Any, Any]:
 
 def _md_to_content_html(
     md_text: str, md_lib: Any, *, raster: bool = False,
+    images: dict[str, tuple[bytes, str]] | None = None, image_base: str = "",
 ) -> tuple[str, dict[str, int]]:
     """Convert analysis markdown to a rendered HTML body.
 
@@ -1435,10 +2903,47 @@ def _md_to_content_html(
     graphviz diagrams to PNG instead of SVG for Kindle compatibility.
     Returns (html_body, diagram_fallback_counts).
     """
+    started = time.perf_counter()
     md_text = _strip_frontmatter(md_text)
     md_text = _normalise_list_markdown(md_text)
     html_body = md_lib.markdown(md_text, extensions=MD_EXTENSIONS)
-    return _render_diagrams(html_body, raster=raster)
+    _stat("markdown_s", time.perf_counter() - started)
+    started = time.perf_counter()
+    try:
+        return _render_diagrams(html_body, raster=raster, images=images, image_base=image_base)
+    finally:
+        _stat("diagrams_s", time.perf_counter() - started)
+
+
+# Per-process cache of the parsed stylesheet and the HTML template, keyed on
+# each file's (path, mtime_ns), so a long-lived renderer (pool worker or the
+# `serve` PDF pool) parses them once rather than per document.
+_pdf_render_cache: dict[str, tuple[Any, Any]] = {}
+
+
+def _pdf_stylesheet(css_path: Path) -> Any:
+    """Return a weasyprint CSS object for ``css_path``, parsed once per process."""
+    from weasyprint import CSS  # type: ignore[import-untyped]  # ty: ignore[unresolved-import]
+
+    key = (str(css_path.resolve()), css_path.stat().st_mtime_ns)
+    cached = _pdf_render_cache.get("css")
+    if cached is None or cached[0] != key:
+        cached = (key, CSS(filename=key[0]))
+        _pdf_render_cache["css"] = cached
+    return cached[1]
+
+
+def _pdf_template() -> str | None:
+    """Return the PDF HTML template text (None if absent), read once per process."""
+    try:
+        key = TEMPLATE_FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+    cached = _pdf_render_cache.get("template")
+    if cached is None or cached[0] != key:
+        cached = (key, TEMPLATE_FILE.read_text(encoding="utf-8"))
+        _pdf_render_cache["template"] = cached
+    return cached[1]
 
 
 def _render_pdf_file(
@@ -1449,36 +2954,123 @@ def _render_pdf_file(
     HTML: Any,
     *,
     stamp_date: bool,
+    stats: dict[str, float] | None = None,
+    timeout: float | None = None,
+) -> dict[str, int]:
+    """Render a single markdown file to PDF. Returns diagram fallback counts.
+
+    Pass a ``stats`` dict to profile the render: per-stage seconds, diagram
+    counts and sizes are added to it (see _PROFILE_STAGES). ``timeout``
+    bounds markdown conversion, diagrams and layout (see
+    _with_render_timeout); the analysis file rewrites before them and the
+    PDF write after them always run to completion.
+    """
+    global _render_stats
+    _render_stats = stats
+    try:
+        return _render_pdf_file_stages(
+            input_file, output_file, css_path, md_lib, HTML, stamp_date=stamp_date,
+            timeout=timeout,
+        )
+    finally:
+        _render_stats = None
+
+
+def _render_pdf_file_stages(
+    input_file: Path,
+    output_file: Path,
+    css_path: Path,
+    md_lib: Any,
+    HTML: Any,
+    *,
+    stamp_date: bool,
+    timeout: float | None = None,
 ) -> dict[str, int]:
-    """Render a single markdown file to PDF. Returns diagram fallback counts."""
+    """_render_pdf_file's body, reporting each stage to _stat."""
+    render_started = started = time.perf_counter()
     if stamp_date:
         _stamp_analysis_date(input_file)
 
     _enrich_entry(input_file)
-
-    md_text = input_file.read_text(encoding="utf-8")
-    html_body, diagram_fallbacks = _md_to_content_html(md_text, md_lib)
-
-    if TEMPLATE_FILE.is_file():
-        template = TEMPLATE_FILE.read_text(encoding="utf-8")
-        css_link = f'  <link rel="stylesheet" href="{css_path.resolve()}" />'
-        html = template.replace("$body$", html_body)
-        html = html.replace("$lang$", "en")
-        html = re.sub(r"\$for\(css\)\$.*?\$endfor\$", css_link, html, flags=re.DOTALL)
-        html = re.sub(r"\$if\(.*?\)\$.*?\$endif\$", "", html, flags=re.DOTALL)
-        html = re.sub(r"\$[a-z]+\$", "", html)
-    else:
-        html = (
-            '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
-            '  <meta charset="utf-8" />\n'
-            f'  <link rel="stylesheet" href="{css_path.resolve()}" />\n'
-            f"</head>\n<body>\n{html_body}\n</body>\n</html>"
+    _stat("enrich_s", time.perf_counter() - started)
+
+    def _layout() -> tuple[Any, dict[str, int]]:
+        md_text = input_file.read_text(encoding="utf-8")
+        _stat("md_bytes", len(md_text.encode()))
+        images: dict[str, tuple[bytes, str]] = {}
+        html_body, diagram_fallbacks = _md_to_content_html(
+            md_text, md_lib, images=images, image_base=_DIAGRAM_URL_SCHEME,
         )
 
-    HTML(string=html, base_url=str(css_path.resolve().parent)).write_pdf(str(output_file))
+        # The stylesheet is passed pre-parsed rather than <link>ed (the template
+        # has no other styles, so the cascade is unchanged).
+        template = _pdf_template()
+        if template is not None:
+            html = template.replace("$body$", html_body)
+            html = html.replace("$lang$", "en")
+            html = re.sub(r"\$for\(css\)\$.*?\$endfor\$", "", html, flags=re.DOTALL)
+            html = re.sub(r"\$if\(.*?\)\$.*?\$endif\$", "", html, flags=re.DOTALL)
+            html = re.sub(r"\$[a-z]+\$", "", html)
+        else:
+            html = (
+                '<!DOCTYPE html>\n<html lang="en">\n<head>\n'
+                '  <meta charset="utf-8" />\n'
+                f"</head>\n<body>\n{html_body}\n</body>\n</html>"
+            )
+
+        _stat("html_bytes", len(html.encode()))
+
+        # render() (layout) and write_pdf() (serialisation) are what
+        # HTML.write_pdf() does in one call; split so each can be timed.
+        started = time.perf_counter()
+        document = HTML(
+            string=html, base_url=str(css_path.resolve().parent),
+            url_fetcher=_pdf_url_fetcher(images),
+        ).render(stylesheets=[_pdf_stylesheet(css_path)])
+        _stat("layout_s", time.perf_counter() - started)
+        _stat("pages", len(document.pages))
+        return document, diagram_fallbacks
+
+    # Only conversion, diagrams and layout run under the timeout; the
+    # analysis rewrites above and the PDF write below are left to finish.
+    document, diagram_fallbacks = _with_render_timeout(timeout, _layout)
+    started = time.perf_counter()
+    # Via a temp file, so a worker killed mid-write leaves the old PDF intact.
+    tmp = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+    try:
+        document.write_pdf(str(tmp))
+        os.replace(tmp, output_file)
+    finally:
+        tmp.unlink(missing_ok=True)
+    _stat("write_s", time.perf_counter() - started)
+    if _render_stats is not None:
+        try:
+            _stat("pdf_bytes", output_file.stat().st_size)
+        except OSError:
+            pass
+    _stat("total_s", time.perf_counter() - render_started)
     return diagram_fallbacks
 
 
+def _pdf_url_fetcher(images: dict[str, tuple[bytes, str]]) -> Any:
+    """WeasyPrint url_fetcher serving _DIAGRAM_URL_SCHEME images from
+    ``images`` (name -> (bytes, mime)); other URLs use the default fetcher.
+
+    Diagrams reach WeasyPrint as raw bytes instead of base64 data URIs in the
+    HTML string, and WeasyPrint caches images per URL, so a diagram repeated
+    in a document is decoded once.
+    """
+    from weasyprint import default_url_fetcher  # type: ignore[import-untyped]  # ty: ignore[unresolved-import]
+
+    def _fetch(url: str, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        if url.startswith(_DIAGRAM_URL_SCHEME):
+            data, mime = images[url[len(_DIAGRAM_URL_SCHEME):]]
+            return {"string": data, "mime_type": mime}
+        return default_url_fetcher(url, *args, **kwargs)
+
+    return _fetch
+
+
 def _print_diagram_fallbacks(diagram_fallbacks: dict[str, int]) -> None:
     for lang, count in diagram_fallbacks.items():
         s = "s" if count > 1 else ""
@@ -1499,8 +3091,6 @@ def _print_diagram_fallbacks(diagram_fallbacks: dict[str, int]) -> None:
 
 
 def cmd_pdf(args: argparse.Namespace) -> None:
-    md_lib, HTML = _import_pdf_deps()
-
     css_path = Path(args.css) if args.css else CSS_FILE
 
     # Resolve input file: explicit arg or auto-detect single .md in cwd
@@ -1530,51 +3120,353 @@ def cmd_pdf(args: argparse.Namespace) -> None:
         print(f"Error: CSS stylesheet not found: {css_path}", file=sys.stderr)
         sys.exit(1)
 
-    diagram_fallbacks = _render_pdf_file(
-        input_file, output_file, css_path, md_lib, HTML, stamp_date=not args.no_stamp,
-    )
+    # A running `serve` renders with weasyprint already loaded; otherwise (or
+    # if its render fails) render here. A render it accepted but has not
+    # finished is not repeated here, as both would write the same files.
+    reply = _serve_pdf_request(detect_base_dir(), [[
+        str(input_file.resolve()), str(output_file.resolve()), str(css_path.resolve()),
+        not args.no_stamp, None, bool(args.profile),
+    ]], None)
+    if reply is not None and reply.get("accepted") and not reply.get("ok"):
+        print(f"Error: the serve process did not finish rendering {input_file}: "
+              f"{reply.get('error')}", file=sys.stderr)
+        sys.exit(1)
+    stats: dict[str, float] | None = {} if args.profile else None
+    if reply is not None and reply.get("ok") and reply["results"][0][2] is None:
+        diagram_fallbacks = reply["results"][0][1]
+        stats = reply["results"][0][3] if len(reply["results"][0]) > 3 else stats
+    else:
+        md_lib, HTML = _import_pdf_deps()
+        diagram_fallbacks = _render_pdf_file(
+            input_file, output_file, css_path, md_lib, HTML, stamp_date=not args.no_stamp,
+            stats=stats,
+        )
 
     if args.open_after:
         _open_file(output_file)
 
     print(f"PDF_PATH: {output_file}")
     _print_diagram_fallbacks(diagram_fallbacks)
+    if args.profile:
+        _write_profile_report(Path(args.profile), [{"file": str(input_file), "error": None, **(stats or {})}])
 
-    # Regenerate the wisdom library index (non-fatal on failure).
+    # Card renditions for the entry's (possibly new) thumbnail, then the
+    # wisdom library index (both non-fatal on failure).
+    base_dir = detect_base_dir()
     try:
-        _regenerate_index(detect_base_dir())
+        if input_file.resolve().parent.parent == base_dir.resolve():
+            _thumbnail_stage(base_dir, [input_file.resolve().parent])
+    except Exception as exc:
+        print(f"Warning: Thumbnail renditions failed: {exc}", file=sys.stderr)
+    try:
+        _regenerate_index(base_dir)
     except Exception as exc:
         print(f"Warning: Index generation failed: {exc}", file=sys.stderr)
 
 
+def _with_render_timeout(seconds: float | None, fn: Any, *args: Any, **kwargs: Any) -> Any:
+    """Call fn, raising TimeoutError once it has run for ``seconds``.
+
+    Uses SIGALRM, so the limit only applies on a process's main thread (pool
+    workers run jobs there); elsewhere, or with no limit, fn runs unbounded.
+    The exception can be raised anywhere inside fn, so fn must not write
+    files a partial run would leave truncated.
+    """
+    if not seconds:
+        return fn(*args, **kwargs)
+
+    def _expired(signum: int, frame: Any) -> None:
+        raise TimeoutError(f"render timed out after {seconds:g}s")
+
+    try:
+        previous = signal.signal(signal.SIGALRM, _expired)
+    except ValueError:
+        return fn(*args, **kwargs)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
 def _render_pdf_worker(
     md_path_str: str, output_path_str: str, css_path_str: str, stamp_date: bool,
-) -> tuple[str, dict[str, int], str | None]:
+    timeout: float | None = None, profile: bool = False,
+) -> tuple[str, dict[str, int], str | None, dict[str, float] | None, float]:
     """Multiprocessing-safe wrapper around _render_pdf_file.
 
     Imports weasyprint inside the worker so the heavy native libs load once
-    per process. Returns (output_path, diagram_fallbacks, error_str_or_None).
-    Strings are used for arguments because Path objects pickle fine but
-    keeping it explicit avoids surprises.
+    per process. Returns (output_path, diagram_fallbacks, error_str_or_None,
+    render_stats_or_None, seconds). Strings are used for arguments because
+    Path objects pickle fine but keeping it explicit avoids surprises. A
+    render running past ``timeout`` seconds is abandoned and reported as an
+    error; with ``profile`` the stats collected so far are still returned.
     """
+    stats: dict[str, float] | None = {} if profile else None
+    started = time.perf_counter()
     try:
         md_lib, HTML = _import_pdf_deps()
         fallbacks = _render_pdf_file(
             Path(md_path_str), Path(output_path_str), Path(css_path_str),
-            md_lib, HTML, stamp_date=stamp_date,
+            md_lib, HTML, stamp_date=stamp_date, stats=stats, timeout=timeout,
         )
-        return output_path_str, fallbacks, None
+        return output_path_str, fallbacks, None, stats, time.perf_counter() - started
     except SystemExit as exc:
-        return output_path_str, {}, f"PDF deps missing (exit {exc.code})"
+        return (output_path_str, {}, f"PDF deps missing (exit {exc.code})", stats,
+                time.perf_counter() - started)
     except Exception as exc:
-        return output_path_str, {}, str(exc)
+        return output_path_str, {}, str(exc), stats, time.perf_counter() - started
+
+
+# Per-PDF render fingerprints written by `regenerate-pdfs`, so
+# --skip-unchanged can leave PDFs whose inputs have not changed. A fingerprint
+# covers the markdown content, CSS, HTML template and renderer version; the
+# PDF's own (mtime_ns, size) is recorded too, so a PDF rewritten or deleted by
+# anything else is rendered again.
+# The manifest also keeps each file's render time from previous runs, which
+# `regenerate-pdfs` uses to schedule the most expensive renders first.
+_PDF_MANIFEST_NAME = "wisdom-pdf-manifest.json"
+_PDF_MANIFEST_VERSION = 1
+# Bump when _render_pdf_file output changes for the same inputs.
+_PDF_RENDER_VERSION = 1
+
+
+def _pdf_build_fingerprint(css_path: Path, md_lib: Any) -> str:
+    """Hash of everything besides the markdown that shapes a rendered PDF."""
+    h = hashlib.sha256(f"{_PDF_RENDER_VERSION}:{getattr(md_lib, '__version__', '')}:".encode())
+    try:
+        import weasyprint  # type: ignore[import-untyped]  # ty: ignore[unresolved-import]
+        h.update(str(getattr(weasyprint, "__version__", "")).encode())
+    except (ImportError, OSError):
+        pass
+    for path in (css_path, TEMPLATE_FILE):
+        h.update(b"\0")
+        try:
+            h.update(path.read_bytes())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
+def _pdf_fingerprint(md_file: Path, build: str) -> str | None:
+    try:
+        return hashlib.sha256(build.encode() + b"\0" + md_file.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _pdf_record(md_file: Path, build: str) -> dict[str, Any] | None:
+    """Fingerprint plus the PDF's stat signature, or None if either is missing."""
+    fingerprint = _pdf_fingerprint(md_file, build)
+    try:
+        st = md_file.with_suffix(".pdf").stat()
+    except OSError:
+        return None
+    if fingerprint is None:
+        return None
+    return {"fingerprint": fingerprint, "pdf_mtime_ns": st.st_mtime_ns, "pdf_size": st.st_size}
+
+
+def _load_pdf_manifest(base_dir: Path) -> tuple[dict[str, Any], dict[str, float]]:
+    """Return (fingerprint records, render seconds), both keyed on
+    "<entry dir>/<analysis file>"."""
+    try:
+        data = json.loads((base_dir / _PDF_MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}, {}
+    if not isinstance(data, dict) or data.get("version") != _PDF_MANIFEST_VERSION:
+        return {}, {}
+    files = data.get("files")
+    timings = data.get("timings")
+    return (
+        files if isinstance(files, dict) else {},
+        {k: float(v) for k, v in timings.items() if isinstance(v, (int, float))}
+        if isinstance(timings, dict) else {},
+    )
+
+
+def _save_pdf_manifest(base_dir: Path, files: dict[str, Any], timings: dict[str, float]) -> None:
+    """Atomically write the PDF fingerprint manifest (temp file + rename)."""
+    path = base_dir / _PDF_MANIFEST_NAME
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(
+            json.dumps({"version": _PDF_MANIFEST_VERSION, "files": files,
+                        "timings": {k: round(v, 3) for k, v in timings.items()}},
+                       ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+    except OSError as exc:
+        tmp.unlink(missing_ok=True)
+        print(f"Warning: Could not write PDF manifest: {exc}", file=sys.stderr)
+
+
+def _pdf_worker_warm() -> None:
+    """Pool initializer: load weasyprint and parse the default stylesheet up
+    front so the first job does not pay for it."""
+    try:
+        _import_pdf_deps()
+        _pdf_stylesheet(CSS_FILE)
+    except (SystemExit, Exception):
+        # Surfaced per job by _render_pdf_worker instead.
+        pass
+
+
+# Default per-file render timeout for `regenerate-pdfs` (--timeout). A worker
+# stuck in native code past the timeout plus the grace period is killed.
+_PDF_RENDER_TIMEOUT_S = 600.0
+_PDF_TIMEOUT_GRACE_S = 30.0
+# Times a file may take down its render worker (while rendering alone, so the
+# crash is known to be its own) before it is reported as failed.
+_PDF_CRASH_ATTEMPTS = 2
+
+# Render-cost model (seconds) for files with no recorded render time: a fixed
+# cost, a per-KB cost and per-diagram costs. It is rescaled to the machine's
+# speed using the files that do have a recorded time.
+_PDF_COST_BASE_S = 1.0
+_PDF_COST_PER_KB_S = 0.02
+_PDF_COST_GRAPHVIZ_S = 0.2
+_PDF_COST_MERMAID_S = 1.0
+# Weight of the newest measurement in a file's smoothed render time.
+_PDF_COST_SMOOTHING = 0.5
+
+_DIAGRAM_FENCE_RE = re.compile(r"^\s*(?:```|~~~)\s*(mermaid|graphviz|dot)\b", re.MULTILINE)
+
+
+def _pdf_modelled_cost(md_file: Path) -> float:
+    """Estimate a file's render time from its size and diagram count."""
+    try:
+        text = md_file.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return _PDF_COST_BASE_S
+    langs = Counter(_DIAGRAM_FENCE_RE.findall(text))
+    return (
+        _PDF_COST_BASE_S
+        + len(text.encode()) / 1024 * _PDF_COST_PER_KB_S
+        + (langs["graphviz"] + langs["dot"]) * _PDF_COST_GRAPHVIZ_S
+        + langs["mermaid"] * _PDF_COST_MERMAID_S
+    )
+
+
+def _pdf_predicted_costs(md_files: list[Path], timings: dict[str, float]) -> dict[Path, float]:
+    """Predict each file's render time: its smoothed recorded time when there
+    is one, otherwise the size/diagram model scaled by how recorded times
+    compare with the model across the corpus."""
+    modelled = {md: _pdf_modelled_cost(md) for md in md_files}
+    recorded = {md: timings.get(f"{md.parent.name}/{md.name}") for md in md_files}
+    known = [md for md in md_files if recorded[md] is not None]
+    scale = 1.0
+    if known:
+        scale = sum(recorded[md] for md in known) / sum(modelled[md] for md in known)
+    return {
+        md: recorded[md] if recorded[md] is not None else modelled[md] * scale
+        for md in md_files
+    }
+
+
+def _regenerate_pdfs_pooled(
+    md_files: list[Path], css_str: str, stamp: bool, workers: int,
+    timeout: float | None, profile: bool, finished: Any,
+) -> None:
+    """Render md_files (already in dispatch order) on a process pool.
+
+    Only ``workers`` jobs are in flight at once, so the next file goes to
+    whichever worker frees up first and dispatch order is kept. Each job
+    enforces ``timeout`` itself; a worker still busy _PDF_TIMEOUT_GRACE_S
+    after that is stuck outside Python, so the pool is killed, that file is
+    reported, and the other in-flight files are dispatched again on a new
+    pool. When a worker dies, every in-flight job fails with it, so those
+    files are dispatched again one at a time on a new pool; a file whose
+    worker dies while it renders alone is retried until it has crashed
+    _PDF_CRASH_ATTEMPTS times, then reported. ``finished`` is called as
+    (md_file, output_path, fallbacks, error, render_stats, seconds) for
+    every file.
+    """
+    from collections import deque
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    queue = deque(md_files)
+    hard_limit = timeout + _PDF_TIMEOUT_GRACE_S if timeout else None
+    pool = ProcessPoolExecutor(max_workers=workers)
+    running: dict[Any, tuple[Path, float]] = {}
+    # Files in flight when a worker died, and crashes pinned on each file.
+    suspects: set[Path] = set()
+    crashes: Counter[Path] = Counter()
+    try:
+        while queue or running:
+            while queue and len(running) < (1 if suspects else workers):
+                md_file = queue.popleft()
+                fut = pool.submit(
+                    _render_pdf_worker,
+                    str(md_file), str(md_file.with_suffix(".pdf")), css_str, stamp, timeout, profile,
+                )
+                running[fut] = (md_file, time.perf_counter())
+            done, _ = wait(
+                running, timeout=_PDF_TIMEOUT_GRACE_S if hard_limit else None,
+                return_when=FIRST_COMPLETED,
+            )
+            now = time.perf_counter()
+            crashed: list[Path] = []
+            for fut in done:
+                md_file, started = running.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception:
+                    # BrokenProcessPool: a worker died (e.g. a crash in native code).
+                    crashed.append(md_file)
+                    continue
+                suspects.discard(md_file)
+                finished(md_file, *result)
+            stuck = [fut for fut, (_, started) in running.items()
+                     if hard_limit and now - started > hard_limit]
+            for fut in stuck:
+                md_file, started = running.pop(fut)
+                suspects.discard(md_file)
+                finished(md_file, str(md_file.with_suffix(".pdf")), {},
+                         f"render killed after {now - started:.0f}s (timeout {timeout:g}s)",
+                         None, now - started)
+            if stuck or crashed:
+                # Jobs still pending on the old pool fail with it (or were
+                # innocent bystanders of a stuck worker): dispatch them again.
+                requeue = crashed + [md_file for md_file, _ in running.values()]
+                running.clear()
+                if len(crashed) == 1 and len(requeue) == 1:
+                    md_file = crashed[0]
+                    crashes[md_file] += 1
+                    if crashes[md_file] >= _PDF_CRASH_ATTEMPTS:
+                        requeue = []
+                        suspects.discard(md_file)
+                        finished(md_file, str(md_file.with_suffix(".pdf")), {},
+                                 f"render worker died ({crashes[md_file]} times)", None, None)
+                if crashed:
+                    suspects.update(requeue)
+                queue.extendleft(reversed(requeue))
+                for proc in list((getattr(pool, "_processes", None) or {}).values()):
+                    proc.kill()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
 
 
 def cmd_regenerate_pdfs(args: argparse.Namespace) -> None:
-    """Re-render every wisdom analysis PDF under base_dir, in parallel."""
+    """Re-render every wisdom analysis PDF under base_dir, in parallel.
+
+    Every successful render without diagram fallbacks records a fingerprint
+    in wisdom-pdf-manifest.json. With --skip-unchanged, entries whose
+    fingerprint and PDF still match are left alone (not with --stamp, which
+    rewrites every analysis date).
+
+    Files are dispatched longest-first by predicted cost (_pdf_predicted_costs)
+    and handed to workers one at a time as they free up, so a few large,
+    diagram-heavy analyses don't end up alone at the tail. A render running
+    past --timeout is abandoned and reported as failed.
+    """
     # Validate deps in the parent so we fail fast with a friendly message
     # before spawning workers.
-    _import_pdf_deps()
+    md_lib, _ = _import_pdf_deps()
 
     css_path = Path(args.css) if args.css else CSS_FILE
     if not css_path.is_file():
@@ -1591,55 +3483,146 @@ def cmd_regenerate_pdfs(args: argparse.Namespace) -> None:
         print(f"No analysis markdown files found under {base_dir}", file=sys.stderr)
         return
 
+    build = _pdf_build_fingerprint(css_path, md_lib)
+    pdf_manifest, pdf_timings = _load_pdf_manifest(base_dir)
+    # Drop records for analyses that no longer exist.
+    keys = {f"{md.parent.name}/{md.name}" for md in md_files}
+    pdf_manifest = {k: v for k, v in pdf_manifest.items() if k in keys}
+    pdf_timings = {k: v for k, v in pdf_timings.items() if k in keys}
+    skipped = 0
+    if args.skip_unchanged and args.stamp:
+        print("Note: --skip-unchanged has no effect with --stamp (every date is rewritten)",
+              file=sys.stderr)
+    elif args.skip_unchanged:
+        pending = []
+        for md_file in md_files:
+            stored = pdf_manifest.get(f"{md_file.parent.name}/{md_file.name}")
+            if stored and stored == _pdf_record(md_file, build):
+                skipped += 1
+            else:
+                pending.append(md_file)
+        md_files = pending
+
+    def _record(md_file: Path, fallbacks: dict[str, int]) -> None:
+        # Renders that fell back to code blocks (e.g. mermaid.ink offline)
+        # are not recorded, so the next run retries them.
+        key = f"{md_file.parent.name}/{md_file.name}"
+        record = None if fallbacks else _pdf_record(md_file, build)
+        if record is None:
+            pdf_manifest.pop(key, None)
+        else:
+            pdf_manifest[key] = record
+
+    if not md_files:
+        print(f"All {skipped} PDF(s) under {base_dir} are up to date")
+        _save_pdf_manifest(base_dir, pdf_manifest, pdf_timings)
+        try:
+            _regenerate_index(base_dir, force=True)
+        except Exception as exc:
+            print(f"Warning: Index generation failed: {exc}", file=sys.stderr)
+        return
+
+    costs = _pdf_predicted_costs(md_files, pdf_timings)
+    md_files.sort(key=lambda md: -costs[md])
+    timeout = args.timeout if args.timeout and args.timeout > 0 else None
+
     cpu_total = os.cpu_count() or 1
     default_workers = max(1, cpu_total - 2)
     workers = args.workers if args.workers is not None else default_workers
     workers = max(1, min(workers, len(md_files)))
 
     print(f"Regenerating {len(md_files)} PDF(s) under {base_dir}"
-          f" (stamp_date={'on' if args.stamp else 'off'}, workers={workers})")
+          + (f", skipping {skipped} unchanged" if skipped else "")
+          + f" (stamp_date={'on' if args.stamp else 'off'}, workers={workers})")
 
     rendered = 0
     failed: list[tuple[str, str]] = []
+    profile_docs: list[dict[str, Any]] = []
     css_str = str(css_path)
 
-    if workers == 1:
+    def _finished(
+        md_file: Path, output_path_str: str, fallbacks: dict[str, int], err: str | None,
+        stats: dict[str, float] | None = None, seconds: float | None = None,
+    ) -> None:
+        nonlocal rendered
+        if args.profile:
+            doc: dict[str, Any] = {"file": str(md_file), "error": err, **(stats or {})}
+            if seconds is not None:
+                doc.setdefault("total_s", seconds)
+            profile_docs.append(doc)
+        if seconds is not None:
+            key = f"{md_file.parent.name}/{md_file.name}"
+            prev = pdf_timings.get(key)
+            pdf_timings[key] = seconds if prev is None else (
+                _PDF_COST_SMOOTHING * seconds + (1 - _PDF_COST_SMOOTHING) * prev
+            )
+        if err is None:
+            rendered += 1
+            _record(md_file, fallbacks)
+            print(f"PDF_PATH: {output_path_str}")
+            _print_diagram_fallbacks(fallbacks)
+        else:
+            failed.append((str(md_file), err))
+            print(f"FAILED: {md_file}: {err}", file=sys.stderr)
+
+    # A running `serve` renders in its warm pool, a chunk at a time; if it
+    # does not accept a chunk, the remaining files render locally below. A
+    # chunk it accepted but did not finish is reported as failed rather than
+    # rendered again here while the server may still be writing it.
+    if _serve_request(base_dir, {"op": "ping"}) is not None:
+        print("Rendering via the running wisdom.py serve process")
+        css_abs = str(css_path.resolve())
+        while md_files:
+            chunk = md_files[:_SERVE_PDF_CHUNK]
+            reply = _serve_pdf_request(base_dir, [
+                [str(md.resolve()), str(md.with_suffix(".pdf").resolve()), css_abs, args.stamp,
+                 timeout, bool(args.profile)]
+                for md in chunk
+            ], timeout)
+            if reply is not None and reply.get("accepted") and not reply.get("ok"):
+                for md_file in chunk:
+                    _finished(md_file, str(md_file.with_suffix(".pdf")), {},
+                              f"serve render did not finish: {reply.get('error')}")
+                md_files = md_files[len(chunk):]
+                print(f"Warning: serve stopped answering; rendering {len(md_files)} file(s) locally",
+                      file=sys.stderr)
+                break
+            if reply is None or not reply.get("ok"):
+                print(f"Warning: serve render failed; rendering {len(md_files)} file(s) locally",
+                      file=sys.stderr)
+                break
+            for md_file, result in zip(chunk, reply["results"]):
+                _finished(md_file, *result)
+            md_files = md_files[len(chunk):]
+        workers = max(1, min(workers, len(md_files)))
+
+    if not md_files:
+        pass
+    elif workers == 1:
         # Sequential path keeps imports cheap and tracebacks clean.
         md_lib, HTML = _import_pdf_deps()
         for md_file in md_files:
             output_file = md_file.with_suffix(".pdf")
+            stats: dict[str, float] | None = {} if args.profile else None
+            started = time.perf_counter()
             try:
                 fallbacks = _render_pdf_file(
                     md_file, output_file, css_path, md_lib, HTML, stamp_date=args.stamp,
+                    stats=stats, timeout=timeout,
                 )
-                rendered += 1
-                print(f"PDF_PATH: {output_file}")
-                _print_diagram_fallbacks(fallbacks)
             except Exception as exc:
-                failed.append((str(md_file), str(exc)))
-                print(f"FAILED: {md_file}: {exc}", file=sys.stderr)
+                _finished(md_file, str(output_file), {}, str(exc), stats, time.perf_counter() - started)
+            else:
+                _finished(md_file, str(output_file), fallbacks, None, stats, time.perf_counter() - started)
     else:
-        from concurrent.futures import ProcessPoolExecutor, as_completed
-        with ProcessPoolExecutor(max_workers=workers) as pool:
-            futures = {
-                pool.submit(
-                    _render_pdf_worker,
-                    str(md_file), str(md_file.with_suffix(".pdf")), css_str, args.stamp,
-                ): md_file
-                for md_file in md_files
-            }
-            for fut in as_completed(futures):
-                md_file = futures[fut]
-                output_path_str, fallbacks, err = fut.result()
-                if err is None:
-                    rendered += 1
-                    print(f"PDF_PATH: {output_path_str}")
-                    _print_diagram_fallbacks(fallbacks)
-                else:
-                    failed.append((str(md_file), err))
-                    print(f"FAILED: {md_file}: {err}", file=sys.stderr)
+        _regenerate_pdfs_pooled(
+            md_files, css_str, args.stamp, workers, timeout, bool(args.profile), _finished,
+        )
 
-    print(f"Done: {rendered} rendered, {len(failed)} failed")
+    _save_pdf_manifest(base_dir, pdf_manifest, pdf_timings)
+    print(f"Done: {rendered} rendered, {skipped} skipped (unchanged), {len(failed)} failed")
+    if args.profile:
+        _write_profile_report(Path(args.profile), profile_docs)
 
     # Regenerate the wisdom library index once at the end (non-fatal on failure).
     try:
@@ -1662,8 +3645,16 @@ def cmd_regenerate_pdfs(args: argparse.Namespace) -> None:
 # Filename used for the FTS5 search database written alongside index.html.
 _SEARCH_DB_NAME = "wisdom-search.db"
 
-# Filename caching precomputed related entries per dir_path.
+# Stored in the search database's ``PRAGMA user_version``. Bump when the FTS5
+# table definition, tokenizer or any other table changes so existing
+# databases are rebuilt.
+_SEARCH_DB_VERSION = 3
+
+# Related entries live in the search database's ``wisdom_related`` table (one
+# row per dir_path). The legacy whole-corpus JSON export is written only when
+# _RELATED_JSON_ENV_VAR is true or `index --related-json` is passed.
 _RELATED_CACHE_NAME = "wisdom-related.json"
+_RELATED_JSON_ENV_VAR = "EXTRACT_WISDOM_RELATED_JSON"
 
 # How many related entries to surface per item.
 _RELATED_TOP_K = 8
@@ -1671,6 +3662,19 @@ _RELATED_TOP_K = 8
 # Reciprocal Rank Fusion constant. 60 is the conventional value.
 _RRF_K = 60
 
+# Incremental related-entry state (term weights, tags, per-entry rank
+# summaries and fused results) kept alongside the related cache. Version 2
+# drops states whose candidate-less rows were summarised with None lists.
+_RELATED_STATE_NAME = "wisdom-related-state.json"
+_RELATED_STATE_VERSION = 2
+
+# Weighted relative IDF change since the last full recompute above which
+# incremental updates give way to a full recompute.
+_RELATED_IDF_DRIFT = 0.05
+
+# Fraction of changed entries above which a full recompute is cheaper.
+_RELATED_MAX_CHANGED = 0.25
+
 # Maximum tags to consider for sprawl detection per pair.
 _TAG_SPRAWL_RATIO = 0.82  # difflib SequenceMatcher.ratio threshold
 
@@ -1697,6 +3701,370 @@ def _tokenise(text: str) -> list[str]:
     ]
 
 
+def _term_weights(text: str) -> dict[str, float]:
+    """Augmented term frequency (0.5 + 0.5 * tf / max_tf) per token."""
+    tf = Counter(_tokenise(text))
+    if not tf:
+        return {}
+    max_tf = max(tf.values())
+    return {term: 0.5 + 0.5 * cnt / max_tf for term, cnt in tf.items()}
+
+
+def _tfidf_vectors(
+    entries: list[dict[str, Any]],
+    weights: list[dict[str, float]] | None = None,
+) -> tuple[list[dict[str, float]], list[float], Counter[str]]:
+    """Build one sparse TF-IDF vector per entry body.
+
+    Uses augmented term frequency (see _term_weights, or pass ``weights``
+    already computed) and a smoothed IDF, log((n + 1) / (df + 1)) + 1.
+    Returns (vectors, norms, df).
+    """
+    n = len(entries)
+    if weights is None:
+        weights = [_term_weights(str(e.get("body", ""))) for e in entries]
+    df: Counter[str] = Counter()
+    for tfw in weights:
+        df.update(tfw.keys())
+
+    idf: dict[str, float] = {
+        term: math.log((n + 1) / (count + 1)) + 1.0
+        for term, count in df.items()
+    }
+    vectors: list[dict[str, float]] = []
+    norms: list[float] = []
+    for tfw in weights:
+        vec = {term: w * idf[term] for term, w in tfw.items()}
+        vectors.append(vec)
+        norms.append(math.sqrt(sum(v * v for v in vec.values())) if vec else 0.0)
+    return vectors, norms, df
+
+
+def _entry_tag_sets(entries: list[dict[str, Any]]) -> list[set[str]]:
+    return [
+        {t.lower() for t in e.get("tags", []) if isinstance(t, str)}
+        for e in entries
+    ]
+
+
+def _fuse_rrf(
+    content: dict[int, float], tags: dict[int, float], top_k: int,
+) -> list[tuple[int, float, bool, bool]]:
+    """Reciprocal Rank Fusion of two score maps, returning the top_k as
+    (index, fused_score, in_content, in_tags).
+
+    Each signal ranks its candidates by (score, index) descending and a
+    candidate earns 1 / (_RRF_K + rank + 1) per signal it appears in. Ties on
+    the fused score keep content candidates first (in content rank order),
+    then tag-only candidates (in tag rank order).
+
+    Rather than fusing every candidate, takes the top ``m`` of each signal
+    with a heap: anything outside both heaps ranks at least ``m`` in each
+    signal, so its fused score is bounded by 2 / (_RRF_K + m + 1). When the
+    k-th fused score beats that bound the result is exact; otherwise ``m``
+    doubles and the step repeats. A heap member's rank in the other signal
+    may lie beyond ``m``; the full ranking for that signal is then sorted
+    once and reused.
+    """
+    full_rank: list[dict[int, int] | None] = [None, None]
+
+    def _rank_of(which: int, scores: dict[int, float], j: int) -> int:
+        ranks = full_rank[which]
+        if ranks is None:
+            ordered = sorted(((s, k) for k, s in scores.items()), reverse=True)
+            ranks = full_rank[which] = {k: r for r, (_, k) in enumerate(ordered)}
+        return ranks[j]
+
+    # RRF is flat near the top (1/61 vs 1/69), so the bound rarely clears
+    # at m = top_k; starting wider avoids repeated heap passes.
+    m = max(top_k, 64)
+    while True:
+        top_c = heapq.nlargest(m, ((s, j) for j, s in content.items()))
+        top_t = heapq.nlargest(m, ((s, j) for j, s in tags.items()))
+        c_rank = {j: r for r, (_, j) in enumerate(top_c)}
+        t_rank = {j: r for r, (_, j) in enumerate(top_t)}
+        c_full = len(top_c) == len(content)
+        t_full = len(top_t) == len(tags)
+
+        ranked: list[tuple[tuple[float, int, int], int, float]] = []
+        for j in c_rank.keys() | t_rank.keys():
+            rc = c_rank.get(j)
+            if rc is None and not c_full and j in content:
+                rc = _rank_of(0, content, j)
+            rt = t_rank.get(j)
+            if rt is None and not t_full and j in tags:
+                rt = _rank_of(1, tags, j)
+            score = 0.0
+            if rc is not None:
+                score += 1.0 / (_RRF_K + rc + 1)
+            if rt is not None:
+                score += 1.0 / (_RRF_K + rt + 1)
+            order = (-score, 0, rc) if rc is not None else (-score, 1, rt or 0)
+            ranked.append((order, j, score))
+        ranked.sort()
+
+        bound = 0.0
+        if not c_full:
+            bound += 1.0 / (_RRF_K + m + 1)
+        if not t_full:
+            bound += 1.0 / (_RRF_K + m + 1)
+        if (c_full and t_full) or (len(ranked) >= top_k and ranked[top_k - 1][2] > bound):
+            return [(j, score, j in content, j in tags) for _, j, score in ranked[:top_k]]
+        m *= 2
+
+
+def _related_records(
+    i: int, fused: list[tuple[int, float, bool, bool]],
+    entries: list[dict[str, Any]], tag_sets: list[set[str]],
+) -> list[dict[str, Any]]:
+    """Format fused neighbours of entry ``i`` as wisdom-related.json records."""
+    out: list[dict[str, Any]] = []
+    for j, score, in_content, in_tags in fused:
+        why = "both" if in_content and in_tags else "tags" if in_tags else "content"
+        shared = sorted(tag_sets[i] & tag_sets[j]) if in_tags else []
+        other = entries[j]
+        out.append({
+            "dir_path": other["dir_path"],
+            "title": other["title"],
+            "source_type": other.get("source_type", ""),
+            "score": round(score, 5),
+            "why": why,
+            "shared_tags": shared,
+        })
+    return out
+
+
+# Per-entry summary of how its top_k was formed, used to decide whether a
+# changed entry elsewhere can alter it: (members' content scores descending,
+# the lowest such member's content rank or -1, the same two for tags, the
+# k-th fused score or None, the (k+1)-th fused score or None).
+_RowSummary = tuple[list[float], int, list[float], int, float | None, float | None]
+
+
+def _row_summary(
+    fused: list[tuple[int, float, bool, bool]],
+    content: dict[int, float], tags: dict[int, float], top_k: int,
+) -> _RowSummary:
+    """Summarise a row fused to top_k + 1 (see _RowSummary)."""
+    members = fused[:top_k]
+    out: list[Any] = []
+    for flag, scores in ((2, content), (3, tags)):
+        pairs = sorted(((scores[f[0]], f[0]) for f in members if f[flag]), reverse=True)
+        if not pairs:
+            out += [[], -1]
+            continue
+        floor = pairs[-1]
+        out += [
+            [sc for sc, _ in pairs],
+            sum(1 for j, sc in scores.items() if (sc, j) > floor),
+        ]
+    kth = members[-1][1] if len(members) == top_k else None
+    nxt = fused[top_k][1] if len(fused) > top_k else None
+    return out[0], out[1], out[2], out[3], kth, nxt
+
+
+def _related_postings(
+    vectors: list[dict[str, float]], tag_sets: list[set[str]],
+) -> tuple[dict[str, tuple[list[int], list[float]]], dict[str, list[int]]]:
+    """Build term and tag inverted indexes over all entries."""
+    postings: dict[str, tuple[list[int], list[float]]] = {}
+    for j, vec in enumerate(vectors):
+        for term, w in vec.items():
+            docs, weights = postings.setdefault(term, ([], []))
+            docs.append(j)
+            weights.append(w)
+    tag_postings: dict[str, list[int]] = {}
+    for j, ts in enumerate(tag_sets):
+        for t in ts:
+            tag_postings.setdefault(t, []).append(j)
+    return postings, tag_postings
+
+
+def _related_row_scores(
+    i: int, vectors: list[dict[str, float]], norms: list[float],
+    tag_sets: list[set[str]],
+    postings: dict[str, tuple[list[int], list[float]]],
+    tag_postings: dict[str, list[int]],
+) -> tuple[dict[int, float], dict[int, float]]:
+    """Score entry ``i`` against every other entry via the inverted indexes,
+    returning positive (cosine, tag Jaccard) maps keyed by entry index."""
+    n = len(vectors)
+    content: dict[int, float] = {}
+    if norms[i] != 0.0:
+        # Dense accumulator: list indexing beats dict lookups here.
+        dots = [0.0] * n
+        for term, wi in vectors[i].items():
+            docs, weights = postings[term]
+            if len(docs) < 2:
+                continue
+            for j, wj in zip(docs, weights):
+                dots[j] += wi * wj
+        dots[i] = 0.0
+        content = {
+            j: d / (norms[i] * norms[j])
+            for j, d in enumerate(dots) if d > 0
+        }
+
+    inter: dict[int, int] = {}
+    for t in tag_sets[i]:
+        for j in tag_postings[t]:
+            inter[j] = inter.get(j, 0) + 1
+    inter.pop(i, None)
+    size_i = len(tag_sets[i])
+    tags = {j: c / (size_i + len(tag_sets[j]) - c) for j, c in inter.items()}
+    return content, tags
+
+
+def _related_fused_inverted(
+    vectors: list[dict[str, float]], norms: list[float], tag_sets: list[set[str]],
+    top_k: int, *, only: list[int] | None = None, summaries: bool = False,
+) -> Iterator[tuple[int, list[tuple[int, float, bool, bool]], _RowSummary | None]]:
+    """Yield (i, fused_top_k, summary) per entry (or per index in ``only``),
+    scoring via inverted indexes.
+
+    Candidates come only from postings of shared terms and shared tags, so
+    pairs with no overlap are never scored. Only positive scores are kept,
+    then _fuse_rrf picks the top_k. The _RowSummary is only built when
+    ``summaries`` is set.
+    """
+    postings, tag_postings = _related_postings(vectors, tag_sets)
+    for i in range(len(vectors)) if only is None else only:
+        content, tags = _related_row_scores(
+            i, vectors, norms, tag_sets, postings, tag_postings,
+        )
+        if not summaries:
+            yield i, _fuse_rrf(content, tags, top_k), None
+            continue
+        fused = _fuse_rrf(content, tags, top_k + 1)
+        yield i, fused[:top_k], _row_summary(fused, content, tags, top_k)
+
+
+def _related_fused_vectorised(
+    vectors: list[dict[str, float]], norms: list[float], tag_sets: list[set[str]],
+    top_k: int, *, only: list[int] | None = None, summaries: bool = False,
+) -> Iterator[tuple[int, list[tuple[int, float, bool, bool]], _RowSummary | None]] | None:
+    """Same contract as _related_fused_inverted, vectorised with NumPy/SciPy.
+
+    Cosine and tag-intersection matrices come from sparse products computed
+    in row blocks (memory stays bounded at block x n), and the rank fusion
+    runs as array operations with the same ordering rules as _fuse_rrf.
+    Returns None when NumPy/SciPy are not installed.
+    """
+    try:
+        import numpy as np  # type: ignore[import-not-found]
+        from scipy import sparse  # type: ignore[import-not-found]
+    except ImportError:
+        return None
+
+    n = len(vectors)
+    vocab: dict[str, int] = {}
+    rows: list[int] = []
+    cols: list[int] = []
+    vals: list[float] = []
+    for j, vec in enumerate(vectors):
+        if norms[j] == 0.0:
+            continue
+        for term, w in vec.items():
+            rows.append(j)
+            cols.append(vocab.setdefault(term, len(vocab)))
+            vals.append(w / norms[j])
+    x = sparse.csr_matrix((vals, (rows, cols)), shape=(n, max(len(vocab), 1)))
+
+    tag_vocab: dict[str, int] = {}
+    t_rows: list[int] = []
+    t_cols: list[int] = []
+    for j, ts in enumerate(tag_sets):
+        for t in ts:
+            t_rows.append(j)
+            t_cols.append(tag_vocab.setdefault(t, len(tag_vocab)))
+    tm = sparse.csr_matrix(
+        (np.ones(len(t_rows)), (t_rows, t_cols)), shape=(n, max(len(tag_vocab), 1)),
+    )
+    tag_sizes = np.asarray(tm.sum(axis=1)).ravel()
+    xt, tmt = x.T.tocsr(), tm.T.tocsr()
+    order_rows = np.arange(n) if only is None else np.asarray(only, dtype=np.int64)
+
+    def _ranks(idx: Any, scores: Any) -> tuple[Any, Any]:
+        # Dense rank and score per index, -1 / 0.0 where absent;
+        # (score, index) descending.
+        ranks = np.full(n, -1, dtype=np.int64)
+        order = np.lexsort((-idx, -scores))
+        ranks[idx[order]] = np.arange(len(order))
+        dense = np.zeros(n)
+        dense[idx] = scores
+        return ranks, dense
+
+    def _summary(cand: Any, ranks: Any, dense: Any, members: Any) -> list[Any]:
+        picked = cand[members][ranks[cand[members]] >= 0]
+        if not len(picked):
+            return [[], -1]
+        picked = picked[np.argsort(ranks[picked])]
+        return [dense[picked].tolist(), int(ranks[picked[-1]])]
+
+    def _rows() -> Iterator[
+        tuple[int, list[tuple[int, float, bool, bool]], _RowSummary | None]
+    ]:
+        block = 256
+        for start in range(0, len(order_rows), block):
+            ids = order_rows[start:start + block]
+            sims = (x[ids] @ xt).tocsr()
+            inters = (tm[ids] @ tmt).tocsr()
+            for off, i in enumerate(ids.tolist()):
+                lo, hi = sims.indptr[off], sims.indptr[off + 1]
+                c_idx, c_val = sims.indices[lo:hi], sims.data[lo:hi]
+                keep = (c_val > 0) & (c_idx != i)
+                rc, dc = _ranks(c_idx[keep], c_val[keep])
+
+                lo, hi = inters.indptr[off], inters.indptr[off + 1]
+                t_idx, t_cnt = inters.indices[lo:hi], inters.data[lo:hi]
+                keep = (t_cnt > 0) & (t_idx != i)
+                t_idx, t_cnt = t_idx[keep], t_cnt[keep]
+                rt, dt = _ranks(t_idx, t_cnt / (tag_sizes[i] + tag_sizes[t_idx] - t_cnt))
+
+                cand = np.nonzero((rc >= 0) | (rt >= 0))[0]
+                if not len(cand):
+                    yield i, [], (([], -1, [], -1, None, None) if summaries else None)
+                    continue
+                crc, crt = rc[cand], rt[cand]
+                in_c, in_t = crc >= 0, crt >= 0
+                score = (np.where(in_c, 1.0 / (_RRF_K + crc + 1), 0.0)
+                         + np.where(in_t, 1.0 / (_RRF_K + crt + 1), 0.0))
+                group = np.where(in_c, 0, 1)
+                sub = np.where(in_c, crc, crt)
+                ranked = np.lexsort((sub, group, -score))
+                top = ranked[:top_k]
+                fused = [
+                    (int(cand[k]), float(score[k]), bool(in_c[k]), bool(in_t[k]))
+                    for k in top
+                ]
+                summary = None
+                if summaries:
+                    kth = fused[-1][1] if len(fused) == top_k else None
+                    nxt = float(score[ranked[top_k]]) if len(ranked) > top_k else None
+                    summary = tuple(
+                        _summary(cand, rc, dc, top) + _summary(cand, rt, dt, top)
+                        + [kth, nxt]
+                    )
+                yield i, fused, summary
+
+    return _rows()
+
+
+def _related_rows(
+    vectors: list[dict[str, float]], norms: list[float], tag_sets: list[set[str]],
+    top_k: int, *, only: list[int] | None = None, summaries: bool = False,
+) -> Iterator[tuple[int, list[tuple[int, float, bool, bool]], _RowSummary | None]]:
+    """Vectorised rows when NumPy/SciPy are importable, else inverted indexes."""
+    rows = _related_fused_vectorised(
+        vectors, norms, tag_sets, top_k, only=only, summaries=summaries,
+    )
+    if rows is None:
+        rows = _related_fused_inverted(
+            vectors, norms, tag_sets, top_k, only=only, summaries=summaries,
+        )
+    return rows
+
+
 def _compute_related(
     entries: list[dict[str, Any]], top_k: int = _RELATED_TOP_K,
 ) -> dict[str, list[dict[str, Any]]]:
@@ -1705,224 +4073,578 @@ def _compute_related(
 
     Returns a mapping from ``dir_path`` to a ranked list of related entries,
     each annotated with ``score``, ``why`` (``content``/``tags``/``both``)
-    and a small subset of source fields.
+    and a small subset of source fields. Uses SciPy sparse products when
+    NumPy/SciPy are importable, otherwise pure Python inverted indexes; both
+    only score pairs sharing a term or tag and give the same rankings.
     """
     n = len(entries)
     if n < 2:
         return {e["dir_path"]: [] for e in entries}
 
-    # 1. Build term frequencies and document frequencies.
-    tf_per_doc: list[Counter[str]] = []
-    df: Counter[str] = Counter()
-    for e in entries:
-        tokens = _tokenise(str(e.get("body", "")))
-        tf = Counter(tokens)
-        tf_per_doc.append(tf)
-        df.update(tf.keys())
-
-    # 2. TF-IDF vector per doc (sparse dict). IDF uses smoothed log form.
-    idf: dict[str, float] = {
-        term: math.log((n + 1) / (count + 1)) + 1.0
-        for term, count in df.items()
+    vectors, norms, _ = _tfidf_vectors(entries)
+    tag_sets = _entry_tag_sets(entries)
+    return {
+        entries[i]["dir_path"]: _related_records(i, fused, entries, tag_sets)
+        for i, fused, _ in _related_rows(vectors, norms, tag_sets, top_k)
     }
-    tfidf_per_doc: list[dict[str, float]] = []
-    norms: list[float] = []
-    for tf in tf_per_doc:
-        if not tf:
-            tfidf_per_doc.append({})
-            norms.append(0.0)
+
+
+def _related_sig(e: dict[str, Any]) -> str:
+    """Hash of the fields that feed related scoring and records."""
+    parts = [str(e.get("title", "")), str(e.get("source_type", "")),
+             "\x1f".join(str(t) for t in e.get("tags", [])), str(e.get("body", ""))]
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+
+def _probe_scores(
+    vec: dict[str, float], tag_set: set[str], vectors: list[dict[str, float]],
+    norms: list[float], tag_sets: list[set[str]], skip: int,
+) -> tuple[dict[int, float], dict[int, float]]:
+    """Score an arbitrary vector and tag set against every entry except
+    ``skip``, returning positive (cosine, tag Jaccard) maps. Direct pairwise
+    loop: cheaper than building postings for a handful of probes."""
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    content: dict[int, float] = {}
+    tags: dict[int, float] = {}
+    for j, other in enumerate(vectors):
+        if j == skip:
             continue
-        max_tf = max(tf.values())
-        vec = {
-            term: (0.5 + 0.5 * cnt / max_tf) * idf.get(term, 0.0)
-            for term, cnt in tf.items()
-        }
-        norm = math.sqrt(sum(v * v for v in vec.values()))
-        tfidf_per_doc.append(vec)
-        norms.append(norm)
+        if norm != 0.0 and norms[j] != 0.0:
+            small, large = (vec, other) if len(vec) <= len(other) else (other, vec)
+            dot = sum(w * large[t] for t, w in small.items() if t in large)
+            if dot > 0:
+                content[j] = dot / (norm * norms[j])
+        common = len(tag_set & tag_sets[j])
+        if common:
+            tags[j] = common / (len(tag_set) + len(tag_sets[j]) - common)
+    return content, tags
+
+
+def _idf_drift(df: Counter[str], n: int, base_df: dict[str, int], base_n: int) -> float:
+    """Weighted relative IDF change between the current corpus and the one
+    the stored scores were computed against (0.0 = identical)."""
+    if base_n <= 0:
+        return math.inf
+    moved = total = 0.0
+    for term, count in df.items():
+        idf = math.log((n + 1) / (count + 1)) + 1.0
+        base_idf = math.log((base_n + 1) / (base_df.get(term, 0) + 1)) + 1.0
+        moved += count * abs(idf - base_idf)
+        total += count * idf
+    return moved / total if total else 0.0
+
+
+def _row_impact(
+    summary: _RowSummary, old: tuple[float, float], new: tuple[float, float],
+) -> tuple[bool, float]:
+    """Judge from a row's _RowSummary what a non-member candidate moving from
+    ``old`` to ``new`` (content, tags) scores does to its fused top_k.
+
+    Returns (changed, lift). ``changed`` is set when the move can reorder
+    members (it crosses a member's score in either signal), or the candidate
+    can enter the top_k: its new rank in a signal is at least the number of
+    members above it there (one past the lowest member's rank when below
+    them all), which bounds its fused score. Otherwise the only effect is
+    that non-members it dropped below move up one rank; ``lift`` bounds the
+    fused gain of any one of them, to be summed over all changes and checked
+    against the gap between the (k+1)-th and k-th fused scores.
+    0.0 stands for "not a candidate" on either side.
+    """
+    member_scores = (summary[0], summary[2])
+    depths = (summary[1], summary[3])
+    kth = summary[4]
+    reach = lift = 0.0
+    moved = False
+    for members, depth, so, sn in zip(member_scores, depths, old, new):
+        lo, hi = min(so, sn), max(so, sn)
+        if so != sn:
+            moved = True
+            if any(lo <= sc <= hi for sc in members):
+                return True, 0.0
+        above = sum(1 for sc in members if sc > hi)
+        floor_rank = depth + 1 if above == len(members) else above
+        if sn > 0.0:
+            reach += 1.0 / (_RRF_K + floor_rank + 1)
+        if sn < so:
+            lift += 1.0 / (_RRF_K + floor_rank + 1) - 1.0 / (_RRF_K + floor_rank + 2)
+    if not moved:
+        return False, 0.0
+    if kth is None:
+        # Fewer than top_k candidates: every candidate is a member.
+        return True, 0.0
+    return reach >= kth, lift
+
+
+def _load_related_state(base_dir: Path) -> dict[str, Any]:
+    """Read the incremental related state, returning {} if absent or stale."""
+    try:
+        data = json.loads(
+            (base_dir / _RELATED_STATE_NAME).read_text(encoding="utf-8")
+        )
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _RELATED_STATE_VERSION:
+        return {}
+    return data
 
-    # 3. Tag sets per doc.
-    tag_sets: list[set[str]] = [
-        {t.lower() for t in e.get("tags", []) if isinstance(t, str)}
-        for e in entries
-    ]
 
-    def _cosine(i: int, j: int) -> float:
-        if norms[i] == 0.0 or norms[j] == 0.0:
-            return 0.0
-        a, b = tfidf_per_doc[i], tfidf_per_doc[j]
-        # Iterate over the smaller vector for fewer lookups.
-        if len(a) > len(b):
-            a, b = b, a
-        return sum(v * b.get(k, 0.0) for k, v in a.items()) / (norms[i] * norms[j])
-
-    def _jaccard(i: int, j: int) -> float:
-        a, b = tag_sets[i], tag_sets[j]
-        if not a or not b:
-            return 0.0
-        inter = len(a & b)
-        if inter == 0:
-            return 0.0
-        return inter / len(a | b)
+def _save_related_state(base_dir: Path, state: dict[str, Any]) -> None:
+    """Atomically write the incremental related state (temp file + rename)."""
+    path = base_dir / _RELATED_STATE_NAME
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(
+            json.dumps(state, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+    except OSError as exc:
+        tmp.unlink(missing_ok=True)
+        print(f"Warning: Could not write related state: {exc}", file=sys.stderr)
 
-    related: dict[str, list[dict[str, Any]]] = {}
 
-    for i in range(n):
-        content_scores: list[tuple[float, int]] = []
-        tag_scores: list[tuple[float, int]] = []
-        for j in range(n):
-            if i == j:
+def _update_related(
+    base_dir: Path, entries: list[dict[str, Any]], *, full: bool = False,
+    top_k: int = _RELATED_TOP_K,
+) -> dict[str, list[dict[str, Any]]]:
+    """Compute related entries, rescoring only rows a change can affect.
+
+    The state (``wisdom-related-state.json``) keeps, per entry, a content
+    signature, its term weights and tags, its fused related records and a
+    _RowSummary, plus the document frequencies of the last full recompute.
+    Each changed entry is rescored against the corpus with its new vector
+    and, for updated or removed entries, with its stored old one; since both
+    similarities are symmetric, that gives its old and new score in every
+    other row, and _row_impact picks the rows to rescore. Other rows
+    keep their stored records.
+
+    Unchanged rows keep scores computed under the IDF of the last full
+    recompute: results are exact while edits leave document frequencies as
+    they were then, and otherwise approximate within _RELATED_IDF_DRIFT. A full
+    recompute (identical to _compute_related) runs when there is no usable
+    state, the drift exceeds that bound, more than _RELATED_MAX_CHANGED of
+    the corpus changed, or ``full`` is set.
+    """
+    n = len(entries)
+    if n < 2:
+        return {e["dir_path"]: [] for e in entries}
+
+    state = {} if full else _load_related_state(base_dir)
+    old_docs: dict[str, Any] = state.get("docs", {})
+    paths = [e["dir_path"] for e in entries]
+    index = {p: i for i, p in enumerate(paths)}
+    sigs = [_related_sig(e) for e in entries]
+    changed = [i for i, p in enumerate(paths) if old_docs.get(p, {}).get("sig") != sigs[i]]
+    # Unchanged bodies reuse their stored term weights instead of re-tokenising.
+    weights = [
+        old_docs[p]["weights"] if p in old_docs and old_docs[p]["sig"] == sigs[i]
+        else _term_weights(str(entries[i].get("body", "")))
+        for i, p in enumerate(paths)
+    ]
+    vectors, norms, df = _tfidf_vectors(entries, weights)
+    tag_sets = _entry_tag_sets(entries)
+    stale = {p for p in old_docs if p not in index} | {paths[i] for i in changed}
+    incremental = (
+        bool(old_docs)
+        and state.get("top_k") == top_k
+        and len(stale) <= _RELATED_MAX_CHANGED * n
+        and _idf_drift(df, n, state.get("df", {}), state.get("n", 0))
+        <= _RELATED_IDF_DRIFT
+    )
+    if incremental and not stale:
+        return {p: old_docs[p]["related"] for p in paths}
+
+    related: dict[str, list[dict[str, Any]]] = {}
+    summaries: dict[str, _RowSummary] = {}
+    if not incremental:
+        rescore = list(range(n))
+        base_df: dict[str, int] = dict(df)
+        base_n = n
+    else:
+        base_df, base_n = state["df"], state["n"]
+        rescore_set = set(changed)
+        for p, doc in old_docs.items():
+            i = index.get(p)
+            if i is None or i in rescore_set:
                 continue
-            cs = _cosine(i, j)
-            if cs > 0:
-                content_scores.append((cs, j))
-            ts = _jaccard(i, j)
-            if ts > 0:
-                tag_scores.append((ts, j))
-
-        content_scores.sort(reverse=True)
-        tag_scores.sort(reverse=True)
-
-        # Reciprocal Rank Fusion across the two signals.
-        rrf: dict[int, float] = {}
-        seen_in_content: set[int] = set()
-        seen_in_tags: set[int] = set()
-        for rank, (_, j) in enumerate(content_scores):
-            rrf[j] = rrf.get(j, 0.0) + 1.0 / (_RRF_K + rank + 1)
-            seen_in_content.add(j)
-        for rank, (_, j) in enumerate(tag_scores):
-            rrf[j] = rrf.get(j, 0.0) + 1.0 / (_RRF_K + rank + 1)
-            seen_in_tags.add(j)
-
-        if not rrf:
-            related[entries[i]["dir_path"]] = []
-            continue
+            related[p] = doc["related"]
+            summaries[p] = tuple(doc["summary"])
+            if any(r["dir_path"] in stale for r in doc["related"]):
+                rescore_set.add(i)
+
+        def _idf(term: str) -> float:
+            return math.log((n + 1) / (df.get(term, 0) + 1)) + 1.0
+
+        # Old and new (content, tags) scores of every changed entry against
+        # each other row, by row index then changed dir_path.
+        moves: dict[int, dict[str, list[float]]] = {}
+        for p in stale:
+            i = index.get(p, -1)
+            sides = []
+            if p in old_docs:
+                old_vec = {t: w * _idf(t) for t, w in old_docs[p]["weights"].items()}
+                sides.append((0, old_vec, set(old_docs[p]["tags"])))
+            if i >= 0:
+                sides.append((2, vectors[i], tag_sets[i]))
+            for slot, vec, tags in sides:
+                content, tag_scores = _probe_scores(vec, tags, vectors, norms, tag_sets, i)
+                for j, sc in content.items():
+                    moves.setdefault(j, {}).setdefault(p, [0.0] * 4)[slot] = sc
+                for j, sc in tag_scores.items():
+                    moves.setdefault(j, {}).setdefault(p, [0.0] * 4)[slot + 1] = sc
+        for j, by_path in moves.items():
+            if j in rescore_set:
+                continue
+            summary = summaries[paths[j]]
+            lift = 0.0
+            for oc, ot, nc, nt in by_path.values():
+                changed_row, gain = _row_impact(summary, (oc, ot), (nc, nt))
+                if changed_row:
+                    rescore_set.add(j)
+                    break
+                lift += gain
+            else:
+                kth, nxt = summary[4], summary[5]
+                if lift and nxt is not None and kth is not None and nxt + lift >= kth:
+                    rescore_set.add(j)
+        rescore = sorted(rescore_set)
+
+    for i, fused, summary in _related_rows(
+        vectors, norms, tag_sets, top_k, only=rescore, summaries=True,
+    ):
+        related[paths[i]] = _related_records(i, fused, entries, tag_sets)
+        summaries[paths[i]] = summary
+
+    _save_related_state(base_dir, {
+        "version": _RELATED_STATE_VERSION,
+        "top_k": top_k,
+        "n": base_n,
+        "df": base_df,
+        "docs": {
+            p: {
+                "sig": sigs[i],
+                "weights": weights[i],
+                "tags": sorted(tag_sets[i]),
+                "summary": summaries[p],
+                "related": related[p],
+            }
+            for i, p in enumerate(paths)
+        },
+    })
+    return {p: related[p] for p in paths}
+
+
+def _tags_similar(a: str, b: str) -> bool:
+    """Whether two distinct tags look like duplicates (see _detect_tag_sprawl)."""
+    if min(len(a), len(b)) >= 4:
+        ratio = difflib.SequenceMatcher(a=a, b=b, autojunk=False).ratio()
+        return ratio >= _TAG_SPRAWL_RATIO
+    # Short tags: only flag when the shorter tag matches a
+    # hyphen-separated component of the longer tag, or is a
+    # prefix of its first component (catches `rl`/`rlhf`,
+    # `ai`/`ai-safety` while avoiding coincidental letter
+    # overlaps like `ai`/`guardrails`).
+    short, long = (a, b) if len(a) <= len(b) else (b, a)
+    if short == long:
+        return False
+    parts = long.split("-")
+    return short in parts or parts[0].startswith(short)
+
+
+def _sprawl_min_matches(total: int) -> int:
+    """Smallest matched-character count M with 2M / total >= _TAG_SPRAWL_RATIO,
+    evaluated exactly as difflib computes ratio()."""
+    m = math.ceil(_TAG_SPRAWL_RATIO * total / 2)
+    while m > 0 and 2.0 * (m - 1) / total >= _TAG_SPRAWL_RATIO:
+        m -= 1
+    while 2.0 * m / total < _TAG_SPRAWL_RATIO:
+        m += 1
+    return m
+
+
+def _sprawl_min_overlap(total: int) -> int:
+    """Lower bound on the token overlap of two tags whose lengths sum to
+    ``total`` and whose ratio() reaches _TAG_SPRAWL_RATIO.
+
+    M matched characters lie in B merged blocks, so the tags share at least
+    M characters and M - B bigrams. Consecutive blocks are separated by an
+    unmatched character in at least one tag, so B <= total - 2M + 1.
+    """
+    m = _sprawl_min_matches(total)
+    return m + max(0, 3 * m - total - 1)
+
+
+def _tag_sprawl_candidates(tags: list[str]) -> set[tuple[int, int]]:
+    """Index pairs (i < j) that _tags_similar could accept; a superset of
+    the true pairs, found without visiting every pair.
 
-        ranked = sorted(rrf.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
-        out: list[dict[str, Any]] = []
-        for j, score in ranked:
-            in_content = j in seen_in_content
-            in_tags = j in seen_in_tags
-            why = "both" if in_content and in_tags else "tags" if in_tags else "content"
-            shared = sorted(tag_sets[i] & tag_sets[j]) if in_tags else []
-            other = entries[j]
-            out.append({
-                "dir_path": other["dir_path"],
-                "title": other["title"],
-                "source_type": other.get("source_type", ""),
-                "score": round(score, 5),
-                "why": why,
-                "shared_tags": shared,
-            })
-        related[entries[i]["dir_path"]] = out
-
-    return related
+    Short tags (< 4 chars) are looked up in indexes of hyphen components and
+    of first-component prefixes, mirroring the containment rule exactly.
+
+    Longer tags become multisets of character and bigram tokens, where any
+    pair reaching the ratio threshold shares at least _sprawl_min_overlap
+    tokens and, since ratio() <= 2 * min(la, lb) / (la + lb), has lengths
+    within a fixed factor. Ordering tokens rarest first, two tags with
+    overlap >= t share a token within their first len - t + 1 tokens
+    (prefix filtering), so only tags meeting in those prefix postings are
+    considered, and of those only pairs whose full overlap passes the bound
+    become candidates.
+    """
+    pairs: set[tuple[int, int]] = set()
+
+    components: dict[str, list[int]] = {}
+    first_prefixes: dict[str, list[int]] = {}
+    for i, t in enumerate(tags):
+        parts = t.split("-")
+        for part in set(parts):
+            components.setdefault(part, []).append(i)
+        for k in range(min(len(parts[0]), 3) + 1):
+            first_prefixes.setdefault(parts[0][:k], []).append(i)
+    for i, short in enumerate(tags):
+        if len(short) >= 4:
+            continue
+        for j in components.get(short, []) + first_prefixes.get(short, []):
+            if len(tags[j]) > len(short):
+                pairs.add((min(i, j), max(i, j)))
+
+    r = _TAG_SPRAWL_RATIO
+    long_ids = sorted((i for i, t in enumerate(tags) if len(t) >= 4), key=lambda i: len(tags[i]))
+    if not long_ids:
+        return pairs
+    max_len = len(tags[long_ids[-1]])
+
+    def _partner_lengths(length: int) -> range:
+        lo = length
+        while lo > 4 and 2.0 * (lo - 1) / (length + lo - 1) >= r:
+            lo -= 1
+        hi = length
+        while hi < max_len and 2.0 * length / (length + hi + 1) >= r:
+            hi += 1
+        return range(lo, hi + 1)
+
+    # Per length: the smallest partner length, the overlap required of a
+    # longer tag probing shorter ones, and of a shorter tag indexed for
+    # longer ones.
+    bounds: dict[int, tuple[int, int, int]] = {}
+    for length in {len(tags[i]) for i in long_ids}:
+        partners = _partner_lengths(length)
+        probe = min(_sprawl_min_overlap(length + p) for p in partners if p <= length)
+        index = min(_sprawl_min_overlap(length + p) for p in partners if p >= length)
+        bounds[length] = (partners.start, probe, index)
+
+    min_overlap = [0] + [_sprawl_min_overlap(total) for total in range(1, 2 * max_len + 1)]
+    tokens: dict[int, list[tuple[str, int]]] = {}
+    token_df: Counter[tuple[str, int]] = Counter()
+    for i in long_ids:
+        tag = tags[i]
+        seen: Counter[str] = Counter()
+        toks = []
+        for gram in list(tag) + [tag[k:k + 2] for k in range(len(tag) - 1)]:
+            seen[gram] += 1
+            toks.append((gram, seen[gram]))
+        tokens[i] = toks
+        token_df.update(toks)
+    token_sets = {i: frozenset(toks) for i, toks in tokens.items()}
+
+    # Postings hold parallel (lengths, ids) lists; tags are indexed shortest
+    # first, so each lengths list is sorted and bisect skips partners too
+    # short to pass the length bound.
+    postings: dict[tuple[str, int], tuple[list[int], list[int]]] = {}
+    for i in long_ids:
+        la = len(tags[i])
+        lo, probe_need, index_need = bounds[la]
+        toks = sorted(tokens[i], key=lambda tok: (token_df[tok], tok))
+        found: set[int] = set()
+        for tok in toks[:len(toks) - probe_need + 1]:
+            posting = postings.get(tok)
+            if posting is not None:
+                found.update(posting[1][bisect.bisect_left(posting[0], lo):])
+        for j in found:
+            if len(token_sets[i] & token_sets[j]) >= min_overlap[la + len(tags[j])]:
+                pairs.add((min(i, j), max(i, j)))
+        for tok in toks[:len(toks) - index_need + 1]:
+            lengths, ids = postings.setdefault(tok, ([], []))
+            lengths.append(la)
+            ids.append(i)
+    return pairs
 
 
 def _detect_tag_sprawl(tag_freq: dict[str, int]) -> list[tuple[str, int, str, int]]:
     """Find pairs of tags that are likely duplicates.
 
-    Compares every pair using difflib's SequenceMatcher.ratio for tags
-    >=4 chars; for shorter tags, applies a containment check (one tag
-    fully contained within the other). Returns tuples of
-    (tag, count, near_tag, near_count) sorted so the higher-frequency
-    tag in each pair appears first.
+    Uses difflib's SequenceMatcher.ratio for tags >=4 chars; for shorter
+    tags, applies a containment check (one tag fully contained within the
+    other). Only pairs from _tag_sprawl_candidates are scored, in the same
+    order an all-pairs scan would visit them, so results are identical.
+    Returns tuples of (tag, count, near_tag, near_count) sorted so the
+    higher-frequency tag in each pair appears first.
     """
     tags = list(tag_freq.keys())
-    seen: set[tuple[str, str]] = set()
     pairs: list[tuple[str, int, str, int]] = []
-    for i, a in enumerate(tags):
-        for b in tags[i + 1:]:
-            if a == b:
-                continue
-            similar = False
-            if min(len(a), len(b)) >= 4:
-                ratio = difflib.SequenceMatcher(a=a, b=b, autojunk=False).ratio()
-                if ratio >= _TAG_SPRAWL_RATIO:
-                    similar = True
-            else:
-                # Short tags: only flag when the shorter tag matches a
-                # hyphen-separated component of the longer tag, or is a
-                # prefix of its first component (catches `rl`/`rlhf`,
-                # `ai`/`ai-safety` while avoiding coincidental letter
-                # overlaps like `ai`/`guardrails`).
-                short, long = (a, b) if len(a) <= len(b) else (b, a)
-                if short != long:
-                    parts = long.split("-")
-                    if short in parts or parts[0].startswith(short):
-                        similar = True
-            if not similar:
-                continue
-            sa, sb = sorted((a, b))
-            key: tuple[str, str] = (sa, sb)
-            if key in seen:
-                continue
-            seen.add(key)
-            ca, cb = tag_freq[a], tag_freq[b]
-            if ca >= cb:
-                pairs.append((a, ca, b, cb))
-            else:
-                pairs.append((b, cb, a, ca))
+    for i, j in sorted(_tag_sprawl_candidates(tags)):
+        a, b = tags[i], tags[j]
+        if not _tags_similar(a, b):
+            continue
+        ca, cb = tag_freq[a], tag_freq[b]
+        if ca >= cb:
+            pairs.append((a, ca, b, cb))
+        else:
+            pairs.append((b, cb, a, ca))
     pairs.sort(key=lambda p: (-p[1], -p[3]))
     return pairs
 
 
+def _fts_row(e: dict[str, Any]) -> tuple[str, ...]:
+    """Flatten an entry into the column order of the ``wisdom`` FTS5 table."""
+    return (
+        str(e.get("dir_path", "")),
+        str(e.get("title", "")),
+        str(e.get("author", "")),
+        str(e.get("description", "")),
+        " ".join(str(t) for t in e.get("tags", [])),
+        str(e.get("body", "")),
+        str(e.get("source_type", "")),
+        str(e.get("date", "")),
+        str(e.get("pdf_path", "")),
+        str(e.get("md_path", "")),
+    )
+
+
+def _create_search_schema(conn: sqlite3.Connection) -> None:
+    """Create the FTS5 table and its dir_path -> rowid key table."""
+    conn.execute("""
+        CREATE VIRTUAL TABLE wisdom USING fts5(
+            dir_path UNINDEXED,
+            title,
+            author,
+            description,
+            tags,
+            body,
+            source_type UNINDEXED,
+            date UNINDEXED,
+            pdf_path UNINDEXED,
+            md_path UNINDEXED,
+            tokenize='porter unicode61'
+        )
+    """)
+    # FTS5 has no unique constraints, and dir_path is UNINDEXED, so upserts
+    # go through this table: one row per entry holding the FTS rowid and a
+    # hash of the indexed row, which is how unchanged entries are skipped.
+    conn.execute("""
+        CREATE TABLE wisdom_keys (
+            dir_path TEXT PRIMARY KEY,
+            doc_id INTEGER NOT NULL,
+            row_sha TEXT NOT NULL
+        )
+    """)
+    # Related entries per dir_path as a compact JSON list, so `related`
+    # reads one row instead of decoding the whole corpus map.
+    conn.execute("""
+        CREATE TABLE wisdom_related (
+            dir_path TEXT PRIMARY KEY,
+            related TEXT NOT NULL
+        ) WITHOUT ROWID
+    """)
+    # One row per (entry, tag) so search facets can group tags in SQL.
+    conn.execute("""
+        CREATE TABLE wisdom_tags (
+            dir_path TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (dir_path, tag)
+        ) WITHOUT ROWID
+    """)
+
+
 def _build_fts_index(
-    base_dir: Path, entries: list[dict[str, Any]],
+    base_dir: Path, entries: list[dict[str, Any]], *, full: bool = False,
 ) -> Path | None:
-    """Build a FTS5 SQLite index alongside index.html.
-
-    Drops and rebuilds on every call - corpus is small enough that
-    incremental updates are not worth the bookkeeping. Returns the path
-    to the database, or None on failure.
+    """Build or update the FTS5 SQLite index alongside index.html.
+
+    The database persists between runs. Each entry's indexed row is hashed
+    and compared with the stored hash, so only inserted, updated and deleted
+    entries touch the FTS5 table; each entry's ``related`` list is upserted
+    into wisdom_related the same way. All changes are applied in one IMMEDIATE
+    transaction, which is the atomic swap: under WAL, concurrent ``search``
+    readers keep seeing the previous snapshot until the commit. A schema
+    version mismatch (or full=True) drops and recreates the tables inside the
+    same transaction. Returns the path to the database, or None on failure.
     """
     db_path = base_dir / _SEARCH_DB_NAME
     try:
-        # Touch a fresh file - simpler than DROP TABLE for FTS5 because
-        # the contentless config and tokenizer settings can drift.
-        if db_path.exists():
-            db_path.unlink()
-        conn = sqlite3.connect(db_path)
+        conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
         try:
             conn.execute("PRAGMA journal_mode = WAL")
-            conn.execute("""
-                CREATE VIRTUAL TABLE wisdom USING fts5(
-                    dir_path UNINDEXED,
-                    title,
-                    author,
-                    description,
-                    tags,
-                    body,
-                    source_type UNINDEXED,
-                    date UNINDEXED,
-                    pdf_path UNINDEXED,
-                    md_path UNINDEXED,
-                    tokenize='porter unicode61'
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if full or version != _SEARCH_DB_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS wisdom")
+                    conn.execute("DROP TABLE IF EXISTS wisdom_keys")
+                    conn.execute("DROP TABLE IF EXISTS wisdom_tags")
+                    conn.execute("DROP TABLE IF EXISTS wisdom_related")
+                    _create_search_schema(conn)
+                    conn.execute(f"PRAGMA user_version = {_SEARCH_DB_VERSION}")
+
+                stored = {
+                    dir_path: (doc_id, row_sha)
+                    for dir_path, doc_id, row_sha in conn.execute(
+                        "SELECT dir_path, doc_id, row_sha FROM wisdom_keys"
+                    )
+                }
+                current: dict[str, tuple[str, ...]] = {}
+                for e in entries:
+                    row = _fts_row(e)
+                    current[row[0]] = row
+
+                stale = [d for d in stored if d not in current]
+                upserts: list[tuple[str, tuple[str, ...], str]] = []
+                for dir_path, row in current.items():
+                    row_sha = hashlib.sha256(
+                        json.dumps(row, ensure_ascii=False).encode()
+                    ).hexdigest()
+                    if stored.get(dir_path, (None, None))[1] != row_sha:
+                        upserts.append((dir_path, row, row_sha))
+
+                for dir_path in stale + [u[0] for u in upserts if u[0] in stored]:
+                    conn.execute("DELETE FROM wisdom WHERE rowid = ?", (stored[dir_path][0],))
+                    conn.execute("DELETE FROM wisdom_keys WHERE dir_path = ?", (dir_path,))
+                    conn.execute("DELETE FROM wisdom_tags WHERE dir_path = ?", (dir_path,))
+                for dir_path, row, row_sha in upserts:
+                    cur = conn.execute(
+                        "INSERT INTO wisdom("
+                        "dir_path, title, author, description, tags, body, "
+                        "source_type, date, pdf_path, md_path) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        row,
+                    )
+                    conn.execute(
+                        "INSERT INTO wisdom_keys(dir_path, doc_id, row_sha) VALUES (?, ?, ?)",
+                        (dir_path, cur.lastrowid, row_sha),
+                    )
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO wisdom_tags(dir_path, tag) VALUES (?, ?)",
+                        [(dir_path, tag) for tag in row[4].split()],
+                    )
+
+                stored_related = dict(conn.execute("SELECT dir_path, related FROM wisdom_related"))
+                conn.executemany(
+                    "DELETE FROM wisdom_related WHERE dir_path = ?",
+                    [(d,) for d in stored_related if d not in current],
                 )
-            """)
-            rows = [
-                (
-                    str(e.get("dir_path", "")),
-                    str(e.get("title", "")),
-                    str(e.get("author", "")),
-                    str(e.get("description", "")),
-                    " ".join(str(t) for t in e.get("tags", [])),
-                    str(e.get("body", "")),
-                    str(e.get("source_type", "")),
-                    str(e.get("date", "")),
-                    str(e.get("pdf_path", "")),
-                    str(e.get("md_path", "")),
+                related_rows = []
+                for e in entries:
+                    text = json.dumps(e.get("related", []), ensure_ascii=False, separators=(",", ":"))
+                    if stored_related.get(e["dir_path"]) != text:
+                        related_rows.append((e["dir_path"], text))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO wisdom_related(dir_path, related) VALUES (?, ?)",
+                    related_rows,
                 )
-                for e in entries
-            ]
-            conn.executemany(
-                "INSERT INTO wisdom("
-                "dir_path, title, author, description, tags, body, "
-                "source_type, date, pdf_path, md_path) "
-                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                rows,
-            )
-            conn.commit()
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
         finally:
             conn.close()
         return db_path
@@ -1935,84 +4657,388 @@ def _build_fts_index(
 # Index generation
 # ---------------------------------------------------------------------------
 
-def _collect_entries(base_dir: Path, *, reverse: bool = True) -> list[dict[str, Any]]:
+# Persistent corpus manifest written alongside index.html. Records each
+# analysis file's stat signature and content hash together with its parsed
+# entry record, so index runs only re-parse files that actually changed.
+_MANIFEST_NAME = "wisdom-manifest.json"
+
+# Bump when the shape of the cached entry record changes; a mismatch discards
+# the manifest and forces a full re-parse.
+_MANIFEST_VERSION = 2
+
+# Corpus scans parse changed files in a process pool once at least this many
+# need parsing (below it, pool start-up costs more than it saves).
+_SCAN_PARALLEL_MIN = 64
+
+
+def _entry_from_text(md_file: Path, text: str) -> tuple[dict[str, Any], str, list[str]] | None:
+    """Build the metadata record for one analysis file from its raw text.
+
+    Returns (record, thumbnail_pref, raw frontmatter tags), or None when the
+    file has no frontmatter. ``pdf_path`` and ``thumbnail`` depend on sibling
+    files rather than the markdown itself, so they are left for
+    _apply_entry_files.
+    """
+    fm = _parse_frontmatter_text(text)
+    if not fm:
+        return None
+
+    dir_name = md_file.parent.name
+
+    # Compute word count and reading time from the analysis body.
+    body = _strip_frontmatter(text)
+    word_count = len(body.split())
+    reading_time = max(1, round(word_count / 200))
+
+    # Normalise short dates (YYYY-MM) to YYYY-MM-DD so string
+    # comparison sorts them correctly in the JS frontend.
+    raw_date = _fm_str(fm, "date")
+    if re.fullmatch(r"\d{4}-\d{2}", raw_date):
+        raw_date += "-01"
+    raw_content_date = _fm_str(fm, "content_date")
+    if re.fullmatch(r"\d{4}-\d{2}", raw_content_date):
+        raw_content_date += "-01"
+
+    title = _fm_str(fm, "title", dir_name)
+
+    # Normalise tags: lowercase, hyphenated, strip empties, dedupe.
+    tags = [
+        re.sub(r"\s+", "-", t.strip().lower()).strip("-")
+        for t in _fm_list(fm, "tags")
+    ]
+    tags = [t for t in dict.fromkeys(tags) if t]
+
+    record = {
+        "title": title,
+        "sources": _fm_sources(fm),
+        "source_type": _fm_str(fm, "source_type"),
+        "author": _fm_str(fm, "author"),
+        "date": raw_date,
+        "content_date": raw_content_date,
+        "description": _fm_str(fm, "description"),
+        "youtube_channel": _fm_str(fm, "youtube_channel"),
+        "og_site_name": _fm_str(fm, "og_site_name"),
+        "word_count": word_count,
+        "reading_time": reading_time,
+        "dir_path": dir_name,
+        "pdf_path": "",
+        "md_path": f"{dir_name}/{md_file.name}",
+        "tags": tags,
+        "thumbnail": "",
+        "body": body,
+    }
+    return record, _fm_str(fm, "thumbnail"), _fm_list(fm, "tags")
+
+
+# Record fields resolved from files beside the analysis rather than its text.
+_ENTRY_FILE_FIELDS = {"pdf_path": "", "thumbnail": "", "thumbnail_webp": [], "thumbnail_lqip": ""}
+
+
+def _apply_entry_files(
+    md_file: Path, record: dict[str, Any], thumbnail_pref: str,
+    thumbs: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Return ``record`` with the sibling-file fields (PDF, thumbnail) resolved.
+
+    A thumbnail.jpg whose card renditions are current in ``thumbs`` (see
+    _thumbnail_stage) is served as those renditions instead.
+    """
+    dir_name = md_file.parent.name
+    pdf_file = md_file.with_suffix(".pdf")
+    out = {**record, **_ENTRY_FILE_FIELDS}
+    out["pdf_path"] = f"{dir_name}/{pdf_file.name}" if pdf_file.is_file() else ""
+    if thumbnail_pref.startswith("placeholder"):
+        out["thumbnail"] = _placeholder_thumbnail_svg(record["title"])
+    elif not thumbnail_pref.startswith("false"):
+        try:
+            st = (md_file.parent / "thumbnail.jpg").stat()
+        except OSError:
+            return out
+        rec = (thumbs or {}).get(dir_name)
+        if rec and rec.get("mtime_ns") == st.st_mtime_ns and rec.get("size") == st.st_size:
+            small, large, fallback = _thumb_names(rec["hash"])
+            out["thumbnail"] = f"{_THUMBS_DIR}/{fallback}"
+            out["thumbnail_webp"] = [f"{_THUMBS_DIR}/{small}", f"{_THUMBS_DIR}/{large}"]
+            out["thumbnail_lqip"] = rec.get("lqip", "")
+        else:
+            out["thumbnail"] = f"{dir_name}/thumbnail.jpg"
+    return out
+
+
+def _load_manifest(base_dir: Path) -> dict[str, Any]:
+    """Read the corpus manifest, returning an empty one if absent or stale."""
+    empty: dict[str, Any] = {"version": _MANIFEST_VERSION, "build": "", "files": {}}
+    try:
+        data = json.loads((base_dir / _MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return empty
+    if not isinstance(data, dict) or data.get("version") != _MANIFEST_VERSION:
+        return empty
+    if not isinstance(data.get("files"), dict):
+        return empty
+    return data
+
+
+def _save_manifest(base_dir: Path, manifest: dict[str, Any]) -> None:
+    """Atomically write the corpus manifest (temp file + rename)."""
+    path = base_dir / _MANIFEST_NAME
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(
+            json.dumps(manifest, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        os.replace(tmp, path)
+    except OSError as exc:
+        tmp.unlink(missing_ok=True)
+        print(f"Warning: Could not write corpus manifest: {exc}", file=sys.stderr)
+
+
+def _scan_file(path: str, known_sha: str) -> tuple[str, dict[str, Any] | None]:
+    """Read one analysis file once, hash it and (unless the hash matches
+    ``known_sha``) parse it. Returns (sha256, manifest item fields or None).
+    Top-level so process-pool workers can run it."""
+    md_file = Path(path)
+    raw = md_file.read_bytes()
+    sha = hashlib.sha256(raw).hexdigest()
+    if sha == known_sha:
+        return sha, None
+    parsed = _entry_from_text(md_file, raw.decode("utf-8"))
+    return sha, {
+        "sha256": sha,
+        "thumbnail_pref": parsed[1] if parsed else "",
+        "fm_tags": parsed[2] if parsed else [],
+        "record": parsed[0] if parsed else None,
+    }
+
+
+def _scan_workers(requested: int | None, pending: int) -> int:
+    """Worker count for parsing ``pending`` files: ``requested`` when given,
+    else sequential for small batches and cpu_count - 2 otherwise."""
+    if requested is None:
+        requested = 1 if pending < _SCAN_PARALLEL_MIN else (os.cpu_count() or 1) - 2
+    return max(1, min(requested, pending))
+
+
+def _scan_files(
+    md_files: list[Path], known_shas: list[str], workers: int | None,
+) -> Iterator[tuple[str, dict[str, Any] | None]]:
+    """Yield _scan_file results for ``md_files`` in input order, using a
+    process pool when _scan_workers allows one."""
+    n_workers = _scan_workers(workers, len(md_files))
+    done = 0
+    if n_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                # map() yields in submission order as results arrive; chunks
+                # amortise pickling over several files per round trip.
+                for result in pool.map(
+                    _scan_file, [str(f) for f in md_files], known_shas,
+                    chunksize=max(1, len(md_files) // (n_workers * 4)),
+                ):
+                    yield result
+                    done += 1
+            return
+        except BrokenProcessPool as exc:
+            # Worker processes unavailable or killed; finish in-process.
+            print(f"Warning: parallel corpus scan failed ({exc}); "
+                  "continuing sequentially", file=sys.stderr)
+    for md_file, sha in zip(md_files[done:], known_shas[done:]):
+        yield _scan_file(str(md_file), sha)
+
+
+def _scan_corpus(
+    base_dir: Path, manifest: dict[str, Any], *, reverse: bool = True,
+    workers: int | None = None,
+) -> tuple[list[dict[str, Any]], dict[str, Any], dict[str, list[str]]]:
+    """Walk the corpus, re-parsing only files whose signature has changed.
+
+    A file whose (mtime_ns, size) matches its manifest item reuses the cached
+    record without being read. Otherwise it is read once and hashed; a
+    matching SHA-256 (e.g. a bare ``touch``) still reuses the record, and only
+    real content changes are parsed. Reads and parses run in a process pool
+    per _scan_workers (``workers`` overrides; 1 forces sequential). Returns
+    (entries, new_manifest, delta) where delta maps
+    ``added``/``updated``/``removed`` to sorted dir_path lists, computed by
+    comparing the final records against the previous manifest. Pure: neither
+    the manifest nor any output is written.
+    """
+    old_files: dict[str, Any] = manifest.get("files", {})
+    new_files: dict[str, Any] = {}
+    entries: list[dict[str, Any]] = []
+
+    scanned: list[tuple[Path, str, dict[str, Any] | None]] = []
+    pending: list[int] = []
+    for md_file in sorted(base_dir.glob("*/*analysis.md"), reverse=reverse):
+        key = f"{md_file.parent.name}/{md_file.name}"
+        try:
+            st = md_file.stat()
+        except OSError:
+            continue
+        item = old_files.get(key)
+        if not (item and item.get("mtime_ns") == st.st_mtime_ns and item.get("size") == st.st_size):
+            pending.append(len(scanned))
+            item = {**(item or {}), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        scanned.append((md_file, key, item))
+
+    thumbs = _load_thumbs(base_dir)
+    results = _scan_files(
+        [scanned[k][0] for k in pending],
+        [scanned[k][2].get("sha256", "") for k in pending],
+        workers,
+    )
+    for k, (sha, fields) in zip(pending, results):
+        md_file, key, item = scanned[k]
+        if fields is not None:
+            item = {**fields, "mtime_ns": item["mtime_ns"], "size": item["size"]}
+        scanned[k] = (md_file, key, item)
+
+    for md_file, key, item in scanned:
+        record = item.get("record")
+        if record is None:
+            new_files[key] = item
+            continue
+        entry = _apply_entry_files(md_file, record, item.get("thumbnail_pref", ""), thumbs)
+        # Only the resolved sibling-file fields are stored beside the record,
+        # so the body is not duplicated in the manifest.
+        new_files[key] = {**item, **{f: entry[f] for f in _ENTRY_FILE_FIELDS}}
+        entries.append(entry)
+
+    previous = {
+        item["record"]["dir_path"]: {
+            **item["record"],
+            **{f: item.get(f, default) for f, default in _ENTRY_FILE_FIELDS.items()},
+        }
+        for item in old_files.values() if item.get("record")
+    }
+    current = {e["dir_path"]: e for e in entries}
+    delta = {
+        "added": sorted(d for d in current if d not in previous),
+        "updated": sorted(d for d in current if d in previous and previous[d] != current[d]),
+        "removed": sorted(d for d in previous if d not in current),
+    }
+    new_manifest = {
+        "version": _MANIFEST_VERSION,
+        "build": manifest.get("build", ""),
+        "files": new_files,
+    }
+    return entries, new_manifest, delta
+
+
+def _collect_entries(
+    base_dir: Path, *, reverse: bool = True, workers: int | None = None,
+) -> list[dict[str, Any]]:
     """Walk the wisdom corpus and build one metadata record per analysis entry.
 
     Parses frontmatter, computes word count and reading time, normalises short
     dates and tags, and resolves thumbnail presentation. Shared by index
     generation and ePub export so both operate on an identical entry set.
     Entries without frontmatter are skipped. Directories are date-prefixed, so
-    ``reverse=True`` yields newest-first.
+    ``reverse=True`` yields newest-first. Unchanged files are served from the
+    corpus manifest; the manifest itself is only written by _regenerate_index.
+    ``workers`` is passed to _scan_corpus.
     """
-    entries: list[dict[str, Any]] = []
-    for md_file in sorted(base_dir.glob("*/*analysis.md"), reverse=reverse):
-        fm = _parse_frontmatter(md_file)
-        if not fm:
-            continue
-
-        dir_name = md_file.parent.name
-        pdf_file = md_file.with_suffix(".pdf")
-
-        # Compute word count and reading time from the analysis body.
-        body = _strip_frontmatter(md_file.read_text(encoding="utf-8"))
-        word_count = len(body.split())
-        reading_time = max(1, round(word_count / 200))
-
-        # Normalise short dates (YYYY-MM) to YYYY-MM-DD so string
-        # comparison sorts them correctly in the JS frontend.
-        raw_date = _fm_str(fm, "date")
-        if re.fullmatch(r"\d{4}-\d{2}", raw_date):
-            raw_date += "-01"
-        raw_content_date = _fm_str(fm, "content_date")
-        if re.fullmatch(r"\d{4}-\d{2}", raw_content_date):
-            raw_content_date += "-01"
-
-        title = _fm_str(fm, "title", dir_name)
-        thumbnail_pref = _fm_str(fm, "thumbnail")
-
-        # Normalise tags: lowercase, hyphenated, strip empties, dedupe.
-        tags = [
-            re.sub(r"\s+", "-", t.strip().lower()).strip("-")
-            for t in _fm_list(fm, "tags")
-        ]
-        tags = [t for t in dict.fromkeys(tags) if t]
-
-        entries.append({
-            "title": title,
-            "sources": _fm_sources(fm),
-            "source_type": _fm_str(fm, "source_type"),
-            "author": _fm_str(fm, "author"),
-            "date": raw_date,
-            "content_date": raw_content_date,
-            "description": _fm_str(fm, "description"),
-            "youtube_channel": _fm_str(fm, "youtube_channel"),
-            "og_site_name": _fm_str(fm, "og_site_name"),
-            "word_count": word_count,
-            "reading_time": reading_time,
-            "dir_path": dir_name,
-            "pdf_path": f"{dir_name}/{pdf_file.name}" if pdf_file.is_file() else "",
-            "md_path": f"{dir_name}/{md_file.name}",
-            "tags": tags,
-            "thumbnail": (
-                _placeholder_thumbnail_svg(title)
-                if thumbnail_pref.startswith("placeholder")
-                else f"{dir_name}/thumbnail.jpg"
-                if (not thumbnail_pref.startswith("false")
-                    and (md_file.parent / "thumbnail.jpg").is_file())
-                else ""
-            ),
-            "body": body,
-        })
+    entries, _, _ = _scan_corpus(
+        base_dir, _load_manifest(base_dir), reverse=reverse, workers=workers,
+    )
     return entries
 
 
-def _regenerate_index(base_dir: Path, *, force: bool = False) -> None:
+def _index_shards_setting() -> str:
+    """Normalise EXTRACT_WISDOM_INDEX_SHARDS to "true", "false" or "auto"."""
+    val = os.environ.get(_INDEX_SHARDS_ENV_VAR, "auto").lower()
+    if val in ("true", "1", "yes"):
+        return "true"
+    if val in ("false", "0", "no"):
+        return "false"
+    return "auto"
+
+
+def _write_index_shards(
+    base_dir: Path, entries: list[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], set[str]]:
+    """Write entry bodies and related lists as per-year script shards.
+
+    Entries are grouped by the year of their analysis date and split into
+    pages of _INDEX_SHARD_SIZE, so adding an entry only rewrites shards of
+    its own year. Each shard is a script calling
+    ``WISDOM_SHARD_LOADED({dir_path: {"body", "related"}})``: unlike fetch(),
+    script tags also load from an index.html opened via file://. Shard names
+    carry a content hash so browsers never serve a stale copy, and
+    unchanged shards are not rewritten. Returns (metadata-only entries, each
+    naming its shard; the set of shard names in use) for
+    _prune_index_shards.
+    """
+    data_dir = base_dir / _INDEX_DATA_DIR
+    data_dir.mkdir(exist_ok=True)
+    by_year: dict[str, list[dict[str, Any]]] = {}
+    for e in entries:
+        year = str(e.get("date", ""))[:4]
+        by_year.setdefault(year if year.isdigit() else "undated", []).append(e)
+
+    meta: dict[str, dict[str, Any]] = {}
+    keep: set[str] = set()
+    for year, group in by_year.items():
+        for page, start in enumerate(range(0, len(group), _INDEX_SHARD_SIZE), 1):
+            chunk = group[start:start + _INDEX_SHARD_SIZE]
+            payload = json.dumps(
+                {e["dir_path"]: {"body": e.get("body", ""), "related": e.get("related", [])}
+                 for e in chunk},
+                ensure_ascii=False, separators=(",", ":"),
+            )
+            script = f"WISDOM_SHARD_LOADED({payload});\n"
+            digest = hashlib.sha256(script.encode("utf-8")).hexdigest()[:12]
+            name = f"{year}-{page:03d}-{digest}.js"
+            keep.add(name)
+            shard_path = data_dir / name
+            if not shard_path.is_file():
+                tmp = shard_path.with_name(f".{name}.{os.getpid()}.tmp")
+                tmp.write_text(script, encoding="utf-8")
+                os.replace(tmp, shard_path)
+            for e in chunk:
+                meta[e["dir_path"]] = {
+                    k: v for k, v in e.items() if k not in ("body", "related")
+                } | {"shard": f"{_INDEX_DATA_DIR}/{name}"}
+
+    return [meta[e["dir_path"]] for e in entries], keep
+
+
+def _prune_index_shards(base_dir: Path, keep: set[str] | None) -> None:
+    """Remove shards no longer referenced (all of them when ``keep`` is None,
+    i.e. the index is inline). Runs under the index lock after index.html is
+    written so a page never points at a deleted shard."""
+    data_dir = base_dir / _INDEX_DATA_DIR
+    if keep is None:
+        shutil.rmtree(data_dir, ignore_errors=True)
+        return
+    for stale in data_dir.glob("*.js"):
+        if stale.name not in keep:
+            stale.unlink(missing_ok=True)
+
+
+def _regenerate_index(
+    base_dir: Path, *, force: bool = False, full: bool = False,
+    workers: int | None = None, related_json: bool | None = None,
+) -> None:
     """Regenerate the index.html in the wisdom base directory.
 
     Walks all subdirectories, parses frontmatter from analysis markdown
     files, computes reading time, and writes a self-contained HTML index.
     Controlled by the EXTRACT_WISDOM_CREATE_INDEX environment variable
     (defaults to "true"). Pass force=True to bypass the env var check.
+
+    The corpus manifest limits re-parsing to changed files, and when neither
+    the corpus nor the build fingerprint (template and output schema
+    versions) has changed since the last run (and every
+    output still exists) the rebuild is skipped; only the tag-sprawl
+    warnings and the opt-in ePub still run. Pass full=True to
+    ignore the manifest and rebuild from scratch.
+
+    Related entries are stored in the search database; the legacy
+    wisdom-related.json export is written when ``related_json`` is True
+    (None defers to EXTRACT_WISDOM_RELATED_JSON) and removed otherwise.
     """
     if not force:
         env_val = os.environ.get(_INDEX_ENV_VAR, "true").lower()
@@ -2025,19 +5051,47 @@ def _regenerate_index(base_dir: Path, *, force: bool = False) -> None:
     if not _INDEX_TEMPLATE.is_file():
         return
 
-    entries = _collect_entries(base_dir, reverse=True)
+    manifest = _load_manifest(base_dir) if not full else {}
+    entries, new_manifest, delta = _scan_corpus(
+        base_dir, manifest, reverse=True, workers=workers,
+    )
     if not entries:
         return
 
+    template = _INDEX_TEMPLATE.read_text(encoding="utf-8")
+    shards_setting = _index_shards_setting()
+    if related_json is None:
+        related_json = os.environ.get(_RELATED_JSON_ENV_VAR, "false").lower() in ("true", "1", "yes")
+    # Fingerprint of everything besides the corpus that shapes the outputs,
+    # so a script upgrade rebuilds even when no analysis file changed.
+    build = hashlib.sha256(
+        f"{_INDEX_SCHEMA_VERSION}:{_SEARCH_DB_VERSION}:{shards_setting}:"
+        f"{related_json}:{template}".encode()
+    ).hexdigest()
+    new_manifest["build"] = build
+    outputs = ["index.html", _SEARCH_DB_NAME] + ([_RELATED_CACHE_NAME] if related_json else [])
+    outputs_present = all(
+        (base_dir / name).is_file() for name in outputs
+    ) and (not manifest.get("sharded") or (base_dir / _INDEX_DATA_DIR).is_dir())
     # Aggregate tag frequencies.
     tag_freq: dict[str, int] = {}
     for e in entries:
         for t in e.get("tags", []):
             tag_freq[t] = tag_freq.get(t, 0) + 1
 
+    if (not full and outputs_present and not any(delta.values())
+            and manifest.get("build") == build):
+        # Refresh stat signatures (e.g. after a touch) without rebuilding.
+        if new_manifest["files"] != manifest.get("files"):
+            _save_manifest(base_dir, new_manifest)
+        # The ePub is not a tracked output; its chapter cache makes this cheap.
+        _warn_tag_sprawl(tag_freq)
+        _maybe_build_epub(base_dir, entries)
+        return
+
     # Compute related entries (graceful fallback to empty lists on error).
     try:
-        related_map = _compute_related(entries)
+        related_map = _update_related(base_dir, entries, full=full)
     except Exception as exc:
         print(f"Warning: related-entry computation failed: {exc}", file=sys.stderr)
         related_map = {e["dir_path"]: [] for e in entries}
@@ -2045,34 +5099,46 @@ def _regenerate_index(base_dir: Path, *, force: bool = False) -> None:
     for e in entries:
         e["related"] = related_map.get(e["dir_path"], [])
 
-    # Build the FTS5 search database alongside index.html.
-    _build_fts_index(base_dir, entries)
+    # Build the FTS5 search database (which also stores related entries for
+    # the `related` subcommand) alongside index.html.
+    search_ok = _build_fts_index(base_dir, entries, full=full) is not None
 
-    # Write related cache so the `related` subcommand can serve it without
-    # re-walking the corpus or rebuilding the FTS5 db.
+    # Optional whole-corpus JSON export of the related map, for external
+    # consumers; a stale export is removed when it is switched off.
+    cache_path = base_dir / _RELATED_CACHE_NAME
     try:
-        cache_payload = {e["dir_path"]: e["related"] for e in entries}
-        (base_dir / _RELATED_CACHE_NAME).write_text(
-            json.dumps(cache_payload, ensure_ascii=False, indent=2) + "\n",
-            encoding="utf-8",
-        )
+        if related_json:
+            cache_payload = {e["dir_path"]: e["related"] for e in entries}
+            tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+            tmp_path.write_text(
+                json.dumps(cache_payload, ensure_ascii=False, indent=2) + "\n",
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, cache_path)
+        else:
+            cache_path.unlink(missing_ok=True)
     except OSError as exc:
         print(f"Warning: Could not write related cache: {exc}", file=sys.stderr)
 
-    # Tag-sprawl warnings (informational; never fatal).
-    if tag_freq:
-        sprawl = _detect_tag_sprawl(tag_freq)
-        if sprawl:
-            print("TAG_SPRAWL_WARNINGS:", file=sys.stderr)
-            for hi, hi_count, lo, lo_count in sprawl:
-                print(
-                    f"  {hi} ({hi_count}) ~ {lo} ({lo_count})  # consider "
-                    f"merging via: wisdom.py tags --merge \"{lo}\" \"{hi}\"",
-                    file=sys.stderr,
-                )
+    _warn_tag_sprawl(tag_freq)
 
-    template = _INDEX_TEMPLATE.read_text(encoding="utf-8")
-    entries_json = json.dumps(entries, indent=2, ensure_ascii=False)
+    sharded = shards_setting == "true" or (
+        shards_setting == "auto"
+        and sum(len(e.get("body", "")) for e in entries) > _INDEX_SHARD_AUTO_BYTES
+    )
+    new_manifest["sharded"] = sharded
+    shard_names: set[str] | None = None
+    if sharded:
+        try:
+            meta_entries, shard_names = _write_index_shards(base_dir, entries)
+        except OSError as exc:
+            print(f"Warning: Could not write index shards: {exc}", file=sys.stderr)
+            sharded = new_manifest["sharded"] = False
+    if sharded:
+        # Compact separators: this payload is parsed before first paint.
+        entries_json = json.dumps(meta_entries, ensure_ascii=False, separators=(",", ":"))
+    else:
+        entries_json = json.dumps(entries, indent=2, ensure_ascii=False)
     tag_freq_json = json.dumps(
         sorted(tag_freq.items(), key=lambda kv: (-kv[1], kv[0])),
         ensure_ascii=False,
@@ -2115,19 +5181,40 @@ def _regenerate_index(base_dir: Path, *, force: bool = False) -> None:
                 time.sleep(0.5)
 
         index_path.write_text(html, encoding="utf-8")
+        _prune_index_shards(base_dir, shard_names)
+        # Persist the manifest only once every output reflects it, so a failed
+        # stage is retried on the next run rather than masked as unchanged.
+        if search_ok:
+            _save_manifest(base_dir, new_manifest)
         fcntl.flock(lock_file, fcntl.LOCK_UN)
         lock_file.close()
     except OSError as exc:
         print(f"Warning: Could not write index: {exc}", file=sys.stderr)
 
     # Optionally rebuild the corpus ebook (off by default; see _maybe_build_epub).
-    _maybe_build_epub(base_dir)
+    _maybe_build_epub(base_dir, entries)
+
+
+def _warn_tag_sprawl(tag_freq: dict[str, int]) -> None:
+    """Print tag-sprawl warnings (informational; never fatal)."""
+    sprawl = _detect_tag_sprawl(tag_freq) if tag_freq else []
+    if sprawl:
+        print("TAG_SPRAWL_WARNINGS:", file=sys.stderr)
+        for hi, hi_count, lo, lo_count in sprawl:
+            print(
+                f"  {hi} ({hi_count}) ~ {lo} ({lo_count})  # consider "
+                f"merging via: wisdom.py tags --merge \"{lo}\" \"{hi}\"",
+                file=sys.stderr,
+            )
 
 
 def cmd_index(args: argparse.Namespace) -> None:
     """Regenerate the wisdom library index.html."""
     base_dir = Path(args.base_dir) if args.base_dir else detect_base_dir()
-    _regenerate_index(base_dir, force=True)
+    _regenerate_index(
+        base_dir, force=True, full=args.full, workers=args.workers,
+        related_json=True if args.related_json else None,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -2142,6 +5229,17 @@ def cmd_index(args: argparse.Namespace) -> None:
 _EPUB_ENV_VAR = "EXTRACT_WISDOM_CREATE_EPUB"
 _EPUB_FILENAME = "Wisdom-Library.epub"
 
+# Rendered chapters (XHTML plus their diagram images) cached in the wisdom base
+# directory, keyed on a hash of the chapter's title and markdown, so a rebuild
+# only renders new or edited entries. Chapters with diagram fallbacks are not
+# cached so they are retried. Bump the version when chapter output changes.
+_EPUB_CACHE_NAME = "wisdom-epub-cache.db"
+_EPUB_CACHE_VERSION = 1
+
+# Uncached chapters render in a process pool once there are at least this many
+# (chapters are heavier than the corpus scan, hence the lower threshold).
+_EPUB_PARALLEL_MIN = 8
+
 # Cover dimensions (px). 2:3 aspect matches common e-reader covers.
 _EPUB_COVER_W = 1400
 _EPUB_COVER_H = 2100
@@ -2468,8 +5566,12 @@ def _epub_ncx(
 def _epub_opf(
     title: str, uid: str, date_str: str, modified: str,
     groups: list[tuple[str, list[tuple[int, dict[str, Any]]]]], *, has_cover: bool,
+    images: dict[str, str] | None = None,
 ) -> str:
-    """Build the OPF package document (metadata, manifest, spine, and guide)."""
+    """Build the OPF package document (metadata, manifest, spine, and guide).
+
+    ``images`` maps diagram file names under images/ to their MIME types.
+    """
     manifest = [
         '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>',
         '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>',
@@ -2486,6 +5588,10 @@ def _epub_opf(
         manifest.append('<item id="cover" href="cover.xhtml" media-type="application/xhtml+xml"/>')
         spine.append('<itemref idref="cover"/>')
         guide.append('<reference type="cover" title="Cover" href="cover.xhtml"/>')
+    for name, mime in sorted((images or {}).items()):
+        manifest.append(
+            f'<item id="img-{name.rsplit(".", 1)[0]}" href="images/{name}" media-type="{mime}"/>'
+        )
     spine.append('<itemref idref="index"/>')
     for gi, (year, chapters) in enumerate(groups):
         part_id = f"part-{gi}"
@@ -2523,20 +5629,194 @@ def _epub_opf(
     )
 
 
+def _epub_render_chapter(
+    title: str, body: str, md_lib: Any = None,
+) -> tuple[str, dict[str, tuple[bytes, str]], dict[str, int]]:
+    """Render one entry to an ePub chapter.
+
+    Returns (xhtml, images, diagram_fallbacks) where images maps the
+    chapter's diagram file names (under images/) to (bytes, mime). Imports
+    markdown itself when ``md_lib`` is not given, so it can run in a worker
+    process.
+    """
+    if md_lib is None:
+        import markdown as md_lib  # type: ignore[import-untyped]  # ty: ignore[unresolved-import]
+    images: dict[str, tuple[bytes, str]] = {}
+    # raster=True renders graphviz to PNG (Kindle-safe) instead of SVG.
+    body_html, fallbacks = _md_to_content_html(
+        body, md_lib, raster=True, images=images, image_base="images/",
+    )
+    return _xhtml_document(title, _wellformed_body(body_html)), images, fallbacks
+
+
+def _epub_cache_open(base_dir: Path) -> sqlite3.Connection | None:
+    """Open the chapter cache, or None if it is unusable (the build then
+    renders every chapter)."""
+    try:
+        conn = sqlite3.connect(base_dir / _EPUB_CACHE_NAME, timeout=30)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS chapters (
+                key TEXT PRIMARY KEY,
+                xhtml TEXT NOT NULL,
+                images TEXT NOT NULL,
+                used REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                name TEXT PRIMARY KEY,
+                mime TEXT NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+    except sqlite3.Error as exc:
+        print(f"Warning: ePub chapter cache unavailable: {exc}", file=sys.stderr)
+        return None
+    return conn
+
+
+def _epub_chapter_key(title: str, body: str, md_lib: Any) -> str:
+    return hashlib.sha256(
+        f"{_EPUB_CACHE_VERSION}\0{getattr(md_lib, '__version__', '')}\0{title}\0{body}".encode()
+    ).hexdigest()
+
+
+def _epub_chapters(
+    entries: list[dict[str, Any]], md_lib: Any, conn: sqlite3.Connection | None,
+    workers: int | None,
+) -> Iterator[tuple[str, list[tuple[str, str]], dict[str, tuple[bytes, str]], dict[str, int]]]:
+    """Yield (xhtml, image refs, new images, fallbacks) per entry, in order.
+
+    Image refs list the chapter's (name, mime); new images carry bytes only
+    for freshly rendered chapters (cached chapters' images are already in the
+    cache). Cached chapters come straight from ``conn`` when all their
+    images are still there; the rest render in a process pool once there are
+    _EPUB_PARALLEL_MIN of them, results being consumed in entry order as
+    they arrive, and are stored back in the cache.
+    """
+    keys = [_epub_chapter_key(e["title"], e.get("body", ""), md_lib) for e in entries]
+    cached: dict[str, tuple[str, str]] = {}
+    if conn is not None:
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            cached.update(
+                (key, (xhtml, refs)) for key, xhtml, refs in conn.execute(
+                    f"SELECT key, xhtml, images FROM chapters WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+    if cached:
+        # A chapter whose diagrams have gone from the images table (e.g. an
+        # insert that failed) is a cache miss: it renders again.
+        names = sorted({name for _, refs in cached.values() for name, _ in json.loads(refs)})
+        stored: set[str] = set()
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            stored.update(
+                name for (name,) in conn.execute(
+                    f"SELECT name FROM images WHERE name IN ({','.join('?' * len(chunk))})", chunk,
+                )
+            )
+        if stored != set(names):
+            cached = {
+                key: (xhtml, refs) for key, (xhtml, refs) in cached.items()
+                if all(name in stored for name, _ in json.loads(refs))
+            }
+    todo = [i for i, key in enumerate(keys) if key not in cached]
+    titles = [entries[i]["title"] for i in todo]
+    bodies = [entries[i].get("body", "") for i in todo]
+
+    n_workers = 1 if len(todo) < _EPUB_PARALLEL_MIN else _scan_workers(workers, len(todo))
+    rendered: Iterator[tuple[str, dict[str, tuple[bytes, str]], dict[str, int]]]
+    pool = None
+    if n_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=n_workers)
+        rendered = pool.map(_epub_render_chapter, titles, bodies)
+    else:
+        rendered = (_epub_render_chapter(t, b, md_lib) for t, b in zip(titles, bodies))
+    now = time.time()
+    try:
+        todo_set = set(todo)
+        for i, key in enumerate(keys):
+            if i not in todo_set:
+                xhtml, refs = cached[key]
+                yield xhtml, [tuple(r) for r in json.loads(refs)], {}, {}
+                continue
+            try:
+                xhtml, images, fallbacks = next(rendered)
+            except Exception as exc:
+                # BrokenProcessPool: finish the remaining chapters in-process.
+                if pool is None:
+                    raise
+                print(f"Warning: parallel ePub render failed ({exc}); continuing sequentially",
+                      file=sys.stderr)
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = None
+                rest = [j for j in todo if j >= i]
+                rendered = (
+                    _epub_render_chapter(entries[j]["title"], entries[j].get("body", ""), md_lib)
+                    for j in rest
+                )
+                xhtml, images, fallbacks = next(rendered)
+            refs = [(name, mime) for name, (_, mime) in images.items()]
+            if conn is not None and not fallbacks:
+                try:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO images(name, mime, data) VALUES (?, ?, ?)",
+                        [(name, mime, data) for name, (data, mime) in images.items()],
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO chapters(key, xhtml, images, used) VALUES (?, ?, ?, ?)",
+                        (key, xhtml, json.dumps(refs), now),
+                    )
+                except sqlite3.Error:
+                    pass
+            yield xhtml, refs, images, fallbacks
+        if conn is not None and cached:
+            used = [key for key in keys if key in cached]
+            for i in range(0, len(used), 500):
+                chunk = used[i:i + 500]
+                conn.execute(
+                    f"UPDATE chapters SET used = ? WHERE key IN ({','.join('?' * len(chunk))})",
+                    [now, *chunk],
+                )
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _epub_cache_prune(conn: sqlite3.Connection, build_started: float) -> None:
+    """Drop chapters the last build did not use, then orphaned images."""
+    try:
+        conn.execute("DELETE FROM chapters WHERE used < ?", (build_started,))
+        referenced = {
+            name for (refs,) in conn.execute("SELECT images FROM chapters")
+            for name, _ in json.loads(refs)
+        }
+        orphans = [(name,) for (name,) in conn.execute("SELECT name FROM images") if name not in referenced]
+        conn.executemany("DELETE FROM images WHERE name = ?", orphans)
+        conn.commit()
+    except sqlite3.Error:
+        pass
+
+
 def _build_epub(
     base_dir: Path, entries: list[dict[str, Any]], output_file: Path,
     title: str, md_lib: Any, *, include_descriptions: bool = False,
+    workers: int | None = None,
 ) -> dict[str, int]:
-    """Assemble the whole corpus into a single .epub. Returns diagram fallbacks."""
-    fallbacks: dict[str, int] = {}
-    chapter_docs: list[str] = []
-    for e in entries:
-        # raster=True renders graphviz to PNG (Kindle-safe) instead of SVG.
-        body_html, fb = _md_to_content_html(e.get("body", ""), md_lib, raster=True)
-        for lang, count in fb.items():
-            fallbacks[lang] = fallbacks.get(lang, 0) + count
-        chapter_docs.append(_xhtml_document(e["title"], _wellformed_body(body_html)))
+    """Assemble the whole corpus into a single .epub. Returns diagram fallbacks.
 
+    Chapters stream into the zip in entry order as they are rendered (or
+    read from the chapter cache, see _epub_chapters), so memory doesn't grow
+    with the corpus. Diagrams are stored once each as OEBPS/images/<content
+    hash>, however many chapters use them. The book is written to a temp
+    file and renamed into place.
+    """
+    build_started = time.time()
+    fallbacks: dict[str, int] = {}
     groups = _group_by_year(entries)
 
     tz = _local_tz()
@@ -2554,44 +5834,88 @@ def _build_epub(
     )
     nav_doc = _epub_nav_xhtml(groups, has_cover=has_cover)
     ncx = _epub_ncx(title, uid, groups)
-    opf = _epub_opf(title, uid, date_str, modified, groups, has_cover=has_cover)
 
     output_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+    conn = _epub_cache_open(base_dir)
     deflate = zipfile.ZIP_DEFLATED
-    with zipfile.ZipFile(output_file, "w") as zf:
-        # mimetype MUST be the first entry and stored uncompressed (ePub spec).
-        zf.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
-        zf.writestr("META-INF/container.xml", _EPUB_CONTAINER_XML, compress_type=deflate)
-        zf.writestr("OEBPS/content.opf", opf, compress_type=deflate)
-        zf.writestr("OEBPS/nav.xhtml", nav_doc, compress_type=deflate)
-        zf.writestr("OEBPS/toc.ncx", ncx, compress_type=deflate)
-        zf.writestr("OEBPS/style.css", css_text, compress_type=deflate)
-        if has_cover:
-            zf.writestr("OEBPS/cover.png", cover_png, compress_type=deflate)
-            zf.writestr(
-                "OEBPS/cover.xhtml",
-                _xhtml_document("Cover", '<img class="cover-img" src="cover.png" alt="Cover"/>', body_class="cover"),
-                compress_type=deflate,
-            )
-        zf.writestr("OEBPS/index.xhtml", index_doc, compress_type=deflate)
-        for year, chapters in groups:
-            zf.writestr(
-                f"OEBPS/{_epub_part_name(year)}",
-                _xhtml_document(year, _epub_part_body(year, len(chapters))),
-                compress_type=deflate,
+    # image name -> mime for everything written to OEBPS/images/.
+    written: dict[str, str] = {}
+    try:
+        with zipfile.ZipFile(tmp, "w") as zf:
+            # mimetype MUST be the first entry and stored uncompressed (ePub spec).
+            zf.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+            zf.writestr("META-INF/container.xml", _EPUB_CONTAINER_XML, compress_type=deflate)
+            for idx, (doc, refs, images, fb) in enumerate(
+                _epub_chapters(entries, md_lib, conn, workers), 1,
+            ):
+                for lang, count in fb.items():
+                    fallbacks[lang] = fallbacks.get(lang, 0) + count
+                zf.writestr(f"OEBPS/{_epub_chapter_name(idx)}", doc, compress_type=deflate)
+                for name, mime in refs:
+                    if name in written:
+                        continue
+                    if name in images:
+                        data = images[name][0]
+                    else:
+                        row = conn.execute(
+                            "SELECT data FROM images WHERE name = ?", (name,),
+                        ).fetchone() if conn is not None else None
+                        if row is None:
+                            print(f"Warning: ePub image {name} missing from the chapter cache; "
+                                  "left out of the book", file=sys.stderr)
+                            continue
+                        data = bytes(row[0])
+                    # PNG/JPEG are already compressed; only SVG gains from deflate.
+                    zf.writestr(
+                        f"OEBPS/images/{name}", data,
+                        compress_type=deflate if mime == "image/svg+xml" else zipfile.ZIP_STORED,
+                    )
+                    written[name] = mime
+            opf = _epub_opf(
+                title, uid, date_str, modified, groups, has_cover=has_cover, images=written,
             )
-        for idx, doc in enumerate(chapter_docs, 1):
-            zf.writestr(f"OEBPS/{_epub_chapter_name(idx)}", doc, compress_type=deflate)
+            zf.writestr("OEBPS/content.opf", opf, compress_type=deflate)
+            zf.writestr("OEBPS/nav.xhtml", nav_doc, compress_type=deflate)
+            zf.writestr("OEBPS/toc.ncx", ncx, compress_type=deflate)
+            zf.writestr("OEBPS/style.css", css_text, compress_type=deflate)
+            if has_cover:
+                zf.writestr("OEBPS/cover.png", cover_png, compress_type=deflate)
+                zf.writestr(
+                    "OEBPS/cover.xhtml",
+                    _xhtml_document("Cover", '<img class="cover-img" src="cover.png" alt="Cover"/>', body_class="cover"),
+                    compress_type=deflate,
+                )
+            zf.writestr("OEBPS/index.xhtml", index_doc, compress_type=deflate)
+            for year, chapters in groups:
+                zf.writestr(
+                    f"OEBPS/{_epub_part_name(year)}",
+                    _xhtml_document(year, _epub_part_body(year, len(chapters))),
+                    compress_type=deflate,
+                )
+        os.replace(tmp, output_file)
+        if conn is not None:
+            _epub_cache_prune(conn, build_started)
+    finally:
+        tmp.unlink(missing_ok=True)
+        if conn is not None:
+            # Chapters rendered before a failure are kept for the next build.
+            try:
+                conn.commit()
+            except sqlite3.Error:
+                pass
+            conn.close()
 
     return fallbacks
 
 
-def _maybe_build_epub(base_dir: Path) -> None:
+def _maybe_build_epub(base_dir: Path, entries: list[dict[str, Any]] | None = None) -> None:
     """Rebuild the corpus ePub after an index refresh when opted in.
 
-    Off by default: the build re-renders every chapter's diagrams, which is
-    only fast enough for an automatic run when the corpus has no network-bound
-    (mermaid) diagrams. Enable with EXTRACT_WISDOM_CREATE_EPUB=true.
+    Off by default; enable with EXTRACT_WISDOM_CREATE_EPUB=true. Chapters
+    come from the chapter cache (_EPUB_CACHE_NAME), so after the first build
+    only new or edited entries are rendered. Reuses the caller's
+    newest-first ``entries`` when given instead of re-walking.
     """
     if os.environ.get(_EPUB_ENV_VAR, "false").lower() not in ("true", "1", "yes"):
         return
@@ -2599,7 +5923,8 @@ def _maybe_build_epub(base_dir: Path) -> None:
         import markdown as md_lib  # type: ignore[import-untyped]  # ty: ignore[unresolved-import]
     except ImportError:
         return
-    entries = _collect_entries(base_dir, reverse=True)
+    if entries is None:
+        entries = _collect_entries(base_dir, reverse=True)
     if not entries:
         return
     try:
@@ -2663,7 +5988,7 @@ def cmd_epub(args: argparse.Namespace) -> None:
         )
         sys.exit(2)
 
-    entries = _collect_entries(base_dir, reverse=True)
+    entries = _collect_entries(base_dir, reverse=True, workers=args.workers)
     if not entries:
         print(f"No analysis entries found under {base_dir}", file=sys.stderr)
         return
@@ -2673,7 +5998,7 @@ def cmd_epub(args: argparse.Namespace) -> None:
 
     fallbacks = _build_epub(
         base_dir, entries, output_file, title, md_lib,
-        include_descriptions=args.include_descriptions,
+        include_descriptions=args.include_descriptions, workers=args.workers,
     )
 
     print(f"EPUB_PATH: {output_file}")
@@ -2691,6 +6016,201 @@ def cmd_epub(args: argparse.Namespace) -> None:
         _open_file(open_target)
 
 
+# ---------------------------------------------------------------------------
+# Thumbnail renditions
+# ---------------------------------------------------------------------------
+
+# The index shows each card thumbnail at 102x76 CSS px, so rather than the
+# 480px thumbnail.jpg it loads centre-cropped WebP renditions at 1x and 2x
+# (with a 2x JPEG for browsers without WebP), over a tiny inline WebP
+# placeholder. Renditions are named by a hash of thumbnail.jpg, so entries
+# sharing an image share its files; thumbs.json maps each entry directory
+# to (thumbnail mtime_ns, size, hash, placeholder).
+_THUMBS_DIR = "wisdom-thumbs"
+_THUMBS_MANIFEST = "thumbs.json"
+_THUMBS_VERSION = 1
+_THUMB_CARD_SIZE = (102, 76)
+_THUMB_PLACEHOLDER_SIZE = (12, 9)
+# Renditions made in a process pool once at least this many images need them.
+_THUMB_PARALLEL_MIN = 8
+
+
+def _thumb_names(digest: str) -> tuple[str, str, str]:
+    """(1x WebP, 2x WebP, 2x JPEG) file names for an image hash."""
+    w, h = _THUMB_CARD_SIZE
+    return (f"{digest}-{w}x{h}.webp", f"{digest}-{w * 2}x{h * 2}.webp",
+            f"{digest}-{w * 2}x{h * 2}.jpg")
+
+
+def _load_thumbs(base_dir: Path) -> dict[str, Any]:
+    """thumbs.json entries by entry directory name ({} if absent or stale)."""
+    try:
+        data = json.loads((base_dir / _THUMBS_DIR / _THUMBS_MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _THUMBS_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def _have_pillow() -> bool:
+    """Whether Pillow can be imported, checked without importing it."""
+    return importlib.util.find_spec("PIL") is not None
+
+
+def _thumb_renditions(src: str, out_dir: str, digest: str) -> str:
+    """Write the card renditions of one image and return its placeholder as
+    a data URI. Top-level so process-pool workers can run it."""
+    import io
+
+    from PIL import Image, ImageOps
+
+    w, h = _THUMB_CARD_SIZE
+    with Image.open(src) as img:
+        # JPEGs decode straight at 1/2-1/8 scale, never below the 2x size.
+        img.draft("RGB", (w * 2, h * 2))
+        large = ImageOps.fit(img.convert("RGB"), (w * 2, h * 2), Image.Resampling.LANCZOS)
+    small = large.resize((w, h), Image.Resampling.LANCZOS)
+    placeholder = small.resize(_THUMB_PLACEHOLDER_SIZE, Image.Resampling.BOX)
+
+    out = Path(out_dir)
+    for name, image, fmt, opts in zip(
+        _thumb_names(digest), (small, large, large),
+        ("WEBP", "WEBP", "JPEG"),
+        ({"quality": 80, "method": 4}, {"quality": 75, "method": 4},
+         {"quality": 80, "optimize": True, "progressive": True}),
+    ):
+        tmp = out / f".{name}.{os.getpid()}.tmp"
+        try:
+            image.save(tmp, fmt, **opts)
+            os.replace(tmp, out / name)
+        finally:
+            tmp.unlink(missing_ok=True)
+    buf = io.BytesIO()
+    placeholder.save(buf, "WEBP", quality=30)
+    return "data:image/webp;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def _thumbnail_stage(
+    base_dir: Path, entry_dirs: list[Path], *, prune: bool = False,
+) -> int:
+    """Bring the card renditions of ``entry_dirs`` up to date.
+
+    Unchanged thumbnails (same mtime and size as recorded) are skipped
+    without being read, identical images across entries are rendered once,
+    and the remaining images are rendered in a process pool when there are
+    enough of them. ``prune`` (for a whole-corpus run) also drops records
+    and renditions no entry refers to any more. Returns the number of images
+    rendered. Holds an exclusive lock on the renditions directory so
+    concurrent runs do not lose each other's records.
+    """
+    if not _have_pillow():
+        print("Warning: Pillow not installed; skipping thumbnail renditions", file=sys.stderr)
+        return 0
+
+    thumbs_dir = base_dir / _THUMBS_DIR
+    try:
+        thumbs_dir.mkdir(parents=True, exist_ok=True)
+        lock_fh = open(thumbs_dir / ".lock", "w")
+    except OSError as exc:
+        print(f"Warning: Could not create {thumbs_dir}: {exc}", file=sys.stderr)
+        return 0
+    with lock_fh:
+        fcntl.flock(lock_fh, fcntl.LOCK_EX)
+        records = _load_thumbs(base_dir)
+        old_records = dict(records)
+        placeholders = {r["hash"]: r["lqip"] for r in records.values()
+                        if all((thumbs_dir / n).is_file() for n in _thumb_names(r["hash"]))}
+
+        todo: dict[str, Path] = {}
+        changed: dict[str, tuple[Path, int, int]] = {}
+        for entry_dir in entry_dirs:
+            thumb = entry_dir / "thumbnail.jpg"
+            try:
+                st = thumb.stat()
+            except OSError:
+                records.pop(entry_dir.name, None)
+                continue
+            rec = records.get(entry_dir.name)
+            if (rec and rec.get("mtime_ns") == st.st_mtime_ns and rec.get("size") == st.st_size
+                    and rec.get("hash") in placeholders):
+                continue
+            try:
+                digest = hashlib.sha256(thumb.read_bytes()).hexdigest()[:24]
+            except OSError:
+                continue
+            changed[entry_dir.name] = (thumb, st.st_mtime_ns, st.st_size)
+            records[entry_dir.name] = {"hash": digest}
+            if digest not in placeholders:
+                todo.setdefault(digest, thumb)
+
+        digests = list(todo)
+        n_workers = 1
+        if len(digests) >= _THUMB_PARALLEL_MIN:
+            n_workers = max(1, min(len(digests), (os.cpu_count() or 1) - 1))
+        results: list[str | None] = [None] * len(digests)
+        done = 0
+        if n_workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            from concurrent.futures.process import BrokenProcessPool
+            try:
+                with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                    for result in pool.map(
+                        _thumb_renditions_safe, [str(todo[d]) for d in digests],
+                        [str(thumbs_dir)] * len(digests), digests,
+                        chunksize=max(1, len(digests) // (n_workers * 4)),
+                    ):
+                        results[done] = result
+                        done += 1
+            except BrokenProcessPool as exc:
+                print(f"Warning: parallel thumbnail rendering failed ({exc}); "
+                      "continuing sequentially", file=sys.stderr)
+        for k in range(done, len(digests)):
+            results[k] = _thumb_renditions_safe(str(todo[digests[k]]), str(thumbs_dir), digests[k])
+        for digest, placeholder in zip(digests, results):
+            if placeholder:
+                placeholders[digest] = placeholder
+            else:
+                print(f"Warning: Could not render thumbnail {todo[digest]}", file=sys.stderr)
+
+        for name, (_, mtime_ns, size) in changed.items():
+            digest = records[name]["hash"]
+            if digest in placeholders:
+                records[name] = {"mtime_ns": mtime_ns, "size": size, "hash": digest,
+                                 "lqip": placeholders[digest]}
+            else:
+                records.pop(name, None)
+
+        if prune:
+            live = {d.name for d in entry_dirs}
+            records = {k: v for k, v in records.items() if k in live}
+            keep = {n for r in records.values() for n in _thumb_names(r["hash"])}
+            for path in thumbs_dir.iterdir():
+                if path.name not in keep and not path.name.startswith(".") and path.name != _THUMBS_MANIFEST:
+                    path.unlink(missing_ok=True)
+
+        if records != old_records:
+            path = thumbs_dir / _THUMBS_MANIFEST
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            try:
+                tmp.write_text(json.dumps({"version": _THUMBS_VERSION, "entries": records},
+                                          ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+                os.replace(tmp, path)
+            except OSError as exc:
+                tmp.unlink(missing_ok=True)
+                print(f"Warning: Could not write thumbnail manifest: {exc}", file=sys.stderr)
+    return len(digests)
+
+
+def _thumb_renditions_safe(src: str, out_dir: str, digest: str) -> str | None:
+    """_thumb_renditions, or None when the image cannot be decoded."""
+    try:
+        return _thumb_renditions(src, out_dir, digest)
+    except Exception:
+        return None
+
+
 # ---------------------------------------------------------------------------
 # Backfill YouTube metadata and thumbnails
 # ---------------------------------------------------------------------------
@@ -2716,6 +6236,19 @@ def _format_yaml_value(value: str | list[str]) -> str:
     return _format_yaml_scalar(value)
 
 
+def _replace_text(path: Path, text: str) -> None:
+    """Rewrite ``path`` via a temp file and rename, so an interrupted write
+    never leaves it truncated. Writes through a symlink and keeps the mode."""
+    target = path.resolve()
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        shutil.copymode(target, tmp)
+        os.replace(tmp, target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
 def _update_frontmatter(
     md_path: Path,
     updates: dict[str, Any],
@@ -2777,11 +6310,16 @@ def _update_frontmatter(
 
     new_fm = "\n".join(fm_lines).rstrip("\n") + "\n" + "\n".join(new_lines) + "\n"
     text = "---\n" + new_fm + "---" + text[end + 4:]
-    md_path.write_text(text, encoding="utf-8")
+    _replace_text(md_path, text)
     return True
 
 
 
+# Entries enriched at once by backfill (--workers overrides); requests to any
+# one host are further bounded by _HTTP_PER_HOST (--per-host).
+_BACKFILL_WORKERS = int(os.environ.get("EXTRACT_WISDOM_BACKFILL_WORKERS", "8"))
+
+
 def cmd_backfill(args: argparse.Namespace) -> None:
     """Backfill metadata and thumbnails for existing wisdom entries."""
     base_dir = detect_base_dir()
@@ -2811,24 +6349,40 @@ def cmd_backfill(args: argparse.Namespace) -> None:
 
     from concurrent.futures import ThreadPoolExecutor, as_completed
 
+    global _HTTP_PER_HOST
+    if args.per_host:
+        _HTTP_PER_HOST = args.per_host
     force = args.force
     updated = 0
     skipped = 0
+    _http_cache_load(base_dir)
 
-    with ThreadPoolExecutor(max_workers=3) as pool:
-        futures = {pool.submit(_enrich_entry, md, overwrite=force): md for md in md_files}
-        for future in as_completed(futures):
-            try:
-                if future.result():
-                    updated += 1
-                else:
+    workers = max(1, min(args.workers or _BACKFILL_WORKERS, len(md_files) or 1))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_enrich_entry, md, overwrite=force): md for md in md_files}
+            for future in as_completed(futures):
+                try:
+                    if future.result():
+                        updated += 1
+                    else:
+                        skipped += 1
+                except Exception as exc:
+                    print(f"Warning: {futures[future].parent.name}: {exc}", file=sys.stderr)
                     skipped += 1
-            except Exception as exc:
-                print(f"Warning: {futures[future].parent.name}: {exc}", file=sys.stderr)
-                skipped += 1
-
+    finally:
+        # Validators from entries that did finish are kept on Ctrl-C too.
+        _http_cache_save(base_dir)
     print(f"Backfill complete: {updated} updated, {skipped} skipped")
 
+    if args.all:
+        entry_dirs = sorted({p.parent for p in base_dir.glob("*/*analysis.md")})
+    else:
+        entry_dirs = [md.parent for md in md_files if md.parent.parent == base_dir]
+    if entry_dirs:
+        rendered = _thumbnail_stage(base_dir, entry_dirs, prune=args.all)
+        print(f"Thumbnail renditions: {rendered} rendered")
+
     # Regenerate index.
     try:
         _regenerate_index(base_dir, force=True)
@@ -2870,72 +6424,230 @@ def _format_fts_query(query: str) -> str:
     return " ".join(parts)
 
 
-def cmd_search(args: argparse.Namespace) -> None:
-    """Query the FTS5 wisdom search database."""
-    base_dir = detect_base_dir()
-    db_path = _resolve_search_db(base_dir)
-    if not db_path.is_file():
-        print(
-            f"Error: Search index not found at {db_path}.\n"
-            f"Run: wisdom.py index",
-            file=sys.stderr,
-        )
-        sys.exit(1)
+_DATE_BOUND_RE = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
 
-    match_expr = _format_fts_query(args.query)
-    if not match_expr:
-        print("Error: empty search query", file=sys.stderr)
-        sys.exit(1)
+# Maximum values reported per facet (tag, source_type, year).
+_SEARCH_FACET_LIMIT = 20
+
+
+def _search_where(spec: dict[str, Any]) -> tuple[str, list[Any]]:
+    """WHERE clause and parameters for a normalised search spec.
 
+    ``since``/``until`` are inclusive YYYY, YYYY-MM or YYYY-MM-DD bounds on
+    the entry date; a partial ``until`` covers its whole year or month.
+    """
     where = ["wisdom MATCH ?"]
-    params: list[Any] = [match_expr]
-    if args.type:
+    params: list[Any] = [spec["match"]]
+    if spec.get("type"):
         where.append("source_type = ?")
-        params.append(args.type)
-    params.append(args.top)
-
+        params.append(spec["type"])
+    if spec.get("since"):
+        where.append("date >= ?")
+        params.append(spec["since"])
+    if spec.get("until"):
+        where.append("substr(date, 1, ?) <= ?")
+        params.extend([len(spec["until"]), spec["until"]])
+    return " AND ".join(where), params
+
+
+def _search_rows(conn: sqlite3.Connection, spec: dict[str, Any]) -> list[Any]:
+    """Run a MATCH query and return BM25-ordered result rows.
+
+    Columns: dir_path, title, author, source_type, date, tags, pdf_path,
+    md_path, snippet (empty when ``spec["snippet"]`` is false), bm25 score
+    (negative; lower is better).
+    """
+    where, params = _search_where(spec)
+    snip = "snippet(wisdom, 5, '<<', '>>', '...', 24)" if spec.get("snippet", True) else "''"
     sql = (
         "SELECT dir_path, title, author, source_type, date, tags, pdf_path, "
-        "md_path, snippet(wisdom, 5, '<<', '>>', '...', 24) AS snip, "
+        f"md_path, {snip} AS snip, "
         "bm25(wisdom) AS score "
-        "FROM wisdom WHERE " + " AND ".join(where) + " "
+        "FROM wisdom WHERE " + where + " "
         "ORDER BY bm25(wisdom) LIMIT ?"
     )
+    return conn.execute(sql, params + [spec["top"]]).fetchall()
+
+
+def _search_facets(conn: sqlite3.Connection, spec: dict[str, Any]) -> dict[str, list[list[Any]]]:
+    """Count every match (not just the top rows) by tag, source_type and
+    year, as ``{facet: [[value, count], ...]}`` ordered by count."""
+    where, params = _search_where(spec)
+    sql = (
+        "WITH hits AS (SELECT dir_path, source_type, date FROM wisdom WHERE " + where + ") "
+        "SELECT 'tag', t.tag, count(*) FROM hits JOIN wisdom_tags t USING (dir_path) GROUP BY t.tag "
+        "UNION ALL "
+        "SELECT 'source_type', source_type, count(*) FROM hits WHERE source_type != '' GROUP BY source_type "
+        "UNION ALL "
+        "SELECT 'year', substr(date, 1, 4), count(*) FROM hits WHERE date != '' GROUP BY substr(date, 1, 4)"
+    )
+    facets: dict[str, list[list[Any]]] = {"tag": [], "source_type": [], "year": []}
+    for facet, value, count in conn.execute(sql, params):
+        facets[facet].append([value, count])
+    for facet, counts in facets.items():
+        counts.sort(key=lambda vc: (-vc[1], vc[0]))
+        del counts[_SEARCH_FACET_LIMIT:]
+    return facets
+
+
+def _search_spec(raw: Any, defaults: dict[str, Any]) -> dict[str, Any]:
+    """Normalise one query (a string, or an object with ``query`` and optional
+    ``top``/``type``/``since``/``until``/``snippet``/``facets``/``id``) into a
+    search spec over ``defaults``. Raises ValueError on invalid input."""
+    if isinstance(raw, str):
+        raw = {"query": raw}
+    if not isinstance(raw, dict):
+        raise ValueError("query must be a string or an object")
+    spec = {**defaults, **{k: v for k, v in raw.items() if k != "query"}}
+    spec["match"] = _format_fts_query(str(raw.get("query") or ""))
+    if not spec["match"]:
+        raise ValueError("empty search query")
+    if spec.get("type") not in (None, "youtube", "web", "text"):
+        raise ValueError(f"invalid type: {spec['type']!r}")
+    for bound in ("since", "until"):
+        if spec.get(bound) and not _DATE_BOUND_RE.match(str(spec[bound])):
+            raise ValueError(f"invalid {bound} date (use YYYY, YYYY-MM or YYYY-MM-DD): {spec[bound]!r}")
+    top = spec.get("top", 10)
+    try:
+        if isinstance(top, bool):
+            raise TypeError
+        spec["top"] = int(top)
+    except (TypeError, ValueError):
+        spec["top"] = 0
+    if spec["top"] < 1:
+        raise ValueError(f"invalid top (use a positive integer): {top!r}")
+    for flag in ("snippet", "facets"):
+        if not isinstance(spec.get(flag, False), bool):
+            raise ValueError(f"invalid {flag} (use true or false): {spec[flag]!r}")
+    return spec
+
+
+def _run_searches(conn: sqlite3.Connection, specs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Run each spec over one connection; a failing query yields an
+    ``{"error": ...}`` result instead of aborting the rest."""
+    results: list[dict[str, Any]] = []
+    for spec in specs:
+        try:
+            result: dict[str, Any] = {"rows": _search_rows(conn, spec)}
+            if spec.get("facets"):
+                result["facets"] = _search_facets(conn, spec)
+        except sqlite3.Error as exc:
+            result = {"error": str(exc)}
+        results.append(result)
+    return results
+
+
+def _search_result_json(rows: list[Any]) -> list[dict[str, Any]]:
+    return [
+        {
+            "rank": i + 1,
+            # bm25 returns negative scores; invert so larger = better.
+            "score": round(-r[9], 4),
+            "dir_path": r[0],
+            "title": r[1],
+            "author": r[2],
+            "source_type": r[3],
+            "date": r[4],
+            "tags": r[5].split() if r[5] else [],
+            "pdf_path": r[6],
+            "md_path": r[7],
+            "snippet": r[8],
+        }
+        for i, r in enumerate(rows)
+    ]
 
+
+def _search_all(base_dir: Path, db_path: Path, specs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Run specs through the warm server when one answers, else over one
+    direct connection. Exits on a database that cannot be opened."""
+    reply = _serve_request(base_dir, {"op": "search", "queries": specs})
+    if reply is not None and reply.get("ok"):
+        return reply["results"]
     try:
         conn = sqlite3.connect(db_path)
         try:
-            rows = conn.execute(sql, params).fetchall()
+            return _run_searches(conn, specs)
         finally:
             conn.close()
     except sqlite3.Error as exc:
         print(f"Error: search failed: {exc}", file=sys.stderr)
         sys.exit(1)
 
+
+def cmd_search(args: argparse.Namespace) -> None:
+    """Query the FTS5 wisdom search database."""
+    base_dir = detect_base_dir()
+    db_path = _resolve_search_db(base_dir)
+    if not db_path.is_file():
+        print(
+            f"Error: Search index not found at {db_path}.\n"
+            f"Run: wisdom.py index",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    defaults = {
+        "top": args.top, "type": args.type, "since": args.since, "until": args.until,
+        "snippet": not args.no_snippet, "facets": args.facets,
+    }
+
+    if args.batch:
+        # One JSON query per stdin line in, one JSON result per line out, in
+        # order; invalid lines report an error without stopping the batch.
+        specs: list[dict[str, Any]] = []
+        outputs: list[dict[str, Any] | None] = []
+        for lineno, line in enumerate(sys.stdin, 1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+                spec = _search_spec(raw, defaults)
+            except ValueError as exc:
+                outputs.append({"line": lineno, "error": str(exc)})
+                continue
+            spec["line"] = lineno
+            specs.append(spec)
+            outputs.append(None)
+        results = iter(_search_all(base_dir, db_path, specs) if specs else [])
+        spec_iter = iter(specs)
+        for out in outputs:
+            if out is None:
+                spec, result = next(spec_iter), next(results)
+                out = {"line": spec["line"]}
+                if "id" in spec:
+                    out["id"] = spec["id"]
+                if "error" in result:
+                    out["error"] = result["error"]
+                else:
+                    out["results"] = _search_result_json(result["rows"])
+                    if "facets" in result:
+                        out["facets"] = result["facets"]
+            print(json.dumps(out, ensure_ascii=False))
+        return
+
+    if not args.query:
+        print("Error: a search query is required (or pass --batch)", file=sys.stderr)
+        sys.exit(1)
+    try:
+        spec = _search_spec(args.query, defaults)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+    result = _search_all(base_dir, db_path, [spec])[0]
+    if "error" in result:
+        print(f"Error: search failed: {result['error']}", file=sys.stderr)
+        sys.exit(1)
+    rows = result["rows"]
+
     if args.json:
-        print(json.dumps([
-            {
-                "rank": i + 1,
-                # bm25 returns negative scores; invert so larger = better.
-                "score": round(-r[9], 4),
-                "dir_path": r[0],
-                "title": r[1],
-                "author": r[2],
-                "source_type": r[3],
-                "date": r[4],
-                "tags": r[5].split() if r[5] else [],
-                "pdf_path": r[6],
-                "md_path": r[7],
-                "snippet": r[8],
-            }
-            for i, r in enumerate(rows)
-        ], ensure_ascii=False, indent=2))
+        payload: Any = _search_result_json(rows)
+        if args.facets:
+            payload = {"results": payload, "facets": result["facets"]}
+        print(json.dumps(payload, ensure_ascii=False, indent=2))
         return
 
     if not rows:
         print("No matches.")
-        return
-
     for i, r in enumerate(rows):
         score = -r[9]
         tags = r[5] or ""
@@ -2951,6 +6663,12 @@ def cmd_search(args: argparse.Namespace) -> None:
         if r[8]:
             print(f"     {r[8]}")
 
+    if args.facets and rows:
+        print("\nFacets:")
+        for facet, counts in result["facets"].items():
+            if counts:
+                print(f"  {facet}: " + ", ".join(f"{v} ({c})" for v, c in counts))
+
 
 # ---------------------------------------------------------------------------
 # Related subcommand
@@ -2979,13 +6697,21 @@ def _resolve_entry_dirpath(base_dir: Path, entry: str) -> str | None:
     return None
 
 
+def _related_items(conn: sqlite3.Connection, dir_path: str) -> list[dict[str, Any]]:
+    """Stored related entries for ``dir_path`` (empty when it has none)."""
+    row = conn.execute(
+        "SELECT related FROM wisdom_related WHERE dir_path = ?", (dir_path,)
+    ).fetchone()
+    return json.loads(row[0]) if row else []
+
+
 def cmd_related(args: argparse.Namespace) -> None:
     """Print precomputed related entries for a given wisdom entry."""
     base_dir = detect_base_dir()
-    cache_path = base_dir / _RELATED_CACHE_NAME
-    if not cache_path.is_file():
+    db_path = _resolve_search_db(base_dir)
+    if not db_path.is_file():
         print(
-            f"Error: Related cache not found at {cache_path}.\n"
+            f"Error: Search index not found at {db_path}.\n"
             f"Run: wisdom.py index",
             file=sys.stderr,
         )
@@ -2996,13 +6722,24 @@ def cmd_related(args: argparse.Namespace) -> None:
         print(f"Error: Could not resolve entry '{args.entry}' inside {base_dir}", file=sys.stderr)
         sys.exit(1)
 
-    try:
-        cache = json.loads(cache_path.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError) as exc:
-        print(f"Error: could not read related cache: {exc}", file=sys.stderr)
-        sys.exit(1)
+    reply = _serve_request(base_dir, {"op": "related", "dir_path": dir_path})
+    if reply is not None and reply.get("ok"):
+        items = reply["related"]
+    else:
+        try:
+            conn = sqlite3.connect(db_path)
+            try:
+                items = _related_items(conn, dir_path)
+            finally:
+                conn.close()
+        except (sqlite3.Error, json.JSONDecodeError) as exc:
+            print(
+                f"Error: could not read related entries: {exc}\n"
+                f"Run: wisdom.py index",
+                file=sys.stderr,
+            )
+            sys.exit(1)
 
-    items = cache.get(dir_path, [])
     if args.by != "hybrid":
         items = [it for it in items if it.get("why") in (args.by, "both")]
     items = items[: args.top]
@@ -3036,21 +6773,34 @@ def cmd_related(args: argparse.Namespace) -> None:
 # Tags subcommand (list, --warnings, --merge)
 # ---------------------------------------------------------------------------
 
-def _collect_tag_freq(base_dir: Path) -> tuple[dict[str, int], list[Path]]:
+def _collect_tag_freq(
+    base_dir: Path, *, workers: int | None = None,
+) -> tuple[dict[str, int], list[Path]]:
     """Walk the corpus and tally tag occurrences.
 
     Tags are deduplicated within each entry so frequency reflects the
     number of entries that mention a tag, not the number of mentions.
+    Raw frontmatter tags come from the corpus scan (manifest-cached, parsed
+    in parallel per ``workers``), so unchanged files are not re-read.
     """
+    _, scanned, _ = _scan_corpus(
+        base_dir, _load_manifest(base_dir), reverse=False, workers=workers,
+    )
+    return _tag_freq_from_scan(base_dir, scanned)
+
+
+def _tag_freq_from_scan(
+    base_dir: Path, scanned: dict[str, Any],
+) -> tuple[dict[str, int], list[Path]]:
+    """Tally per-entry-deduplicated tags from a _scan_corpus manifest."""
     freq: dict[str, int] = {}
     files: list[Path] = []
-    for md_file in sorted(base_dir.glob("*/*analysis.md")):
-        fm = _parse_frontmatter(md_file)
-        if not fm:
+    for key, item in sorted(scanned["files"].items()):
+        if item.get("record") is None:
             continue
-        files.append(md_file)
+        files.append(base_dir / key)
         seen_in_entry: set[str] = set()
-        for t in _fm_list(fm, "tags"):
+        for t in item.get("fm_tags", []):
             t_norm = t.strip().lower()
             if not t_norm or t_norm in seen_in_entry:
                 continue
@@ -3108,7 +6858,7 @@ def cmd_tags(args: argparse.Namespace) -> None:
             print("Error: --merge value is empty", file=sys.stderr)
             sys.exit(1)
         target = args.target.strip().lower()
-        _, files = _collect_tag_freq(base_dir)
+        _, files = _collect_tag_freq(base_dir, workers=args.workers)
         changed = 0
         for md in files:
             try:
@@ -3120,7 +6870,11 @@ def cmd_tags(args: argparse.Namespace) -> None:
               f"Run `wisdom.py index` to refresh search and related data.")
         return
 
-    freq, _ = _collect_tag_freq(base_dir)
+    reply = _serve_request(base_dir, {"op": "tags"})
+    if reply is not None and reply.get("ok"):
+        freq = reply["tags"]
+    else:
+        freq, _ = _collect_tag_freq(base_dir, workers=args.workers)
 
     if args.warnings:
         sprawl = _detect_tag_sprawl(freq)
@@ -3152,6 +6906,359 @@ def cmd_tags(args: argparse.Namespace) -> None:
         print(f"{count:>4}\t{tag}")
 
 
+# ---------------------------------------------------------------------------
+# Serve subcommand (warm query server)
+# ---------------------------------------------------------------------------
+
+# `serve` keeps the search database connection (which also holds related
+# entries) and tag frequencies loaded behind a Unix socket so `search`,
+# `related` and `tags` skip the cold start.
+# Clients fall back to direct access whenever the server is absent, stale or
+# errors. Set _SERVE_ENV_VAR to "false" to never contact a server.
+_SERVE_SOCKET_NAME = "wisdom-serve.sock"
+_SERVE_ENV_VAR = "EXTRACT_WISDOM_SERVE"
+_SERVE_CONNECT_TIMEOUT = 0.25  # seconds
+_SERVE_REQUEST_TIMEOUT = 30  # seconds
+_SERVE_IDLE_TIMEOUT = 1800  # seconds; 0 serves until stopped
+_SERVE_MAX_REQUEST = 1024 * 1024  # bytes
+# PDF jobs (`pdf`, `regenerate-pdfs`) render in a process pool the server keeps
+# warm (weasyprint imported, stylesheet parsed), sent _SERVE_PDF_CHUNK at a time.
+# The server acknowledges a job once it is queued and replies again when it is
+# rendered; clients wait up to a per-file allowance (the job's own timeout or
+# _SERVE_PDF_TIMEOUT, plus _PDF_TIMEOUT_GRACE_S) times the job's file count.
+_SERVE_PDF_TIMEOUT = 900  # seconds per file without a per-file timeout
+_SERVE_PDF_CHUNK = 32
+
+
+def _serve_socket_path(base_dir: Path) -> Path:
+    """Socket path for ``base_dir``: inside it when the path fits the
+    AF_UNIX limit (~104 bytes), else a per-directory name in the temp dir."""
+    path = base_dir / _SERVE_SOCKET_NAME
+    if len(os.fsencode(path)) < 100:
+        return path
+    digest = hashlib.sha256(os.fsencode(base_dir.resolve())).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"wisdom-serve-{digest}.sock"
+
+
+def _recv_line(sock: socket.socket) -> bytes:
+    """Read one newline-terminated message (without the newline)."""
+    buf = bytearray()
+    while not buf.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        buf += chunk
+        if len(buf) > _SERVE_MAX_REQUEST and b"\n" not in chunk:
+            raise ValueError("message too large")
+    return bytes(buf).rstrip(b"\n")
+
+
+def _serve_request(
+    base_dir: Path, payload: dict[str, Any], *, timeout: float = _SERVE_REQUEST_TIMEOUT,
+) -> dict[str, Any] | None:
+    """Send one request to a running `serve` process for ``base_dir``.
+
+    Returns the decoded reply, or None when no server answers (no socket,
+    connection refused, timeout, malformed reply) so the caller can fall back
+    to direct access.
+    """
+    if os.environ.get(_SERVE_ENV_VAR, "").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    path = _serve_socket_path(base_dir)
+    if not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(_SERVE_CONNECT_TIMEOUT)
+            sock.connect(str(path))
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(payload).encode() + b"\n")
+            reply = json.loads(_recv_line(sock))
+    except (OSError, ValueError):
+        return None
+    return reply if isinstance(reply, dict) else None
+
+
+def _serve_pdf_request(
+    base_dir: Path, jobs: list[list[Any]], per_file_timeout: float | None,
+) -> dict[str, Any] | None:
+    """Send PDF jobs to a running `serve` process and wait for the renders.
+
+    Returns None when no server accepted the jobs, so the caller can render
+    them itself. Once the server has acknowledged them it is rendering those
+    files, so rendering them locally too would race it on the same outputs:
+    the reply is then the server's result, or {"ok": False, "accepted": True}
+    when it does not arrive within the allowance (see _SERVE_PDF_TIMEOUT).
+    """
+    if os.environ.get(_SERVE_ENV_VAR, "").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    path = _serve_socket_path(base_dir)
+    if not path.exists():
+        return None
+    allowance = len(jobs) * ((per_file_timeout or _SERVE_PDF_TIMEOUT) + _PDF_TIMEOUT_GRACE_S)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(_SERVE_CONNECT_TIMEOUT)
+            sock.connect(str(path))
+            sock.settimeout(_SERVE_REQUEST_TIMEOUT)
+            sock.sendall(json.dumps({"op": "pdf", "jobs": jobs}).encode() + b"\n")
+            ack = json.loads(_recv_line(sock))
+            if not isinstance(ack, dict) or not ack.get("accepted"):
+                return ack if isinstance(ack, dict) else None
+            sock.settimeout(allowance)
+            try:
+                reply = json.loads(_recv_line(sock))
+            except (OSError, ValueError) as exc:
+                return {"ok": False, "accepted": True,
+                        "error": f"no result within {allowance:.0f}s ({exc or 'connection closed'})"}
+    except (OSError, ValueError):
+        return None
+    if not isinstance(reply, dict):
+        return {"ok": False, "accepted": True, "error": "malformed reply"}
+    return reply
+
+
+def _file_key(path: Path) -> tuple[int, int, int] | None:
+    """(inode, mtime_ns, size) of ``path``, or None when it is missing."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _serve_handle(
+    base_dir: Path, state: dict[str, Any], request: dict[str, Any],
+) -> dict[str, Any]:
+    """Answer one server request, reloading any warm data whose file changed.
+
+    The search connection (which also serves related entries) is reopened
+    when the database file is replaced; in-place updates are visible to the
+    open connection. Tag frequencies come from a corpus scan against the
+    in-memory manifest, so only changed files are re-read. PDF jobs are
+    answered by _serve_pdf instead.
+    """
+    op = request.get("op")
+    if op in ("ping", "stop"):
+        return {"ok": True, "base_dir": str(base_dir), "pid": os.getpid()}
+
+    if op in ("search", "related"):
+        db_path = _resolve_search_db(base_dir)
+        key = _file_key(db_path)
+        if key is None:
+            return {"ok": False, "error": "search index not found"}
+        if state.get("db_key", (None,))[0] != key[0]:
+            if state.get("conn") is not None:
+                state["conn"].close()
+            state["conn"] = sqlite3.connect(db_path)
+            state["db_key"] = key
+        try:
+            if op == "related":
+                return {"ok": True, "related": _related_items(state["conn"], str(request.get("dir_path")))}
+            return {"ok": True, "results": _run_searches(state["conn"], list(request["queries"]))}
+        except (sqlite3.Error, KeyError, TypeError, ValueError) as exc:
+            return {"ok": False, "error": str(exc)}
+
+    if op == "tags":
+        manifest = state.get("manifest")
+        if manifest is None:
+            manifest = _load_manifest(base_dir)
+        _, state["manifest"], _ = _scan_corpus(base_dir, manifest, reverse=False)
+        freq, _ = _tag_freq_from_scan(base_dir, state["manifest"])
+        return {"ok": True, "tags": freq}
+
+    return {"ok": False, "error": f"unknown op: {op!r}"}
+
+
+def _serve_pdf(state: dict[str, Any], request: dict[str, Any], conn: socket.socket) -> None:
+    """Queue a PDF job on the server's render pool and answer it off the
+    accept loop, which stays free for other requests meanwhile.
+
+    A job is a list of [md_path, pdf_path, css_path, stamp] lists, each with
+    an optional per-file timeout and profile flag. The pool is started on
+    first use and kept for the server's lifetime. Once every file is queued
+    the client gets {"ok": true, "accepted": n}; a thread then waits for the
+    renders, sends {"ok": true, "results": [...]} in job order and closes
+    ``conn``. A worker crash is reported for the files it took down and the
+    pool is replaced for later jobs.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    def _send(reply: dict[str, Any]) -> None:
+        try:
+            conn.sendall(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+        except OSError:
+            pass
+
+    try:
+        # [md, out, css, stamp] plus optional per-file timeout and profile flag.
+        jobs = [
+            (str(md), str(out), str(css), bool(stamp),
+             float(rest[0]) if rest and rest[0] else None, bool(rest[1:2] and rest[1]))
+            for md, out, css, stamp, *rest in request["jobs"]
+        ]
+    except (KeyError, TypeError, ValueError) as exc:
+        _send({"ok": False, "error": str(exc)})
+        conn.close()
+        return
+
+    with state["pdf_lock"]:
+        if state.get("pdf_pool") is None:
+            state["pdf_pool"] = ProcessPoolExecutor(
+                max_workers=state["pdf_workers"], initializer=_pdf_worker_warm,
+            )
+        pool = state["pdf_pool"]
+        try:
+            futures = [pool.submit(_render_pdf_worker, *job) for job in jobs]
+        except (BrokenProcessPool, RuntimeError) as exc:
+            state.pop("pdf_pool").shutdown(wait=False, cancel_futures=True)
+            _send({"ok": False, "error": f"render pool failed: {exc}"})
+            conn.close()
+            return
+    _send({"ok": True, "accepted": len(jobs)})
+
+    def _reply() -> None:
+        results = []
+        for job, fut in zip(jobs, futures):
+            try:
+                results.append(fut.result())
+            except BrokenProcessPool as exc:
+                with state["pdf_lock"]:
+                    if state.get("pdf_pool") is pool:
+                        state.pop("pdf_pool").shutdown(wait=False, cancel_futures=True)
+                results.append((job[1], {}, f"render worker died: {exc}", None))
+            except Exception as exc:
+                # CancelledError when the server stops with the job queued.
+                results.append((job[1], {}, f"render cancelled: {exc or 'server stopped'}", None))
+        with conn:
+            _send({"ok": True, "results": results})
+
+    thread = threading.Thread(target=_reply, daemon=True)
+    thread.start()
+    state["pdf_threads"].append(thread)
+
+
+def _serve_forever(base_dir: Path, sock_path: Path, idle: float, pdf_workers: int) -> None:
+    """Accept one request per connection until stopped or idle for ``idle``
+    seconds (PDF jobs still rendering count as activity), then remove the
+    socket (if it is still ours)."""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(str(sock_path))
+    finally:
+        os.umask(old_umask)
+    own_key = _file_key(sock_path)
+    server.listen(16)
+    server.settimeout(idle or None)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    state: dict[str, Any] = {
+        "pdf_workers": pdf_workers, "pdf_lock": threading.Lock(), "pdf_threads": [],
+    }
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except TimeoutError:
+                state["pdf_threads"] = [t for t in state["pdf_threads"] if t.is_alive()]
+                if state["pdf_threads"]:
+                    continue
+                break
+            with conn:
+                conn.settimeout(_SERVE_REQUEST_TIMEOUT)
+                try:
+                    request = json.loads(_recv_line(conn))
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be an object")
+                except (OSError, ValueError):
+                    continue
+                if request.get("op") == "pdf":
+                    # The reply thread owns (and closes) the duplicate.
+                    _serve_pdf(state, request, conn.dup())
+                    continue
+                try:
+                    reply = _serve_handle(base_dir, state, request)
+                except Exception as exc:
+                    reply = {"ok": False, "error": str(exc)}
+                try:
+                    conn.sendall(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+                except OSError:
+                    pass
+            if request.get("op") == "stop":
+                break
+    finally:
+        server.close()
+        if state.get("conn") is not None:
+            state["conn"].close()
+        if state.get("pdf_pool") is not None:
+            # Queued renders are cancelled, running ones finish, and every
+            # PDF job still gets its reply before the server exits.
+            state["pdf_pool"].shutdown(cancel_futures=True)
+        for thread in state["pdf_threads"]:
+            thread.join()
+        if own_key is not None and _file_key(sock_path) == own_key:
+            sock_path.unlink(missing_ok=True)
+
+
+def cmd_serve(args: argparse.Namespace) -> None:
+    """Run, query or stop the warm query server for the wisdom base."""
+    base_dir = detect_base_dir()
+    if not base_dir.is_dir():
+        print(f"Error: wisdom base directory not found: {base_dir}", file=sys.stderr)
+        sys.exit(1)
+    sock_path = _serve_socket_path(base_dir)
+    running = _serve_request(base_dir, {"op": "ping"})
+
+    if args.status or args.stop:
+        if running is None:
+            print(f"No server running for {base_dir}")
+            if args.status:
+                sys.exit(1)
+            return
+        if args.stop:
+            _serve_request(base_dir, {"op": "stop"})
+            print(f"Stopped server (pid {running.get('pid')}) for {base_dir}")
+        else:
+            print(f"Serving {base_dir} on {sock_path} (pid {running.get('pid')})")
+        return
+
+    if running is not None:
+        print(f"Error: a server is already running for {base_dir} (pid {running.get('pid')})",
+              file=sys.stderr)
+        sys.exit(1)
+    # Nothing answered, so any socket file left behind is stale.
+    sock_path.unlink(missing_ok=True)
+    pdf_workers = args.pdf_workers if args.pdf_workers else max(1, (os.cpu_count() or 1) - 2)
+
+    if args.detach:
+        pid = os.fork()
+        if pid:
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                reply = _serve_request(base_dir, {"op": "ping"})
+                if reply is not None:
+                    print(f"Serving {base_dir} on {sock_path} (pid {reply.get('pid')})")
+                    return
+                time.sleep(0.05)
+            print("Error: server did not start", file=sys.stderr)
+            sys.exit(1)
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        try:
+            _serve_forever(base_dir, sock_path, args.idle, pdf_workers)
+        finally:
+            os._exit(0)
+
+    print(f"Serving {base_dir} on {sock_path} (Ctrl-C to stop)", file=sys.stderr)
+    try:
+        _serve_forever(base_dir, sock_path, args.idle, pdf_workers)
+    except KeyboardInterrupt:
+        pass
+
+
 # A top-level frontmatter key naming a source: ``source``, ``source_alt``,
 # ``companion_source`` etc. ``source_type`` and the ``sources`` list target are
 # excluded by the caller so they are not folded into themselves.
@@ -3276,7 +7383,22 @@ def main() -> None:
 
     # transcript
     p_transcript = sub.add_parser("transcript", help="Download YouTube transcript")
-    p_transcript.add_argument("url", help="YouTube video URL")
+    p_transcript.add_argument(
+        "urls", nargs="*", metavar="url",
+        help="YouTube video URL; several URLs, or a playlist or channel URL, run as a batch",
+    )
+    p_transcript.add_argument(
+        "--batch", metavar="FILE",
+        help="Also read URLs from FILE, one per line ('-' for stdin)",
+    )
+    p_transcript.add_argument(
+        "--workers", type=int, default=None,
+        help=f"Videos downloaded at once in batch mode (default: {_TRANSCRIPT_WORKERS})",
+    )
+    p_transcript.add_argument(
+        "--job", metavar="FILE",
+        help=f"Batch job file recording progress (default: {_TRANSCRIPT_JOB_DIR}/<hash of inputs>.json)",
+    )
 
     # output-dir
     sub.add_parser("output-dir", help="Print resolved output directory")
@@ -3301,6 +7423,8 @@ def main() -> None:
     p_pdf.add_argument("--open", action="store_true", dest="open_after", help="Open PDF after rendering")
     p_pdf.add_argument("--no-stamp", action="store_true", dest="no_stamp",
                        help="Skip stamping today's date as the analysis date")
+    p_pdf.add_argument("--profile", metavar="REPORT", default=None,
+                       help="Write per-stage render timings to REPORT (.json or .csv)")
     p_pdf.add_argument("input_file", nargs="?", default=None, help="Markdown file to render")
     p_pdf.add_argument("output_file", nargs="?", default=None, help="Output PDF path")
 
@@ -3315,9 +7439,26 @@ def main() -> None:
     p_regen.add_argument("--workers", type=int, default=None,
                          help="Number of parallel worker processes "
                               "(default: max(1, cpu_count - 2); use 1 for sequential)")
+    p_regen.add_argument("--skip-unchanged", action="store_true",
+                         help="Skip PDFs whose markdown, CSS, template and renderer "
+                              "are unchanged since they were last rendered")
+    p_regen.add_argument("--profile", metavar="REPORT", default=None,
+                         help="Write per-stage render timings to REPORT (.json, or .csv "
+                              "for one row per document) and print p50/p95 per stage")
+    p_regen.add_argument("--timeout", type=float, default=_PDF_RENDER_TIMEOUT_S,
+                         help="Abandon and report a file whose render takes longer than "
+                              f"this many seconds (default: {_PDF_RENDER_TIMEOUT_S:g}; 0 disables)")
 
     p_index = sub.add_parser("index", help="Regenerate the wisdom library index.html")
     p_index.add_argument("base_dir", nargs="?", default=None, help="Wisdom base directory (default: auto-detect)")
+    p_index.add_argument("--full", action="store_true",
+                         help="Ignore the corpus manifest and rebuild everything from scratch")
+    p_index.add_argument("--workers", type=int, default=None,
+                         help="Processes for parsing changed analysis files (default: "
+                              f"cpu_count - 2 once {_SCAN_PARALLEL_MIN}+ files changed; 1 for sequential)")
+    p_index.add_argument("--related-json", action="store_true",
+                         help=f"Also export related entries to {_RELATED_CACHE_NAME} "
+                              f"(default: {_RELATED_JSON_ENV_VAR}, off)")
 
     # epub
     p_epub = sub.add_parser("epub", help="Bind the whole corpus into a single .epub ebook")
@@ -3329,6 +7470,9 @@ def main() -> None:
     p_epub.add_argument("--kindle", action="store_true",
                         help="Also emit a native Kindle .azw3 via calibre (if installed)")
     p_epub.add_argument("--open", action="store_true", dest="open_after", help="Open the ebook after building")
+    p_epub.add_argument("--workers", type=int, default=None,
+                        help="Processes for parsing changed analysis files and rendering "
+                             "uncached chapters (default: auto; 1 for sequential)")
 
     # migrate-sources
     p_migrate = sub.add_parser("migrate-sources",
@@ -3343,13 +7487,32 @@ def main() -> None:
     p_backfill.add_argument("directory", nargs="?", default=None, help="Specific entry directory to backfill")
     p_backfill.add_argument("--all", action="store_true", help="Backfill all YouTube entries")
     p_backfill.add_argument("--force", action="store_true", help="Re-fetch metadata and overwrite existing fields")
+    p_backfill.add_argument(
+        "--workers", type=int, default=None,
+        help=f"Entries enriched at once (default: {_BACKFILL_WORKERS})",
+    )
+    p_backfill.add_argument(
+        "--per-host", type=int, default=None,
+        help=f"Concurrent requests to any one host (default: {_HTTP_PER_HOST})",
+    )
 
     # search
     p_search = sub.add_parser("search", help="Search the wisdom corpus via FTS5/BM25")
-    p_search.add_argument("query", help="Search query (whitespace-separated terms; trailing * for prefix match)")
+    p_search.add_argument("query", nargs="?", default=None,
+                          help="Search query (whitespace-separated terms; trailing * for prefix match)")
     p_search.add_argument("--top", type=int, default=10, help="Maximum results to return (default 10)")
     p_search.add_argument("--type", choices=("youtube", "web", "text"), default=None,
                           help="Restrict to a single source type")
+    p_search.add_argument("--since", default=None, metavar="DATE",
+                          help="Only entries dated on/after DATE (YYYY, YYYY-MM or YYYY-MM-DD)")
+    p_search.add_argument("--until", default=None, metavar="DATE",
+                          help="Only entries dated on/before DATE (YYYY, YYYY-MM or YYYY-MM-DD)")
+    p_search.add_argument("--facets", action="store_true",
+                          help="Also count all matches by tag, source type and year")
+    p_search.add_argument("--no-snippet", action="store_true",
+                          help="Skip snippet generation (faster when only IDs are needed)")
+    p_search.add_argument("--batch", action="store_true",
+                          help="Read JSONL queries from stdin and write one JSON result per line")
     p_search.add_argument("--json", action="store_true", help="Output JSON instead of text")
 
     # related
@@ -3369,6 +7532,18 @@ def main() -> None:
     p_tags.add_argument("--merge", default=None, metavar="OLD[,OLD2]",
                         help="Comma-separated tags to rewrite to TARGET across all entries")
     p_tags.add_argument("--json", action="store_true", help="Output JSON instead of text")
+    p_tags.add_argument("--workers", type=int, default=None,
+                        help="Processes for parsing changed analysis files (default: auto; 1 for sequential)")
+
+    # serve
+    p_serve = sub.add_parser("serve", help="Keep search/related/tags data and PDF renderers warm behind a local socket")
+    p_serve.add_argument("--detach", action="store_true", help="Run in the background and return once listening")
+    p_serve.add_argument("--idle", type=float, default=_SERVE_IDLE_TIMEOUT,
+                         help=f"Exit after this many idle seconds (default {_SERVE_IDLE_TIMEOUT}; 0 = never)")
+    p_serve.add_argument("--pdf-workers", type=int, default=None,
+                         help="Render processes kept warm for pdf/regenerate-pdfs (default: cpu_count - 2)")
+    p_serve.add_argument("--status", action="store_true", help="Report whether a server is running")
+    p_serve.add_argument("--stop", action="store_true", help="Stop the running server")
 
     args = parser.parse_args()
 
@@ -3387,6 +7562,7 @@ def main() -> None:
         "search": cmd_search,
         "related": cmd_related,
         "tags": cmd_tags,
+        "serve": cmd_serve,
     }
     dispatch[args.command](args)
 
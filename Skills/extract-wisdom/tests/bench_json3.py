@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Benchmark the streaming json3 subtitle parser against the json.loads one
+it replaced, on a synthetic livestream caption file.
+
+The file mimics YouTube's auto-generated json3: window styles and positions
+up front, then per cue a window event, an event with one seg per word, and an
+aAppend newline event. ``--replay`` adds that fraction of exact repeated cues,
+as re-muxed livestream captions contain. Each parser runs in its own process
+so its peak RSS is measured alone.
+
+Run: python3 tests/bench_json3.py [--hours 10] [--replay 0.02] [--keep FILE]
+"""
+
+import argparse
+import json
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+
+WORDS = (
+    "the of and to a in that is it you for on with as was this but be have we so "
+    "know like just what about really think going can"
+).split()
+
+HEADER = {
+    "wireMagic": "pb3",
+    "pens": [{}],
+    "wsWinStyles": [{}, {"mhModeHint": 2, "juJustifCode": 0, "sdScrollDir": 3}],
+    "wpWinPositions": [{}, {"apPoint": 6, "ahHorPos": 20, "avVerPos": 100, "rcRows": 2, "ccCols": 40}],
+}
+
+
+def write_synthetic_json3(path: Path, hours: float, *, replay: float = 0.0, seed: int = 0) -> int:
+    """Write ``hours`` of synthetic captions to ``path``; return the event count."""
+    rnd = random.Random(seed)
+    end_ms = int(hours * 3600 * 1000)
+    head = json.dumps(HEADER, separators=(",", ":"))
+    count = 0
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(head[:-1] + ',"events":[')
+        t = 0
+        while t < end_ms:
+            dur = rnd.randint(1500, 4000)
+            segs = [{"utf8": rnd.choice(WORDS)}] + [
+                {"utf8": " " + rnd.choice(WORDS), "tOffsetMs": 200 * i, "acAsrConf": 0}
+                for i in range(1, rnd.randint(3, 9))
+            ]
+            cue = {"tStartMs": t, "dDurationMs": dur, "wWinId": 1, "segs": segs}
+            events = [
+                {"tStartMs": t, "dDurationMs": dur, "id": 1, "wpWinPosId": 1, "wsWinStyleId": 1},
+                cue,
+                {"tStartMs": t + dur - 10, "dDurationMs": 10, "wWinId": 1, "aAppend": 1,
+                 "segs": [{"utf8": "\n"}]},
+            ]
+            if replay and rnd.random() < replay:
+                events.insert(2, cue)
+            for event in events:
+                out.write(("," if count else "") + json.dumps(event, separators=(",", ":")))
+                count += 1
+            t += dur + rnd.choice([0, 0, 0, 100, 3000])
+        out.write("]}")
+    return count
+
+
+def reference_json3_to_text(json3_path: Path, paragraph_gap_ms: int = 2500) -> str:
+    """The json.loads parser _json3_to_text used before streaming."""
+    data = json.loads(json3_path.read_text(encoding="utf-8"))
+    entries: list[tuple[int, str]] = []
+    for event in data.get("events", []):
+        segs = event.get("segs")
+        if not segs:
+            continue
+        text = "".join(seg.get("utf8", "") for seg in segs)
+        t = event.get("tStartMs", 0)
+        entries.append((t, text))
+
+    prev_t = 0
+    parts: list[str] = []
+    for t, text in entries:
+        if not re.sub(r"\s+", "", text):
+            continue
+        if parts and (t - prev_t) > paragraph_gap_ms:
+            parts.append("\n\n")
+        parts.append(text)
+        prev_t = t
+
+    raw = "".join(parts)
+    raw = re.sub(r"[ \t]+", " ", raw)
+    raw = re.sub(r"\n ", "\n", raw)
+    raw = re.sub(r" \n", "\n", raw)
+    return raw.strip()
+
+
+def _run(parser: str, src: Path, dest: Path) -> None:
+    """Child process: convert src with one parser, print seconds and peak RSS."""
+    sys.path.insert(0, str(SCRIPTS))
+    import wisdom  # pyright: ignore[reportMissingImports]
+
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if parser == "old":
+        dest.write_text(reference_json3_to_text(src, wisdom.PARAGRAPH_GAP_MS), encoding="utf-8")
+    else:
+        wisdom._json3_to_file(src, dest)
+    seconds = time.perf_counter() - started
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    print(json.dumps({"seconds": seconds,
+                      "rss_mib": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base) * scale / 2**20}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hours", type=float, default=10.0)
+    parser.add_argument("--replay", type=float, default=0.0,
+                        help="Fraction of cues repeated exactly (default 0)")
+    parser.add_argument("--keep", help="Write the synthetic file here and keep it")
+    parser.add_argument("--run", nargs=3, metavar=("PARSER", "SRC", "DEST"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        _run(args.run[0], Path(args.run[1]), Path(args.run[2]))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(args.keep) if args.keep else Path(tmp) / "captions.json3"
+        events = write_synthetic_json3(src, args.hours, replay=args.replay)
+        print(f"{args.hours:g} h, {events} events, {src.stat().st_size / 2**20:.1f} MiB")
+        outputs = {}
+        for name in ("old", "new"):
+            dest = Path(tmp) / f"{name}.txt"
+            proc = subprocess.run(
+                [sys.executable, __file__, "--run", name, str(src), str(dest)],
+                capture_output=True, text=True, check=True,
+            )
+            result = json.loads(proc.stdout)
+            outputs[name] = dest.read_bytes()
+            print(f"  {name}: {result['seconds']:.2f}s, peak RSS +{result['rss_mib']:.0f} MiB")
+        if outputs["old"] == outputs["new"]:
+            print("  output: identical")
+        else:
+            print(f"  output: differs ({len(outputs['old'])} vs {len(outputs['new'])} bytes"
+                  + (", replayed cues removed)" if args.replay else ")"))
+
+
+if __name__ == "__main__":
+    main()
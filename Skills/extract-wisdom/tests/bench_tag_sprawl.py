@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark the blocked tag-sprawl check against the all-pairs scan it
+replaced, on synthetic tag vocabularies of growing size.
+
+A vocabulary is random kebab-case words plus the variants sprawl produces:
+plurals, a changed vowel, a dropped last letter. The all-pairs scan is
+quadratic, so it is skipped above ``--all-pairs-max`` tags.
+
+Run: python3 tests/bench_tag_sprawl.py [--sizes 500 1000 2000] [--all-pairs-max 2000]
+"""
+
+import argparse
+import difflib
+import random
+import sys
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+
+LETTERS = "abcdefghiklmnoprstuvwy"
+VOWELS = "aeiou"
+
+
+def synthetic_tags(count: int, *, seed: int = 0) -> dict[str, int]:
+    """About ``count`` distinct tags mapped to usage counts."""
+    rng = random.Random(seed)
+    tags: dict[str, int] = {}
+    while len(tags) < count:
+        word = "-".join(
+            "".join(rng.choices(LETTERS, k=rng.randint(2, 9)))
+            for _ in range(rng.choice([1, 1, 2, 2, 3]))
+        )
+        tags.setdefault(word, rng.randint(1, 40))
+        r = rng.random()
+        if r < 0.15:
+            tags.setdefault(word + "s", rng.randint(1, 5))
+        elif r < 0.25:
+            spots = [k for k, ch in enumerate(word) if ch in VOWELS]
+            if spots:
+                k = rng.choice(spots)
+                tags.setdefault(word[:k] + rng.choice(VOWELS) + word[k + 1:], rng.randint(1, 5))
+        elif r < 0.3 and len(word) > 4:
+            tags.setdefault(word[:-1], rng.randint(1, 5))
+    return tags
+
+
+def reference_detect_tag_sprawl(
+    tag_freq: dict[str, int], ratio_threshold: float = 0.82,
+) -> list[tuple[str, int, str, int]]:
+    """The all-pairs _detect_tag_sprawl before candidate blocking."""
+    tags = list(tag_freq.keys())
+    seen: set[tuple[str, str]] = set()
+    pairs: list[tuple[str, int, str, int]] = []
+    for i, a in enumerate(tags):
+        for b in tags[i + 1:]:
+            if a == b:
+                continue
+            similar = False
+            if min(len(a), len(b)) >= 4:
+                ratio = difflib.SequenceMatcher(a=a, b=b, autojunk=False).ratio()
+                if ratio >= ratio_threshold:
+                    similar = True
+            else:
+                short, long = (a, b) if len(a) <= len(b) else (b, a)
+                if short != long:
+                    parts = long.split("-")
+                    if short in parts or parts[0].startswith(short):
+                        similar = True
+            if not similar:
+                continue
+            key = tuple(sorted((a, b)))
+            if key in seen:
+                continue
+            seen.add(key)
+            ca, cb = tag_freq[a], tag_freq[b]
+            if ca >= cb:
+                pairs.append((a, ca, b, cb))
+            else:
+                pairs.append((b, cb, a, ca))
+    pairs.sort(key=lambda p: (-p[1], -p[3]))
+    return pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000, 5000])
+    parser.add_argument("--all-pairs-max", type=int, default=2000,
+                        help="Largest vocabulary to run the all-pairs scan on (default 2000)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(SCRIPTS))
+    import wisdom  # pyright: ignore[reportMissingImports]
+
+    print(f"{'tags':>6} {'pairs':>7} {'all-pairs':>10} {'blocked':>9}  output")
+    for size in args.sizes:
+        tag_freq = synthetic_tags(size, seed=size)
+        started = time.perf_counter()
+        blocked = wisdom._detect_tag_sprawl(tag_freq)
+        blocked_s = time.perf_counter() - started
+        if size <= args.all_pairs_max:
+            started = time.perf_counter()
+            reference = reference_detect_tag_sprawl(tag_freq, wisdom._TAG_SPRAWL_RATIO)
+            all_pairs = f"{time.perf_counter() - started:9.2f}s"
+            verdict = "identical" if reference == blocked else "DIFFERS"
+        else:
+            all_pairs, verdict = f"{'-':>10}", "-"
+        print(f"{len(tag_freq):>6} {len(blocked):>7} {all_pairs} {blocked_s:8.3f}s  {verdict}")
+
+
+if __name__ == "__main__":
+    main()
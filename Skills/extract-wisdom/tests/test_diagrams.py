@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Tests for diagram rendering and caching in scripts/wisdom.py.
+
+Renderer backends (mermaid-cli, mermaid.ink, the graphviz module) are
+replaced with stand-ins; the diagram cache lives in a temporary directory
+per test.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import os
+import sqlite3
+import struct
+import sys
+import tempfile
+import types
+import unittest
+import zlib
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+
+PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x10\x00\x00\x00\x08" + b"\x00" * 5
+JPEG = b"\xff\xd8\xff\xc0\x00\x11\x08\x00\x08\x00\x10\x03" + b"\x00" * 9 + b"\xff\xd9"
+
+
+def png_chunk(ctype: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + ctype + payload + struct.pack(">I", zlib.crc32(ctype + payload))
+
+
+def fake_png(marker: bytes) -> bytes:
+    """A structurally valid PNG whose IDAT data contains the bytes "IEND"."""
+    return (b"\x89PNG\r\n\x1a\n"
+            + png_chunk(b"IHDR", struct.pack(">IIBBBBB", 16, 8, 8, 2, 0, 0, 0))
+            + png_chunk(b"IDAT", b"\x00IEND\xaeB`\x82" + marker + b"IEND")
+            + png_chunk(b"IEND", b""))
+
+
+def fake_svg(name: str) -> bytes:
+    return (f'<?xml version="1.0"?>\n<svg width="10pt" height="5pt"><!-- {name} -->'
+            f"<text>&lt;/svg&gt;</text></svg>\n").encode()
+
+
+def mermaid_html(*sources: str) -> str:
+    return "".join(f'<pre><code class="language-mermaid">{s}</code></pre>' for s in sources)
+
+
+class CacheCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        for patcher in (
+            mock.patch.dict(os.environ, {wisdom._DIAGRAM_CACHE_ENV_VAR: str(self.dir)}),
+            mock.patch.dict(wisdom._diagram_cache_state, clear=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.close_cache)
+
+    def close_cache(self):
+        conn = wisdom._diagram_cache_state.get("conn")
+        if conn is not None:
+            conn.close()
+
+    def cached(self) -> dict[str, str]:
+        """Cache key -> MIME type of every stored diagram."""
+        with sqlite3.connect(self.dir / wisdom._DIAGRAM_CACHE_NAME) as conn:
+            return dict(conn.execute("SELECT key, mime FROM diagrams"))
+
+
+class MermaidBackendCacheTests(CacheCase):
+    def setUp(self):
+        super().setUp()
+        self.mmdc_calls: list[list[str]] = []
+        self.ink_calls: list[list[str]] = []
+
+        def mmdc(sources):
+            self.mmdc_calls.append(sources)
+            return [None if "Broken" in s else (PNG, "image/png", (6.0, 3.0)) for s in sources]
+
+        def ink(sources):
+            self.ink_calls.append(sources)
+            return [(JPEG, "image/jpeg", (12.0, 6.0)) for _ in sources]
+
+        for patcher in (
+            mock.patch.object(wisdom, "_MERMAID_BACKEND", "auto"),
+            mock.patch.object(wisdom, "_mermaid_backend", return_value="mmdc"),
+            mock.patch.object(wisdom, "_render_mermaid_ink_many", ink),
+            mock.patch.dict(wisdom._MERMAID_BACKENDS, {"mmdc": mmdc, "ink": ink}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def key(self, source: str, fmt: str) -> str:
+        return wisdom._diagram_cache_key("mermaid", wisdom._apply_mermaid_theme(source), fmt, None)
+
+    def test_render_mermaid_many_reports_the_producing_backend(self):
+        pairs = wisdom._render_mermaid_many(["graph TD; A", "graph TD; Broken"], "mmdc")
+        self.assertEqual([backend for _, backend in pairs], ["mmdc", "ink"])
+        self.assertEqual([result[1] for result, _ in pairs], ["image/png", "image/jpeg"])
+
+    def test_ink_fallback_is_cached_under_the_ink_key(self):
+        html, fallbacks = wisdom._render_diagrams(mermaid_html("graph TD; A", "graph TD; Broken"))
+        self.assertEqual(fallbacks, {})
+        self.assertEqual(self.cached(), {
+            self.key("graph TD; A", "mmdc"): "image/png",
+            self.key("graph TD; Broken", "img"): "image/jpeg",
+        })
+
+    def test_local_backend_never_serves_a_cached_fallback(self):
+        wisdom._render_diagrams(mermaid_html("graph TD; Broken"))
+        self.mmdc_calls.clear()
+        wisdom._render_diagrams(mermaid_html("graph TD; A", "graph TD; Broken"))
+        # The earlier fallback is no mmdc hit: mmdc gets another try at it.
+        self.assertEqual(len(self.mmdc_calls), 1)
+        self.assertEqual(len(self.mmdc_calls[0]), 2)
+
+    def test_ink_backend_reuses_a_cached_fallback(self):
+        wisdom._render_diagrams(mermaid_html("graph TD; Broken"))
+        self.ink_calls.clear()
+        with mock.patch.object(wisdom, "_mermaid_backend", return_value="ink"):
+            html, _ = wisdom._render_diagrams(mermaid_html("graph TD; Broken"))
+        self.assertEqual(self.ink_calls, [])
+        self.assertIn("image/jpeg", html)
+
+
+class SplitGraphvizOutputTests(unittest.TestCase):
+    def test_svg_documents_split_after_each_closing_tag(self):
+        svgs = [fake_svg(n) for n in ("a", "b", "c")]
+        self.assertEqual(wisdom._split_graphviz_output(b"".join(svgs), "svg"), svgs)
+        self.assertEqual(wisdom._split_graphviz_output(svgs[0], "svg"), svgs[:1])
+        self.assertEqual(wisdom._split_graphviz_output(b"", "svg"), [])
+
+    def test_png_chunk_walk_ignores_iend_bytes_inside_idat(self):
+        pngs = [fake_png(m) for m in (b"one", b"two", b"three")]
+        self.assertEqual(wisdom._split_graphviz_output(b"".join(pngs), "png"), pngs)
+
+    def test_truncated_or_trailing_png_data_is_dropped(self):
+        pngs = [fake_png(m) for m in (b"one", b"two")]
+        self.assertEqual(wisdom._split_graphviz_output(pngs[0] + pngs[1][:-6], "png"), pngs[:1])
+        self.assertEqual(wisdom._split_graphviz_output(pngs[0] + b"garbage", "png"), pngs[:1])
+        self.assertEqual(wisdom._split_graphviz_output(b"not a png", "png"), [])
+
+    def test_unknown_format_gives_no_parts(self):
+        self.assertEqual(wisdom._split_graphviz_output(fake_svg("a"), "pdf"), [])
+
+
+class GraphvizBatchTests(unittest.TestCase):
+    """_render_graphviz_batch over a stand-in ``graphviz`` module whose
+    ``dot`` stops at the first graph containing "broken", as a syntax error
+    stops dot's parser."""
+
+    def setUp(self):
+        self.pipes: list[str] = []
+        self.singles: list[str] = []
+
+        def render(code: str, fmt: str) -> bytes:
+            name = code.split()[1]
+            return fake_png(name.encode()) if fmt == "png" else fake_svg(name)
+
+        def pipe(engine, fmt, data):
+            text = data.decode()
+            self.pipes.append(text)
+            out = b""
+            for n, graph in enumerate(text.split("\ndigraph")):
+                graph = "digraph" + graph if n else graph
+                if "broken" in graph:
+                    break
+                out += render(graph, fmt)
+            return out
+
+        class Source:
+            def __init__(source, code):
+                source.code = code
+
+            def pipe(source, format):
+                self.singles.append(source.code)
+                if "broken" in source.code:
+                    raise RuntimeError("syntax error")
+                return render(source.code, format)
+
+        fake = types.SimpleNamespace(pipe=pipe, Source=Source)
+        patcher = mock.patch.dict(sys.modules, {"graphviz": fake, "pygraphviz": None})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.render = render
+
+    def test_one_dot_run_renders_every_graph(self):
+        sources = [f"digraph g{n} {{ a -> b }}" for n in range(3)]
+        results = wisdom._render_graphviz_batch(sources)
+        self.assertEqual(results, [self.render(s, "svg") for s in sources])
+        self.assertEqual((len(self.pipes), self.singles), (1, []))
+
+    def test_png_batch_carries_the_dpi(self):
+        sources = [f"digraph g{n} {{ a -> b }}" for n in range(2)]
+        results = wisdom._render_graphviz_batch(sources, fmt="png", dpi=200)
+        self.assertEqual(results, [self.render(s, "png") for s in sources])
+        self.assertEqual(self.pipes[0].count("graph [dpi=200];"), 2)
+
+    def test_part_count_mismatch_falls_back_per_graph(self):
+        sources = ["digraph g0 { a -> b }", "digraph broken { a -> }", "digraph g2 { c -> d }"]
+        results = wisdom._render_graphviz_batch(sources)
+        self.assertEqual(results, [self.render(sources[0], "svg"), None, self.render(sources[2], "svg")])
+        self.assertEqual(len(self.pipes), 1)
+        self.assertEqual(self.singles, sources)
+
+    def test_fallback_is_per_chunk(self):
+        sources = [f"digraph g{n} {{ a -> b }}" for n in range(5)]
+        sources[3] = "digraph broken { a -> }"
+        with mock.patch.object(wisdom, "_GRAPHVIZ_BATCH_SIZE", 2):
+            results = wisdom._render_graphviz_batch(sources)
+        self.assertEqual([r is not None for r in results], [True, True, True, False, True])
+        # Chunk [0, 1] splits cleanly, [2, 3] falls back graph by graph, and
+        # the lone [4] is rendered directly.
+        self.assertEqual(len(self.pipes), 2)
+        self.assertEqual(self.singles, sources[2:])
+
+    def test_without_graphviz_nothing_renders(self):
+        with mock.patch.dict(sys.modules, {"graphviz": None}):
+            self.assertEqual(wisdom._render_graphviz_batch(["digraph g { a }"]), [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
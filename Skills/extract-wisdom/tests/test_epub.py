@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for the ePub chapter cache in scripts/wisdom.py.
+
+_epub_render_chapter is replaced by a stand-in that gives each chapter one
+diagram image named after its title, so builds need no markdown or
+renderers; the cache and the book live in a temporary directory per test.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import sqlite3
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+
+
+class ChapterCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.base = Path(tmp.name)
+        self.book = self.base / "Library.epub"
+        self.rendered: list[str] = []
+        self.entries = [
+            {"title": f"Entry {n}", "body": f"Body {n}", "date": "2026-01-0{n}"} for n in (2, 1)
+        ]
+
+        def render(title, body, md_lib=None):
+            self.rendered.append(title)
+            name = f"{title.replace(' ', '-')}.png"
+            xhtml = wisdom._xhtml_document(title, f'<p><img src="images/{name}" alt=""/></p>')
+            return xhtml, {name: (b"\x89PNG " + title.encode(), "image/png")}, {}
+
+        for patcher in (
+            mock.patch.object(wisdom, "_epub_render_chapter", render),
+            mock.patch.object(wisdom, "_generate_cover_png", return_value=None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def build(self):
+        self.rendered.clear()
+        wisdom._build_epub(self.base, self.entries, self.book, "Library", None, workers=1)
+        with zipfile.ZipFile(self.book) as zf:
+            return zf.namelist(), zf.read("OEBPS/content.opf").decode()
+
+    def test_unchanged_entries_come_from_the_cache(self):
+        self.build()
+        self.assertEqual(self.rendered, ["Entry 2", "Entry 1"])
+        names, opf = self.build()
+        self.assertEqual(self.rendered, [])
+        for image in ("Entry-2.png", "Entry-1.png"):
+            self.assertIn(f"OEBPS/images/{image}", names)
+            self.assertIn(f'href="images/{image}"', opf)
+
+    def test_chapter_with_a_missing_image_renders_again(self):
+        self.build()
+        with sqlite3.connect(self.base / wisdom._EPUB_CACHE_NAME) as conn:
+            conn.execute("DELETE FROM images WHERE name = 'Entry-1.png'")
+        names, opf = self.build()
+        self.assertEqual(self.rendered, ["Entry 1"])
+        self.assertIn("OEBPS/images/Entry-1.png", names)
+        self.assertIn('href="images/Entry-1.png"', opf)
+        # The image is back in the cache for the build after that.
+        self.build()
+        self.assertEqual(self.rendered, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Tests for the pooled HTTP engine in scripts/wisdom.py.
+
+Requests go to a local HTTP/1.1 server, which counts the TCP connections it
+accepts and the requests each path receives.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+
+PAGE = (
+    b'<html><head><meta property="og:site_name" content="Example">'
+    b'<meta property="og:title" content="A page">'
+    b'<meta property="og:image" content="/img"></head><body></body></html>'
+)
+IMAGE = b"\xff\xd8\xff\xe0 not really a jpeg"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send(self, status, body=b"", **headers):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            server.conditional += bool(self.headers.get("If-None-Match"))
+            hit = server.hits[self.path]
+        if self.path in ("/page", "/img"):
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send(304, ETag='"v1"')
+            else:
+                self.send(200, PAGE if self.path == "/page" else IMAGE, ETag='"v1"')
+        elif self.path == "/drop":
+            # Answer as if keeping the connection open, then close it: the
+            # client's next request on it finds a dead socket.
+            self.send(200, b"dropped")
+            self.close_connection = True
+        elif self.path == "/busy":
+            if hit <= server.busy_for:
+                self.send(503, b"busy", Retry_After=server.retry_after)
+            else:
+                self.send(200, b"ready")
+        elif self.path == "/slow":
+            with server.lock:
+                server.active += 1
+                server.peak = max(server.peak, server.active)
+            time.sleep(0.1)
+            with server.lock:
+                server.active -= 1
+            self.send(200, b"slow")
+        else:
+            self.send(404)
+
+
+class HttpCase(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.connections = server.conditional = server.active = server.peak = 0
+        server.hits = {}
+        server.busy_for = 0
+        server.retry_after = "0"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        self.base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        # A fresh pool, host slots and validator cache per test, and no proxy.
+        for patcher in (
+            mock.patch.dict(wisdom._http_idle, clear=True),
+            mock.patch.dict(wisdom._http_host_slots, clear=True),
+            mock.patch.dict(wisdom._http_cache, {"entries": {}, "dirty": False}),
+            mock.patch.object(wisdom.urllib.request, "getproxies", return_value={}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.close_idle)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def close_idle(self):
+        for conns in wisdom._http_idle.values():
+            for conn in conns:
+                conn.close()
+
+    def get(self, path, **kwargs):
+        return wisdom._http_get(self.base + path, **kwargs)
+
+
+class KeepAliveTests(HttpCase):
+    def test_sequential_requests_share_one_connection(self):
+        for _ in range(5):
+            status, _, body, _ = self.get("/page")
+            self.assertEqual((status, body), (200, PAGE))
+        self.assertEqual(self.server.connections, 1)
+
+    def test_request_on_a_closed_idle_connection_is_replayed(self):
+        self.assertEqual(self.get("/drop")[0], 200)
+        time.sleep(0.1)  # let the server's close land before the reuse
+        status, _, body, _ = self.get("/page")
+        self.assertEqual((status, body), (200, PAGE))
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(self.server.hits["/page"], 1)
+
+    def test_partly_read_body_is_not_pooled(self):
+        self.assertEqual(self.get("/page", max_bytes=10)[2], PAGE[:10])
+        self.assertEqual(self.get("/page")[2], PAGE)
+        self.assertEqual(self.server.connections, 2)
+
+
+class RetryTests(HttpCase):
+    def test_503_is_retried_after_retry_after_seconds(self):
+        self.server.busy_for = 2
+        self.server.retry_after = "7"
+        with mock.patch.object(wisdom.time, "sleep") as sleep:
+            status, _, body, _ = self.get("/busy")
+        self.assertEqual((status, body), (200, b"ready"))
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [7.0, 7.0])
+
+    def test_retry_after_is_capped(self):
+        self.server.busy_for = 1
+        self.server.retry_after = "86400"
+        with mock.patch.object(wisdom.time, "sleep") as sleep:
+            self.get("/busy")
+        sleep.assert_called_once_with(wisdom._HTTP_RETRY_AFTER_MAX_S)
+
+    def test_status_is_returned_once_retries_run_out(self):
+        self.server.busy_for = 99
+        with mock.patch.object(wisdom.time, "sleep"):
+            status = self.get("/busy")[0]
+        self.assertEqual(status, 503)
+        self.assertEqual(self.server.hits["/busy"], wisdom._HTTP_RETRIES + 1)
+
+
+class ConditionalTests(HttpCase):
+    def test_unchanged_page_reuses_cached_metadata(self):
+        first = wisdom._fetch_web_metadata(self.base + "/page")
+        self.assertEqual(first["site_name"], "Example")
+        self.assertEqual(first["image_url"], self.base + "/img")
+        self.assertEqual(wisdom._fetch_web_metadata(self.base + "/page"), first)
+        self.assertEqual((self.server.hits["/page"], self.server.conditional), (2, 1))
+
+    def test_unchanged_thumbnail_is_not_rewritten(self):
+        dest = self.dir / "thumbnail.jpg"
+        self.assertTrue(wisdom._download_thumbnail(self.base + "/img", dest))
+        dest.write_bytes(b"kept")
+        self.assertTrue(wisdom._download_thumbnail(self.base + "/img", dest))
+        self.assertEqual(dest.read_bytes(), b"kept")
+        self.assertEqual(self.server.conditional, 1)
+
+    def test_missing_thumbnail_is_fetched_unconditionally(self):
+        dest = self.dir / "thumbnail.jpg"
+        wisdom._download_thumbnail(self.base + "/img", dest)
+        dest.unlink()
+        self.assertTrue(wisdom._download_thumbnail(self.base + "/img", dest))
+        self.assertTrue(dest.is_file())
+        self.assertEqual(self.server.conditional, 0)
+
+    def test_validators_survive_a_save_and_load(self):
+        wisdom._fetch_web_metadata(self.base + "/page")
+        wisdom._http_cache_save(self.dir)
+        wisdom._http_cache_load(self.dir)
+        self.assertEqual(wisdom._http_cached(self.base + "/page")["etag"], '"v1"')
+
+
+class PerHostTests(HttpCase):
+    def test_concurrent_requests_to_one_host_are_bounded(self):
+        with mock.patch.object(wisdom, "_HTTP_PER_HOST", 2):
+            threads = [threading.Thread(target=self.get, args=("/slow",)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(self.server.hits["/slow"], 8)
+        self.assertEqual(self.server.peak, 2)
+        self.assertLessEqual(self.server.connections, 2)
+
+
+class BackfillTests(HttpCase):
+    def test_validators_are_saved_when_backfill_is_interrupted(self):
+        for name in ("a", "b"):
+            entry = self.dir / name
+            entry.mkdir()
+            (entry / "analysis.md").write_text(
+                f"---\ntitle: {name}\nsource_type: web\nsource: {self.base}/page\n---\n",
+                encoding="utf-8",
+            )
+
+        enrich = wisdom._enrich_entry
+
+        def enrich_then_interrupt(md_path, **kwargs):
+            if md_path.parent.name == "b":
+                raise KeyboardInterrupt
+            return enrich(md_path, **kwargs)
+
+        args = argparse.Namespace(all=True, directory=None, per_host=None, force=False, workers=1)
+        with mock.patch.object(wisdom, "detect_base_dir", return_value=self.dir), \
+                mock.patch.object(wisdom, "_enrich_entry", enrich_then_interrupt), \
+                self.assertRaises(KeyboardInterrupt):
+            wisdom.cmd_backfill(args)
+        saved = json.loads((self.dir / wisdom._HTTP_CACHE_NAME).read_text(encoding="utf-8"))
+        self.assertEqual(saved["entries"][self.base + "/page"]["etag"], '"v1"')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Tests for the streaming json3 subtitle parser in scripts/wisdom.py.
+
+Output is compared against the json.loads parser it replaced (kept in
+bench_json3.py), at read sizes small enough that numbers, escapes, multi-byte
+UTF-8 characters and whitespace runs are cut across chunk boundaries.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import json
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+TESTS = Path(__file__).resolve().parent
+SCRIPTS = TESTS.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+sys.path.insert(0, str(TESTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+from bench_json3 import reference_json3_to_text, write_synthetic_json3  # noqa: E402
+
+# Read sizes from one byte up to the default; each also sets how much text
+# _json3_text_chunks buffers before emitting a piece.
+CHUNK_SIZES = [1, 2, 3, 5, 7, 13, 64, 1 << 20]
+
+# Text pieces that stress whitespace normalisation and UTF-8 decoding.
+PIECES = ["hello", " ", "  ", "\t", "\n", " \n ", "wörld", "é", "\xa0", "日本", "x", ".", "\r", "🎵"]
+
+
+def random_events(rnd: random.Random, count: int) -> list[dict]:
+    events = []
+    t = 0
+    for _ in range(count):
+        t += rnd.choice([0, 100, 1000, 2600, 5000])
+        event: dict = {"tStartMs": t, "dDurationMs": rnd.choice([5, 12345, 999999])}
+        r = rnd.random()
+        if r < 0.1:
+            pass
+        elif r < 0.15:
+            event["segs"] = []
+        else:
+            event["segs"] = [
+                {"utf8": "".join(rnd.choice(PIECES) for _ in range(rnd.randint(0, 5)))}
+                for _ in range(rnd.randint(1, 4))
+            ]
+        events.append(event)
+    return events
+
+
+def dump(path: Path, doc: dict, rnd: random.Random) -> None:
+    path.write_text(
+        json.dumps(doc, ensure_ascii=rnd.random() < 0.5, indent=rnd.choice([None, 1])),
+        encoding="utf-8",
+    )
+
+
+class Json3Case(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def streamed(self, path: Path, chunk: int) -> str:
+        with mock.patch.object(wisdom, "_JSON3_READ_CHUNK", chunk):
+            text = wisdom._json3_to_text(path)
+            out = self.dir / "out.txt"
+            wisdom._json3_to_file(path, out)
+        self.assertEqual(out.read_bytes().decode("utf-8"), text)
+        return text
+
+
+class EquivalenceTests(Json3Case):
+    def test_random_documents_match_the_json_loads_parser(self):
+        rnd = random.Random(1)
+        for trial in range(150):
+            with self.subTest(trial=trial):
+                events = random_events(rnd, rnd.randint(0, 40))
+                doc = {"events": events}
+                if rnd.random() < 0.7:
+                    doc = {"wireMagic": "pb3", "pens": [{}], "events": events, "tail": 12345}
+                path = self.dir / "doc.json3"
+                dump(path, doc, rnd)
+                self.assertEqual(
+                    self.streamed(path, rnd.choice(CHUNK_SIZES)), reference_json3_to_text(path),
+                )
+
+    def test_every_chunk_boundary(self):
+        """Cut a small document at every offset: a number such as 123456 must
+        not decode as 123, nor an escape or a 4-byte character be split."""
+        events = [
+            {"tStartMs": 123456, "segs": [{"utf8": "café \\\"quoted\\\""}]},
+            {"tStartMs": 126000, "segs": [{"utf8": "  🎵 日本  "}, {"utf8": "\n"}]},
+            {"tStartMs": 129999, "segs": [{"utf8": "\ttab\t"}]},
+            {"tStartMs": 1000000, "dDurationMs": 7, "segs": [{"utf8": "late"}]},
+        ]
+        path = self.dir / "edge.json3"
+        for ensure_ascii in (True, False):
+            path.write_text(
+                json.dumps({"pens": [{}], "events": events}, ensure_ascii=ensure_ascii),
+                encoding="utf-8",
+            )
+            expected = reference_json3_to_text(path)
+            for chunk in range(1, path.stat().st_size + 2):
+                with self.subTest(ensure_ascii=ensure_ascii, chunk=chunk):
+                    self.assertEqual(self.streamed(path, chunk), expected)
+
+    def test_synthetic_livestream_captions(self):
+        path = self.dir / "live.json3"
+        write_synthetic_json3(path, 0.5)
+        expected = reference_json3_to_text(path)
+        for chunk in (97, 4096, 1 << 20):
+            with self.subTest(chunk=chunk):
+                self.assertEqual(self.streamed(path, chunk), expected)
+
+    def test_empty_and_missing_events(self):
+        for doc in ({}, {"events": []}, {"pens": [{}]}, {"events": [{"tStartMs": 5}]}):
+            with self.subTest(doc=doc):
+                path = self.dir / "empty.json3"
+                path.write_text(json.dumps(doc), encoding="utf-8")
+                self.assertEqual(self.streamed(path, 3), "")
+
+
+class ReplayTests(Json3Case):
+    def test_replayed_cues_are_dropped(self):
+        rnd = random.Random(2)
+        events = random_events(rnd, 60)
+        replayed = []
+        for event in events:
+            replayed.append(event)
+            if event.get("segs") and rnd.random() < 0.3:
+                replayed.append(dict(event))
+        with_replays = self.dir / "replayed.json3"
+        without = self.dir / "plain.json3"
+        with_replays.write_text(json.dumps({"events": replayed}), encoding="utf-8")
+        without.write_text(json.dumps({"events": events}), encoding="utf-8")
+        self.assertEqual(self.streamed(with_replays, 7), reference_json3_to_text(without))
+
+    def test_same_start_with_different_text_is_kept(self):
+        path = self.dir / "same-start.json3"
+        path.write_text(json.dumps({"events": [
+            {"tStartMs": 0, "segs": [{"utf8": "one"}]},
+            {"tStartMs": 0, "segs": [{"utf8": " two"}]},
+        ]}), encoding="utf-8")
+        self.assertEqual(self.streamed(path, 5), "one two")
+
+
+class MalformedTests(Json3Case):
+    def test_truncated_documents_raise_value_error(self):
+        full = json.dumps({"pens": [{}], "events": [
+            {"tStartMs": 0, "segs": [{"utf8": "alpha"}]},
+            {"tStartMs": 3000, "segs": [{"utf8": "beta"}]},
+        ]})
+        path = self.dir / "truncated.json3"
+        for cut in range(1, len(full)):
+            path.write_text(full[:cut], encoding="utf-8")
+            with self.subTest(cut=cut), self.assertRaises(ValueError):
+                self.streamed(path, 4)
+
+    def test_top_level_must_be_an_object(self):
+        path = self.dir / "array.json3"
+        path.write_text("[]", encoding="utf-8")
+        with self.assertRaises(ValueError):
+            wisdom._json3_to_text(path)
+
+    def test_failed_conversion_leaves_no_file(self):
+        path = self.dir / "bad.json3"
+        path.write_text('{"events": [{"segs"', encoding="utf-8")
+        out = self.dir / "transcript.txt"
+        with self.assertRaises(ValueError):
+            wisdom._json3_to_file(path, out)
+        self.assertEqual(list(self.dir.glob("*.txt")) + list(self.dir.glob(".*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Tests for the mermaid.ink client in scripts/wisdom.py.
+
+Requests go to a local mermaid.ink-compatible stand-in: GET /img/<base64>
+answers with a JPEG whose width encodes the diagram source, and can be told
+to answer 429 with a Retry-After header first. Each test gets its own
+token-bucket lock file.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import base64
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+
+
+def fake_jpeg(width: int, height: int) -> bytes:
+    """Just enough JPEG (SOI, SOF0, EOI) for _jpeg_dimensions."""
+    return (b"\xff\xd8\xff\xc0\x00\x11\x08" + struct.pack(">HH", height, width)
+            + b"\x03" + b"\x00" * 9 + b"\xff\xd9")
+
+
+class InkHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        if not self.path.startswith("/img/"):
+            self.send_error(404)
+            return
+        code = base64.urlsafe_b64decode(self.path[len("/img/"):]).decode()
+        with server.lock:
+            server.requests.append((time.monotonic(), code))
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            limited = server.limited.get(code, 0)
+            if limited:
+                server.limited[code] = limited - 1
+        try:
+            time.sleep(server.delay)
+            if limited:
+                self.send_response(429)
+                if server.retry_after is not None:
+                    self.send_header("Retry-After", server.retry_after)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = fake_jpeg(100 + len(code), 50)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+class InkCase(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), InkHandler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.requests = []
+        server.active = server.peak = 0
+        server.limited = {}
+        server.retry_after = None
+        server.delay = 0.0
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        self.url = f"http://127.0.0.1:{server.server_address[1]}/img/"
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.patch(wisdom, "_MERMAID_INK_URL", self.url)
+        self.patch(wisdom, "_MERMAID_LOCK_PATH", self.dir / "wisdom-mermaid.lock")
+        self.patch(wisdom, "_MERMAID_MIN_INTERVAL_S", 0.0)
+        patcher = mock.patch.dict(os.environ, {"no_proxy": "*", "NO_PROXY": "*"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def patch(self, target, name, value):
+        patcher = mock.patch.object(target, name, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request_times(self) -> list[float]:
+        return sorted(t for t, _ in self.server.requests)
+
+
+class RenderTests(InkCase):
+    def test_diagram_is_fetched_and_measured(self):
+        code = "graph TD; A-->B"
+        [(data, mime, dims)] = wisdom._render_mermaid_ink_many([code])
+        self.assertEqual(mime, "image/jpeg")
+        self.assertEqual(data, fake_jpeg(100 + len(code), 50))
+        self.assertEqual(dims, ((100 + len(code)) * 0.75, 50 * 0.75))
+        self.assertEqual([c for _, c in self.server.requests], [code])
+
+    def test_concurrent_renders_keep_order(self):
+        self.server.delay = 0.2
+        self.patch(wisdom, "_DIAGRAM_RENDER_WORKERS", 4)
+        sources = [f"graph TD; A{'-' * n}->B" for n in range(8)]
+        started = time.monotonic()
+        results = wisdom._render_mermaid_ink_many(sources)
+        elapsed = time.monotonic() - started
+        self.assertEqual([r[2][0] for r in results], [(100 + len(s)) * 0.75 for s in sources])
+        self.assertEqual(self.server.peak, 4)
+        self.assertLess(elapsed, 8 * 0.2)
+
+    def test_client_errors_are_not_retried(self):
+        self.patch(wisdom, "_MERMAID_INK_URL", self.url.replace("/img/", "/missing/"))
+        self.assertEqual(wisdom._render_mermaid_ink_many(["graph TD; A"]), [None])
+
+
+class TokenBucketTests(InkCase):
+    def test_burst_then_sustained_rate(self):
+        self.patch(wisdom, "_MERMAID_MIN_INTERVAL_S", 0.1)
+        self.patch(wisdom, "_MERMAID_BURST", 2)
+        self.patch(wisdom, "_DIAGRAM_RENDER_WORKERS", 4)
+        wisdom._render_mermaid_ink_many([f"graph TD; N{n}" for n in range(6)])
+        times = self.request_times()
+        # Two go out back to back, then one per interval however many threads ask.
+        self.assertLess(times[1] - times[0], 0.05)
+        for earlier, later in zip(times[1:], times[2:]):
+            self.assertGreater(later - earlier, 0.08)
+
+    def test_bucket_is_shared_across_processes(self):
+        script = (
+            "import sys, time; sys.path.insert(0, sys.argv[1]); import wisdom\n"
+            "for _ in range(3): wisdom._mermaid_throttle()\n"
+            "print(time.time())\n"
+        )
+        env = {**os.environ, "TMPDIR": str(self.dir),
+               "WISDOM_MERMAID_MIN_INTERVAL": "0.1", "WISDOM_MERMAID_BURST": "1"}
+        started = time.time()
+        procs = [
+            subprocess.Popen([sys.executable, "-c", script, str(SCRIPTS)], env=env,
+                             stdout=subprocess.PIPE, text=True)
+            for _ in range(2)
+        ]
+        finished = max(float(p.communicate()[0]) for p in procs)
+        # Six tokens at one per 0.1s after a burst of one: at least 0.5s.
+        self.assertGreaterEqual(finished - started, 0.45)
+        self.assertTrue((self.dir / "wisdom-mermaid.lock").is_file())
+
+
+class BackoffTests(InkCase):
+    def setUp(self):
+        super().setUp()
+        self.patch(wisdom, "_MERMAID_MIN_INTERVAL_S", 0.1)
+        self.patch(wisdom, "_MERMAID_BURST", 1)
+        sleep = mock.patch.object(wisdom.time, "sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def waits(self) -> list[float]:
+        return [round(c.args[0], 2) for c in self.sleep.call_args_list]
+
+    def test_retry_after_empties_the_bucket(self):
+        code = "graph TD; Busy"
+        self.server.limited[code] = 1
+        self.server.retry_after = "3"
+        self.assertIsNotNone(wisdom._render_mermaid_ink_many([code])[0])
+        self.assertEqual(len(self.server.requests), 2)
+        # The retry waits out Retry-After plus its own token's interval.
+        self.assertAlmostEqual(max(self.waits()), 3.1, delta=0.05)
+
+    def test_backoff_doubles_without_retry_after(self):
+        code = "graph TD; Down"
+        self.server.limited[code] = wisdom._MERMAID_MAX_RETRIES
+        self.assertEqual(wisdom._render_mermaid_ink_many([code]), [None])
+        self.assertEqual(len(self.server.requests), wisdom._MERMAID_MAX_RETRIES)
+        penalties = [w for w in self.waits() if w >= 1.0]
+        base = wisdom._MERMAID_BACKOFF_BASE_S
+        self.assertEqual(len(penalties), wisdom._MERMAID_MAX_RETRIES - 1)
+        for attempt, wait in enumerate(penalties):
+            self.assertAlmostEqual(wait, base * 2 ** attempt + 0.1, delta=0.05)
+
+    def test_penalty_holds_back_other_callers(self):
+        wisdom._mermaid_throttle(penalty=2.0)
+        wisdom._mermaid_throttle()
+        # The second caller queues behind the penalised token.
+        self.assertAlmostEqual(self.waits()[-1], 2.2, delta=0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Tests for the regenerate-pdfs process pool in scripts/wisdom.py.
+
+_render_pdf_worker is replaced by stand_in_worker, which acts on the file
+name: "crash" files kill their worker 0.3s in every time, "once" files kill
+it at once on the first attempt only, "hang" files block past the timeout,
+"slow" files take 0.8s on their first attempt, anything else renders at
+once. Attempts are logged so tests can count them across worker processes.
+The pool uses the fork start method so workers see the patched module.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import functools
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import unittest
+from concurrent import futures
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+
+
+def stand_in_worker(md_path_str, output_path_str, css_path_str, stamp_date,
+                    timeout=None, profile=False):
+    md_path = Path(md_path_str)
+    with open(md_path.parent.parent / "attempts.log", "a") as log:
+        log.write(md_path.parent.name + "\n")
+    attempt = attempts(md_path.parent.parent)[md_path.parent.name]
+    kind = md_path.parent.name.split("-")[0]
+    if kind == "crash":
+        time.sleep(0.3)
+        os._exit(1)
+    if kind == "once" and attempt == 1:
+        os._exit(1)
+    if kind == "hang":
+        time.sleep(60)
+    if kind == "slow" and attempt == 1:
+        time.sleep(0.8)
+    return output_path_str, {}, None, None, 0.01
+
+
+def attempts(base: Path) -> dict[str, int]:
+    names = (base / "attempts.log").read_text().split()
+    return {name: names.count(name) for name in names}
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "needs fork")
+class PooledRegenerateTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.base = Path(tmp.name)
+        fork_pool = functools.partial(
+            futures.ProcessPoolExecutor, mp_context=multiprocessing.get_context("fork"),
+        )
+        for patcher in (
+            mock.patch.object(wisdom, "_render_pdf_worker", stand_in_worker),
+            mock.patch.object(futures, "ProcessPoolExecutor", fork_pool),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_pool(self, names, *, workers=3, timeout=None):
+        md_files = []
+        for name in names:
+            (self.base / name).mkdir()
+            md_files.append(self.base / name / "analysis.md")
+        results: dict[str, list[str | None]] = {}
+
+        def finished(md_file, output_path, fallbacks, error, stats, seconds):
+            results.setdefault(md_file.parent.name, []).append(error)
+
+        wisdom._regenerate_pdfs_pooled(md_files, "css", False, workers, timeout, False, finished)
+        return results
+
+    def test_every_file_is_reported_once(self):
+        results = self.run_pool([f"ok-{n}" for n in range(6)], workers=2)
+        self.assertEqual(results, {f"ok-{n}": [None] for n in range(6)})
+
+    def test_crasher_is_isolated_and_bystanders_are_retried(self):
+        results = self.run_pool(["crash-a", "slow-b", "slow-c", "ok-d"])
+        self.assertEqual(results["crash-a"], [f"render worker died ({wisdom._PDF_CRASH_ATTEMPTS} times)"])
+        for name in ("slow-b", "slow-c", "ok-d"):
+            self.assertEqual(results[name], [None])
+        counts = attempts(self.base)
+        # One crash alongside the others, then _PDF_CRASH_ATTEMPTS alone.
+        self.assertEqual(counts["crash-a"], 1 + wisdom._PDF_CRASH_ATTEMPTS)
+        # The slow files were in flight when the worker died, so they ran again.
+        self.assertEqual((counts["slow-b"], counts["slow-c"]), (2, 2))
+
+    def test_one_off_crash_is_retried(self):
+        results = self.run_pool(["once-a", "ok-b"], workers=1)
+        self.assertEqual(results, {"once-a": [None], "ok-b": [None]})
+        self.assertEqual(attempts(self.base)["once-a"], 2)
+
+    def test_stuck_worker_is_killed_and_bystanders_requeued(self):
+        # hang-a passes its 1s hard limit while slow-c, sent out at 0.8s
+        # behind slow-b, is still rendering: slow-c is dispatched again.
+        with mock.patch.object(wisdom, "_PDF_TIMEOUT_GRACE_S", 0.5):
+            started = time.monotonic()
+            results = self.run_pool(["hang-a", "slow-b", "slow-c"], workers=2, timeout=0.5)
+        self.assertLess(time.monotonic() - started, 10)
+        [error] = results["hang-a"]
+        self.assertRegex(error, r"^render killed after \d+s \(timeout 0.5s\)$")
+        self.assertEqual((results["slow-b"], results["slow-c"]), ([None], [None]))
+        counts = attempts(self.base)
+        self.assertEqual((counts["hang-a"], counts["slow-b"], counts["slow-c"]), (1, 1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Tests for related-entry scoring in scripts/wisdom.py.
+
+Stdlib unittest, no third-party runner. The vectorised path is skipped when
+NumPy/SciPy are absent; the pure-Python path always runs. Incremental
+updates are checked against a full _compute_related on Zipfian corpora.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import contextlib
+import importlib.util
+import json
+import random
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+
+HAVE_SCIPY = all(importlib.util.find_spec(name) is not None for name in ("numpy", "scipy"))
+
+VOCAB = [f"term{n:03d}" for n in range(150)]
+TAGS = [f"tag{n:02d}" for n in range(20)]
+ISOLATED = "2026-01-01-Isolated"
+ISOLATED_BODY = "zebrafish quokka narwhal axolotl"
+
+
+def build_corpus(count: int = 60, seed: int = 7) -> list[dict]:
+    """Random overlapping entries plus one sharing no term or tag with any."""
+    rng = random.Random(seed)
+    entries = [
+        {
+            "dir_path": f"2026-01-{n:03d}-Entry",
+            "title": f"Entry {n}",
+            "source_type": "web",
+            "tags": rng.sample(TAGS, 3),
+            "body": " ".join(rng.choices(VOCAB, k=40)),
+        }
+        for n in range(count)
+    ]
+    entries.append({
+        "dir_path": ISOLATED, "title": "Isolated", "source_type": "web",
+        "tags": [], "body": ISOLATED_BODY,
+    })
+    return entries
+
+
+def pure_python():
+    """Force _related_rows onto the inverted-index path."""
+    return mock.patch.object(wisdom, "_related_fused_vectorised", return_value=None)
+
+
+def ranking(related: dict) -> dict:
+    return {p: [r["dir_path"] for r in rows] for p, rows in related.items()}
+
+
+@unittest.skipUnless(HAVE_SCIPY, "NumPy/SciPy not installed")
+class VectorisedParityTests(unittest.TestCase):
+    def rows(self, fn, entries):
+        vectors, norms, _ = wisdom._tfidf_vectors(entries)
+        tag_sets = wisdom._entry_tag_sets(entries)
+        return {
+            i: (fused, summary)
+            for i, fused, summary in fn(
+                vectors, norms, tag_sets, wisdom._RELATED_TOP_K, summaries=True,
+            )
+        }
+
+    def assert_summary_equal(self, a, b):
+        self.assertEqual(len(a), len(b))
+        for x, y in zip(a, b):
+            if isinstance(x, list):
+                self.assertIsInstance(y, list)
+                self.assertEqual(len(x), len(y))
+                for u, v in zip(x, y):
+                    self.assertAlmostEqual(u, v, places=9)
+            elif isinstance(x, float):
+                self.assertAlmostEqual(x, y, places=9)
+            else:
+                self.assertEqual(x, y)
+
+    def test_summaries_match_including_a_row_without_candidates(self):
+        entries = build_corpus()
+        python_rows = self.rows(wisdom._related_fused_inverted, entries)
+        numpy_rows = self.rows(wisdom._related_fused_vectorised, entries)
+        self.assertEqual(python_rows.keys(), numpy_rows.keys())
+        for i, (fused, summary) in python_rows.items():
+            np_fused, np_summary = numpy_rows[i]
+            self.assertEqual([f[0] for f in fused], [f[0] for f in np_fused])
+            self.assert_summary_equal(summary, np_summary)
+        self.assertEqual(numpy_rows[len(entries) - 1], ([], ([], -1, [], -1, None, None)))
+
+    def test_row_without_candidates_summary_is_usable(self):
+        entries = build_corpus()
+        _, summary = self.rows(wisdom._related_fused_vectorised, entries)[len(entries) - 1]
+        self.assertEqual(wisdom._row_impact(summary, (0.0, 0.0), (0.3, 0.0)), (True, 0.0))
+
+
+class IncrementalRelatedTests(unittest.TestCase):
+    def run_update(self, first, second, vectorised: bool):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            if vectorised:
+                wisdom._update_related(base, first)
+                return wisdom._update_related(base, second)
+            with pure_python():
+                wisdom._update_related(base, first)
+                return wisdom._update_related(base, second)
+
+    def corpora(self):
+        first = build_corpus()
+        second = [dict(e) for e in first]
+        # Give the isolated entry its first candidate without touching it.
+        second[0]["body"] += " " + ISOLATED_BODY
+        return first, second
+
+    def check(self, vectorised: bool):
+        first, second = self.corpora()
+        updated = ranking(self.run_update(first, second, vectorised))
+        fresh = ranking(wisdom._compute_related(second))
+        self.assertIn("2026-01-000-Entry", updated[ISOLATED])
+        self.assertEqual(updated[ISOLATED], fresh[ISOLATED])
+        self.assertEqual(updated["2026-01-000-Entry"], fresh["2026-01-000-Entry"])
+
+    def test_pure_python_isolated_entry_gains_a_candidate(self):
+        self.check(vectorised=False)
+
+    @unittest.skipUnless(HAVE_SCIPY, "NumPy/SciPy not installed")
+    def test_vectorised_isolated_entry_gains_a_candidate(self):
+        self.check(vectorised=True)
+
+    @unittest.skipUnless(HAVE_SCIPY, "NumPy/SciPy not installed")
+    def test_vectorised_and_pure_python_updates_agree(self):
+        first, second = self.corpora()
+        self.assertEqual(
+            ranking(self.run_update(first, second, vectorised=True)),
+            ranking(self.run_update(first, second, vectorised=False)),
+        )
+
+
+ZIPF_VOCAB = [f"word{n:04d}" for n in range(2000)]
+ZIPF_WEIGHTS = [1 / (rank + 1) for rank in range(len(ZIPF_VOCAB))]
+ZIPF_TAGS = [f"topic{n:02d}" for n in range(40)]
+
+
+def zipf_corpus(seed: int, count: int = 200) -> list[dict]:
+    """Entries whose bodies draw words with Zipfian frequencies, as prose does."""
+    rng = random.Random(seed)
+    return [
+        {
+            "dir_path": f"2026-02-{n:03d}-Entry",
+            "title": f"Entry {n}",
+            "source_type": "web",
+            "tags": rng.sample(ZIPF_TAGS, 3),
+            "body": " ".join(rng.choices(ZIPF_VOCAB, ZIPF_WEIGHTS, k=80)),
+        }
+        for n in range(count)
+    ]
+
+
+def document_frequencies(entries: list[dict]) -> dict[str, int]:
+    return dict(Counter(t for e in entries for t in wisdom._term_weights(e["body"])))
+
+
+class IncrementalContractTests(unittest.TestCase):
+    """_update_related is exact when edits leave document frequencies as
+    they were at the last full recompute. Otherwise unchanged rows keep
+    scores computed under the old IDF: it stays incremental while the drift
+    is within _RELATED_IDF_DRIFT and recomputes in full beyond it."""
+
+    def update(self, first, second, vectorised: bool):
+        """(rankings, saved state) after indexing ``first`` then ``second``."""
+        with tempfile.TemporaryDirectory() as tmp, \
+                (contextlib.nullcontext() if vectorised else pure_python()):
+            base = Path(tmp)
+            wisdom._update_related(base, first)
+            related = wisdom._update_related(base, second)
+            state = json.loads((base / wisdom._RELATED_STATE_NAME).read_text(encoding="utf-8"))
+        return ranking(related), state
+
+    def paths(self):
+        return [False, True] if HAVE_SCIPY else [False]
+
+    def test_edits_keeping_document_frequencies_are_exact(self):
+        for seed in range(3):
+            first = zipf_corpus(seed)
+            second = [dict(e) for e in first]
+            rng = random.Random(100 + seed)
+            for i in rng.sample(range(len(second)), 3):
+                # Same set of words, different counts; new tags.
+                words = sorted(set(second[i]["body"].split()))
+                second[i]["body"] = " ".join(words + rng.choices(words, k=30))
+                second[i]["tags"] = rng.sample(ZIPF_TAGS, 3)
+            self.assertEqual(document_frequencies(first), document_frequencies(second))
+            fresh = ranking(wisdom._compute_related(second))
+            for vectorised in self.paths():
+                with self.subTest(seed=seed, vectorised=vectorised):
+                    self.assertEqual(self.update(first, second, vectorised)[0], fresh)
+
+    def test_drift_within_bound_only_reorders_the_tail(self):
+        top_k = wisdom._RELATED_TOP_K
+        for seed in range(3):
+            first = zipf_corpus(seed)
+            second = [dict(e) for e in first]
+            rng = random.Random(100 + seed)
+            for i in rng.sample(range(len(second)), 2):
+                second[i]["body"] = " ".join(rng.choices(ZIPF_VOCAB, ZIPF_WEIGHTS, k=80))
+                second[i]["tags"] = rng.sample(ZIPF_TAGS, 3)
+            drift = wisdom._idf_drift(
+                Counter(document_frequencies(second)), len(second),
+                document_frequencies(first), len(first),
+            )
+            self.assertLessEqual(drift, wisdom._RELATED_IDF_DRIFT)
+            fresh = ranking(wisdom._compute_related(second))
+            for vectorised in self.paths():
+                with self.subTest(seed=seed, vectorised=vectorised):
+                    updated, state = self.update(first, second, vectorised)
+                    # Incremental: the IDF baseline is still the first corpus.
+                    self.assertEqual(state["df"], document_frequencies(first))
+                    for path, members in fresh.items():
+                        # At most one neighbour swapped, never in the top half.
+                        self.assertLessEqual(len(set(members) ^ set(updated[path])), 2)
+                        self.assertLessEqual(set(members[: top_k // 2]), set(updated[path]))
+
+    def test_drift_beyond_bound_recomputes_exactly(self):
+        first = zipf_corpus(1)
+        second = [dict(e) for e in first]
+        for e in second[:40]:
+            e["body"] += " " + " ".join(f"novel{j}" for j in range(60))
+        drift = wisdom._idf_drift(
+            Counter(document_frequencies(second)), len(second),
+            document_frequencies(first), len(first),
+        )
+        self.assertGreater(drift, wisdom._RELATED_IDF_DRIFT)
+        fresh = ranking(wisdom._compute_related(second))
+        for vectorised in self.paths():
+            with self.subTest(vectorised=vectorised):
+                updated, state = self.update(first, second, vectorised)
+                self.assertEqual(state["df"], document_frequencies(second))
+                self.assertEqual(updated, fresh)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Tests for search query validation in scripts/wisdom.py.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+
+DEFAULTS = {"top": 10, "type": None, "since": None, "until": None, "snippet": True, "facets": False}
+
+
+class SearchSpecTests(unittest.TestCase):
+    def spec(self, raw):
+        return wisdom._search_spec(raw, DEFAULTS)
+
+    def test_string_query_takes_the_defaults(self):
+        spec = self.spec("alignment")
+        self.assertEqual((spec["top"], spec["snippet"], spec["facets"]), (10, True, False))
+
+    def test_top_must_be_a_positive_integer(self):
+        self.assertEqual(self.spec({"query": "x", "top": "3"})["top"], 3)
+        for top in (0, -1, "-5", "ten", None, True, [1]):
+            with self.subTest(top=top), self.assertRaisesRegex(ValueError, "invalid top"):
+                self.spec({"query": "x", "top": top})
+
+    def test_flags_must_be_booleans(self):
+        self.assertFalse(self.spec({"query": "x", "snippet": False})["snippet"])
+        for flag in ("snippet", "facets"):
+            for value in ("false", 0, 1, None):
+                with self.subTest(flag=flag, value=value), \
+                        self.assertRaisesRegex(ValueError, f"invalid {flag}"):
+                    self.spec({"query": "x", flag: value})
+
+    def test_invalid_type_and_dates(self):
+        with self.assertRaisesRegex(ValueError, "invalid type"):
+            self.spec({"query": "x", "type": "podcast"})
+        with self.assertRaisesRegex(ValueError, "invalid since"):
+            self.spec({"query": "x", "since": "last week"})
+        with self.assertRaisesRegex(ValueError, "empty search query"):
+            self.spec({"query": "  "})
+
+
+if __name__ == "__main__":
+    unittest.main()
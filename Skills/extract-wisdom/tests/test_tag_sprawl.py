@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Tests for the blocked tag-sprawl check in scripts/wisdom.py.
+
+Output is compared against the all-pairs scan it replaced (kept in
+bench_tag_sprawl.py), on vocabularies dense enough in near-duplicates that
+many pairs sit right at the _TAG_SPRAWL_RATIO threshold.
+
+Run: python3 -m unittest discover -s tests -v
+"""
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+TESTS = Path(__file__).resolve().parent
+SCRIPTS = TESTS.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+sys.path.insert(0, str(TESTS))
+
+import wisdom  # noqa: E402  # pyright: ignore[reportMissingImports]
+from bench_tag_sprawl import reference_detect_tag_sprawl, synthetic_tags  # noqa: E402
+
+
+def dense_vocabulary(rng: random.Random) -> dict[str, int]:
+    """Kebab-case tags over a small alphabet, with plural, truncated and
+    one-letter-substituted variants, so similar pairs are common."""
+    alphabet = "abcdeilmnorst"
+    words: set[str] = set()
+    for _ in range(rng.randint(5, 60)):
+        word = "-".join(
+            "".join(rng.choices(alphabet, k=rng.randint(1, 9)))
+            for _ in range(rng.randint(1, 3))
+        )
+        words.add(word)
+        if rng.random() < 0.5:
+            words.add(word + "s")
+        if rng.random() < 0.3 and len(word) > 3:
+            words.add(word[:-1])
+        if rng.random() < 0.3:
+            k = rng.randrange(len(word))
+            words.add(word[:k] + rng.choice(alphabet) + word[k + 1:])
+    return {w: rng.randint(1, 5) for w in sorted(words, key=lambda _: rng.random())}
+
+
+def reference(tag_freq: dict[str, int]) -> list[tuple[str, int, str, int]]:
+    return reference_detect_tag_sprawl(tag_freq, wisdom._TAG_SPRAWL_RATIO)
+
+
+class EquivalenceTests(unittest.TestCase):
+    def test_dense_vocabularies_match_the_all_pairs_scan(self):
+        for seed in range(40):
+            tag_freq = dense_vocabulary(random.Random(seed))
+            with self.subTest(seed=seed, tags=len(tag_freq)):
+                self.assertEqual(wisdom._detect_tag_sprawl(tag_freq), reference(tag_freq))
+
+    def test_synthetic_vocabulary_matches_the_all_pairs_scan(self):
+        tag_freq = synthetic_tags(300, seed=1)
+        result = wisdom._detect_tag_sprawl(tag_freq)
+        self.assertTrue(result)
+        self.assertEqual(result, reference(tag_freq))
+
+    def test_candidates_cover_every_similar_pair(self):
+        for seed in range(10):
+            tags = list(dense_vocabulary(random.Random(1000 + seed)))
+            similar = {
+                (i, j)
+                for i in range(len(tags)) for j in range(i + 1, len(tags))
+                if wisdom._tags_similar(tags[i], tags[j])
+            }
+            with self.subTest(seed=seed):
+                self.assertLessEqual(similar, wisdom._tag_sprawl_candidates(tags))
+
+
+class RuleTests(unittest.TestCase):
+    def test_short_tags_use_containment(self):
+        tag_freq = {"ai": 9, "ai-safety": 3, "rl": 5, "rlhf": 2, "guardrails": 4, "ml": 1}
+        self.assertEqual(wisdom._detect_tag_sprawl(tag_freq), [
+            ("ai", 9, "ai-safety", 3),
+            ("rl", 5, "rlhf", 2),
+        ])
+
+    def test_more_used_tag_comes_first_and_ties_keep_scan_order(self):
+        tag_freq = {"prompting": 2, "prompt-engineering": 2, "prompt-engineer": 2, "promptings": 7}
+        result = wisdom._detect_tag_sprawl(tag_freq)
+        self.assertEqual(result[0], ("promptings", 7, "prompting", 2))
+        self.assertEqual(result, reference(tag_freq))
+
+    def test_no_tags(self):
+        self.assertEqual(wisdom._detect_tag_sprawl({}), [])
+        self.assertEqual(wisdom._tag_sprawl_candidates([]), set())
+
+
+if __name__ == "__main__":
+    unittest.main()